@@ -0,0 +1,27 @@
+"""Write-then-rename file updates
+
+The new content goes to a temporary file next to the target, which then
+replaces it in one ``os.replace``. A crash or a concurrent reader sees the
+old file or the new one, never a half-written file.
+"""
+
+import json
+import os
+import tempfile
+
+
+def write_json(path, value, **options):
+    """Replace `path` with `value` as JSON; `options` go to ``json.dump``"""
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = '.' + os.path.splitext(os.path.basename(path))[0] + '-'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=prefix, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, **options)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,22 @@
+"""Offline benchmarks for the WhatsApp scheduler.
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_groq_transport``.
+``python -m benchmarks.suite`` runs the main scenarios and writes one JSON
+report that a later run can be compared against.
+"""
+
+import json
+import sys
+from contextlib import redirect_stdout
+
+
+def report(run, *args, ensure_ascii=True, **kwargs):
+    """Call run(*args, **kwargs) and print its result as JSON; returns the result
+
+    The bot logs with print(), so that goes to stderr while `run` works and
+    stdout holds only the JSON result.
+    """
+    with redirect_stdout(sys.stderr):
+        result = run(*args, **kwargs)
+    print(json.dumps(result, indent=2, ensure_ascii=ensure_ascii))
+    return result
@@ -0,0 +1,95 @@
+"""Wall time for generating many messages: one at a time, threads, asyncio.
+
+Generates N messages (N = 1, 10, 100 by default) against the mock Groq
+server with ``--latency`` seconds of jittered latency per request. Modes:
+sequential ``generate_hunger_message`` calls (how the buffer refill used
+to work), the same calls from a thread pool of ``--concurrency`` threads,
+``generate_hunger_messages`` on the async client with ``groq_concurrency``
+set to ``--concurrency``, and an async client with every request in
+flight at once. Pools are warmed first. Needs aiohttp.
+
+    python -m benchmarks.bench_async_groq --counts 1 10 100 --concurrency 10
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.mock_groq import MockGroqServer
+
+
+def _timed(generate, count):
+    start = time.perf_counter()
+    messages = generate(count)
+    seconds = time.perf_counter() - start
+    return {"wall_s": round(seconds, 3), "failed": sum(m is None for m in messages)}
+
+
+def sequential(count):
+    return [whatsapp_bot.generate_hunger_message("bench") for _ in range(count)]
+
+
+def threaded(concurrency):
+    def generate(count):
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(whatsapp_bot.generate_hunger_message, ["bench"] * count))
+    return generate
+
+
+def asynchronous(client):
+    def generate(count):
+        prompts = [whatsapp_bot.hunger_prompt("bench")] * count
+        return client.run(client.gather(prompts))
+    return generate
+
+
+def run(counts=(1, 10, 100), latency=(0.3, 0.8), concurrency=10, sequential_max=10):
+    results = []
+    with MockGroqServer(latency=latency, seed=1) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0, groq_concurrency=concurrency)
+        shared = whatsapp_bot.get_async_groq_client()
+        # Warm every pool so connection set-up is not charged to one mode
+        threaded(concurrency)(concurrency)
+        asynchronous(shared)(concurrency)
+        for count in counts:
+            row = {"count": count}
+            # Sequential is N x latency; beyond a few runs it only shows that
+            if count <= sequential_max:
+                row["sequential"] = _timed(sequential, count)
+            row["threads"] = _timed(threaded(concurrency), count)
+            row["async"] = _timed(
+                lambda n: whatsapp_bot.generate_hunger_messages(["bench"] * n), count)
+            unbounded = whatsapp_bot.AsyncGroqAPI("mock-key", base_url=server.url, concurrency=count)
+            asynchronous(unbounded)(count)
+            row["async_all_in_flight"] = _timed(asynchronous(unbounded), count)
+            unbounded.close()
+            results.append(row)
+        shared.close()
+        requests = server.requests
+    return {
+        "mock_latency_s": list(latency),
+        "concurrency": concurrency,
+        "mock_requests": requests,
+        "runs": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100],
+                        help="messages generated per run")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.3, 0.8],
+                        metavar=("LOW", "HIGH"), help="mock latency range (s)")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="threads / groq_concurrency")
+    parser.add_argument("--sequential-max", type=int, default=10,
+                        help="skip the sequential mode above this count")
+    args = parser.parse_args()
+    report(run, args.counts, tuple(args.latency), args.concurrency, args.sequential_max)
+
+
+if __name__ == "__main__":
+    main()
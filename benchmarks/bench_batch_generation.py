@@ -0,0 +1,138 @@
+"""Groq calls and tokens per day: per-slot generation vs one batched call.
+
+Per-slot: one ``generate_hunger_message`` call, carrying the full system
+prompt, for every slot of every group of every day. Batch: one JSON-mode
+``generate_message_batch`` call covering all slots and groups for several
+days. Token counts are the mock server's estimate (4 characters per token).
+
+    python -m benchmarks.bench_batch_generation --groups 1 5 --days 3
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.mock_groq import MockGroqServer
+from dedup import DuplicateIndex
+
+FOODS = ("samosa", "pakode", "maggi", "poha", "idli", "dosa", "vada pav", "bhel puri",
+         "chole bhature", "paratha", "jalebi", "dhokla", "upma", "kachori", "pav bhaji")
+FEELINGS = ("chuhe daud rahe hain", "drum baja raha hai", "strike pe hai",
+            "protest kar raha hai", "cricket khel raha hai", "DJ night manaa raha hai")
+TIPS = ("ek glass paani pee lo", "thode bhune chane kha lo", "ek fruit le lo",
+        "mutthi bhar badam kha lo", "chhaas pee lo", "das minute walk kar lo")
+TREATS = ("dark chocolate ka ek tukda", "chhota sa chocolate square",
+          "ek chocolate bite", "thodi si chocolate")
+FILLER = ("yaar boss office meeting deadline traffic metro bus ghar mummy dost "
+          "chai coffee mood energy neend kaam laptop excel call zoom weekend "
+          "shaam subah raat baarish garmi thand cricket match series gaana").split()
+
+
+class MessageWriter:
+    """Plays the LLM: distinct, valid 3-line messages for either prompt"""
+
+    def __init__(self, seed=7):
+        self.rng = random.Random(seed)
+        self.count = 0
+
+    def _filler(self):
+        return " ".join(self.rng.sample(FILLER, 4))
+
+    def message(self):
+        rng = self.rng
+        self.count += 1
+        return "\n".join((
+            f"{self._filler()}, pet mein {rng.choice(FEELINGS)}, "
+            f"{rng.choice(FOODS)} yaad aa raha hai 😋",
+            f"{self._filler()}, abhi {rng.choice(TIPS)} 💧",
+            f"{self._filler()}, baad mein {rng.choice(TREATS)} bhi chalega 🍫",
+        ))
+
+    def __call__(self, payload):
+        if payload.get("response_format", {}).get("type") != "json_object":
+            return self.message()
+        user = payload["messages"][-1]["content"]
+        wanted = json.loads(re.search(r"\{.*\}", user, re.DOTALL).group(0))["requests"]
+        return json.dumps({"messages": [
+            {"slot": request["slot"], "message": self.message()}
+            for request in wanted for _ in range(request["count"])
+        ]}, ensure_ascii=False)
+
+
+def _usage(client, before):
+    return {name: client.usage[name] - before[name] for name in before}
+
+
+def _per_day(usage, days):
+    tokens = usage["prompt_tokens"] + usage["completion_tokens"]
+    return {
+        "calls": round(usage["calls"] / days, 2),
+        "prompt_tokens": round(usage["prompt_tokens"] / days),
+        "completion_tokens": round(usage["completion_tokens"] / days),
+        "total_tokens": round(tokens / days),
+    }
+
+
+def run(groups=(1, 5), days=3, latency=0.0):
+    slots = list(whatsapp_bot.config["message_templates"])
+    workdir = tempfile.mkdtemp(prefix="batch-bench-")
+    results = []
+
+    with MockGroqServer(latency=latency, responder=MessageWriter()) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        client = whatsapp_bot.get_groq_client()
+
+        for group_count in groups:
+            whatsapp_bot.duplicates = DuplicateIndex(
+                os.path.join(workdir, f"dedup-{group_count}.db"))
+
+            before = dict(client.usage)
+            valid = 0
+            for _ in range(days):
+                for slot in slots:
+                    for _ in range(group_count):
+                        message = whatsapp_bot.generate_hunger_message(
+                            whatsapp_bot.config["message_templates"][slot])
+                        valid += whatsapp_bot.is_valid_message(message)
+            per_slot = _per_day(_usage(client, before), days)
+            per_slot["valid_messages"] = valid
+
+            before = dict(client.usage)
+            batch = whatsapp_bot.generate_message_batch(
+                {slot: group_count * days for slot in slots})
+            batched = _per_day(_usage(client, before), days)
+            batched["valid_messages"] = sum(len(messages) for messages in batch.values())
+
+            results.append({
+                "groups": group_count,
+                "days_per_batch": days,
+                "per_slot_per_day": per_slot,
+                "batch_per_day": batched,
+                "calls_saved_per_day": round(per_slot["calls"] - batched["calls"], 2),
+                "tokens_saved_per_day": per_slot["total_tokens"] - batched["total_tokens"],
+                "prompt_tokens_saved_per_day":
+                    per_slot["prompt_tokens"] - batched["prompt_tokens"],
+            })
+
+    return {"slots": slots, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--days", type=int, default=3,
+                        help="days covered by one batch call")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="server processing time per request (s)")
+    args = parser.parse_args()
+    report(run, args.groups, args.days, args.latency)
+
+
+if __name__ == "__main__":
+    main()
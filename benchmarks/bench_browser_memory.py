@@ -0,0 +1,154 @@
+"""Browser memory over a simulated multi-day run, with and without recycling.
+
+There is no Chrome here, so each fake browser owns a real child process
+whose resident memory grows the way a long-lived WhatsApp Web tab does: a
+little every simulated hour and a little per message sent. Closing the tab
+frees most of it (a share is kept by the browser process); a restart
+frees everything. The session watchdog's maintenance runs every simulated
+step with the simulated clock, so recycling only happens in the quiet
+gaps between the day's slots. RSS is read with procmem, as for Chrome.
+
+    python -m benchmarks.bench_browser_memory --days 4 --limit-mb 120
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+LINK = "https://chat.whatsapp.com/G001"
+MB = 1024 * 1024
+
+CHILD = r"""
+import sys
+retain = float(sys.argv[1])
+page, kept = [], []
+for line in sys.stdin:
+    command, _, arg = line.strip().partition(' ')
+    if command == 'grow':
+        page.append(b'x' * int(arg))
+    elif command == 'close_tab':
+        freed = sum(map(len, page))
+        page.clear()
+        kept.append(b'x' * int(freed * retain))
+    sys.stdout.write('ok\n')
+    sys.stdout.flush()
+"""
+
+
+class _Service:
+    def __init__(self, process):
+        self.process = process
+
+
+class LeakyBrowser(FakeWhatsAppDriver):
+    """Fake driver backed by a process that holds the 'page' memory"""
+
+    def __init__(self, retain, **kwargs):
+        super().__init__(**kwargs)
+        self.service = _Service(subprocess.Popen(
+            [sys.executable, "-c", CHILD, str(retain)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True))
+
+    def _tell(self, line):
+        self.service.process.stdin.write(line + "\n")
+        self.service.process.stdin.flush()
+        self.service.process.stdout.readline()
+
+    def grow(self, megabytes):
+        self._tell(f"grow {int(megabytes * MB)}")
+
+    def close(self):
+        super().close()
+        self._tell("close_tab")
+
+    def quit(self):
+        super().quit()
+        self.service.process.stdin.close()
+        self.service.process.wait()
+
+
+def simulate(days, step_minutes, idle_mb_per_hour, send_mb, retain, limit_mb, max_age_hours):
+    whatsapp_bot.config.update(
+        whatsapp_group_link=LINK, groups=[], browser_rss_limit_mb=limit_mb,
+        browser_max_age_hours=max_age_hours, recycle_quiet_minutes=10,
+    )
+    whatsapp_bot.chat_cache.clear()
+
+    def start(profile_dir):
+        driver = LeakyBrowser(retain, rtt=0, page_load=0, render_delay=0)
+        driver.get(whatsapp_bot.WHATSAPP_URL)
+        return driver
+
+    pool = whatsapp_bot.SendPool(1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", start))
+    dog = whatsapp_bot.SessionWatchdog(pool)
+    session = pool.primary
+    now = datetime(2026, 1, 5, 0, 0, tzinfo=whatsapp_bot.scheduler.tz)
+    session.ensure_driver()
+    session.started_at = now.timestamp()
+
+    step = timedelta(minutes=step_minutes)
+    samples, recycles, sends = [], {"tab": 0, "restart": 0}, 0
+    for _ in range(int(days * 24 * 60 / step_minutes)):
+        previous, now = now, now + step
+        session.driver.grow(idle_mb_per_hour * step_minutes / 60)
+        for _ in whatsapp_bot.upcoming_slots(now=previous, until=now):
+            whatsapp_bot.send_to_whatsapp_group(f"slot {sends}\nline two\nline three", LINK, session)
+            session.driver.grow(send_mb)
+            sends += 1
+        with session.lock:
+            how = dog._maintain(0, session, now)
+        if how:
+            recycles[how] += 1
+            if how == "restart":
+                session.started_at = now.timestamp()
+        samples.append(session.rss() / MB)
+    session.quit()
+
+    last_day = samples[-int(24 * 60 / step_minutes):]
+    return {
+        "limit_mb": limit_mb or None,
+        "max_age_hours": max_age_hours or None,
+        "sends": sends,
+        "recycles": recycles,
+        "peak_rss_mb": round(max(samples), 1),
+        "last_day_mean_rss_mb": round(statistics.mean(last_day), 1),
+        "final_rss_mb": round(samples[-1], 1),
+        "rss_mb_per_day_end": [round(samples[int(24 * 60 / step_minutes) * (d + 1) - 1], 1)
+                               for d in range(int(days))],
+    }
+
+
+def run(days=4, step_minutes=15, idle_mb_per_hour=3.0, send_mb=4.0, retain=0.2,
+        limit_mb=120, max_age_hours=24):
+    args = (days, step_minutes, idle_mb_per_hour, send_mb, retain)
+    return {
+        "days": days,
+        "no_recycling": simulate(*args, 0, 0),
+        "rss_limit": simulate(*args, limit_mb, 0),
+        "rss_limit_and_max_age": simulate(*args, limit_mb, max_age_hours),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=4)
+    parser.add_argument("--step-minutes", type=int, default=15, help="simulated time per step")
+    parser.add_argument("--idle-mb-per-hour", type=float, default=3.0)
+    parser.add_argument("--send-mb", type=float, default=4.0, help="growth per message sent")
+    parser.add_argument("--retain", type=float, default=0.2,
+                        help="share of a closed tab's memory the browser keeps")
+    parser.add_argument("--limit-mb", type=int, default=120, help="browser_rss_limit_mb")
+    parser.add_argument("--max-age-hours", type=float, default=24, help="browser_max_age_hours")
+    args = parser.parse_args()
+    report(run, args.days, args.step_minutes, args.idle_mb_per_hour, args.send_mb, args.retain,
+           args.limit_mb, args.max_age_hours)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Composer insertion: per-line send_keys vs one-shot paste script.
+
+Compares WebDriver round-trips and wall time for several message sizes.
+Uses the fake driver (with a per-command round-trip cost) by default, or
+headless Chrome on benchmarks/fixtures/whatsapp_web.html with --chrome.
+
+    python -m benchmarks.bench_composer --rtt 0.005
+"""
+
+import argparse
+import statistics
+import time
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.bench_navigation import _chrome_driver, _serve_fixtures
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+LINES = [
+    "Pet mein chuhe daud rahe hain 🐭🍛",
+    "Ek glass paani pi lo, energy bani rahegi 💧",
+    "Ek chhota sa chocolate bhi chalega 🍫",
+]
+SIZES = {"3_lines": 3, "12_lines": 12, "48_lines": 48}
+
+
+def _message(lines):
+    return "\n".join(LINES[i % len(LINES)] for i in range(lines))
+
+
+def _open_chat(use_chrome, rtt):
+    if use_chrome:
+        server = _serve_fixtures()
+        driver = _chrome_driver()
+        link = f"http://127.0.0.1:{server.server_address[1]}/whatsapp_web.html?invite=bench"
+    else:
+        server = None
+        driver = FakeWhatsAppDriver(rtt=rtt, page_load=0, render_delay=0)
+        link = "https://chat.whatsapp.com/BENCH"
+    session = whatsapp_bot.WhatsAppSession()
+    session.driver = driver
+    whatsapp_bot.chat_cache.clear()
+    return driver, server, whatsapp_bot.open_group_chat(session, link)
+
+
+def _composer_text(driver, box, use_chrome):
+    return driver.execute_script("return arguments[0].innerText", box) if use_chrome else box.text
+
+
+def measure(mode, message, repeats, use_chrome, rtt):
+    driver, server, box = _open_chat(use_chrome, rtt)
+    times, commands, correct = [], [], 0
+    try:
+        for _ in range(repeats):
+            before = getattr(driver, 'commands', 0)
+            start = time.perf_counter()
+            if mode == 'paste':
+                ok = whatsapp_bot.paste_message(driver, box, message)
+            else:
+                whatsapp_bot.type_message(driver, box, message)
+                ok = True
+            times.append(time.perf_counter() - start)
+            commands.append(getattr(driver, 'commands', 0) - before)
+            text = _composer_text(driver, box, use_chrome)
+            correct += ok and whatsapp_bot._normalize_text(text) == whatsapp_bot._normalize_text(message)
+            driver.execute_script(whatsapp_bot.CLEAR_COMPOSER_JS, box)
+    finally:
+        driver.quit()
+        if server:
+            server.shutdown()
+    result = {"mean_ms": round(statistics.mean(times) * 1000, 2), "correct": f"{correct}/{repeats}"}
+    if not use_chrome:
+        result["round_trips"] = commands[0]
+    return result
+
+
+def run(repeats=5, use_chrome=False, rtt=0.005):
+    result = {"backend": "chrome" if use_chrome else f"fake (rtt={rtt}s)"}
+    for name, lines in SIZES.items():
+        message = _message(lines)
+        typed = measure('type', message, repeats, use_chrome, rtt)
+        pasted = measure('paste', message, repeats, use_chrome, rtt)
+        result[name] = {
+            "chars": len(message),
+            "type": typed,
+            "paste": pasted,
+            "speedup": round(typed["mean_ms"] / pasted["mean_ms"], 1),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rtt", type=float, default=0.005,
+                        help="fake driver cost per WebDriver command (s)")
+    parser.add_argument("--chrome", action="store_true",
+                        help="use headless Chrome and the HTML fixture")
+    args = parser.parse_args()
+    report(run, args.repeats, args.chrome, args.rtt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Config file hot reload: time until an edit is live, with the browser kept.
+
+Runs the scheduler with a fake browser session, then rewrites the config
+file several times (new slot times, a renamed slot label, another group,
+a timezone change) and times each edit until the running scheduler's job
+table matches it. Also checks that an invalid edit changes nothing and
+that the browser driver was never restarted. For comparison, applying a
+change by restarting costs a browser start-up, ``--cold-init`` seconds
+here (WhatsApp Web takes tens of seconds, plus the QR risk).
+
+    python -m benchmarks.bench_config_reload --interval 0.2 --edits 10
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import configfile
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+LINK = "https://chat.whatsapp.com/G001"
+OTHER = "https://chat.whatsapp.com/G002"
+
+
+def _edits(count):
+    """Config file contents to apply in turn"""
+    edits = []
+    for n in range(count):
+        minute = f"{n % 60:02d}"
+        values = {
+            "whatsapp_group_link": LINK,
+            "schedule_times": {"morning": f"11:{minute}", "afternoon": f"16:{minute}"},
+            "message_templates": {"morning": "Pre-Lunch Hunger", "afternoon": f"Snack Time #{n}"},
+        }
+        if n % 3 == 1:
+            values["groups"] = [{"name": "office", "whatsapp_group_link": OTHER,
+                                 "schedule_times": {"morning": f"10:{minute}"}}]
+        if n % 4 == 2:
+            values["timezone"] = "Europe/London"
+        edits.append(values)
+    return edits
+
+
+def _live_jobs():
+    return {name: at for name, (at, _) in whatsapp_bot.scheduler._jobs.items()}
+
+
+def _expected_jobs(values):
+    jobs = {f"default/{slot}": at for slot, at in values["schedule_times"].items()}
+    for group in values.get("groups", []):
+        for slot, at in group["schedule_times"].items():
+            jobs[f"{group['name']}/{slot}"] = at
+    return jobs
+
+
+def run(interval=0.2, edits=10, cold_init=2.0, timeout=10.0):
+    path = os.path.join(tempfile.mkdtemp(prefix="config-reload-"), "config.json")
+    whatsapp_bot.CONFIG_PATH = path
+    whatsapp_bot.config.update(api_key="mock-key", groups=[], timezone="Asia/Kolkata")
+    watcher = configfile.ConfigWatcher(path, whatsapp_bot.apply_config, interval)
+    whatsapp_bot.config_watcher = watcher
+
+    starts = []
+
+    def start(profile_dir):
+        began = time.perf_counter()
+        time.sleep(cold_init)
+        driver = FakeWhatsAppDriver(rtt=0, page_load=0, render_delay=0)
+        driver.get(whatsapp_bot.WHATSAPP_URL)
+        starts.append(time.perf_counter() - began)
+        return driver
+
+    pool = whatsapp_bot.SendPool(1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", start))
+    whatsapp_bot.send_pool = pool
+    pool.primary.ensure_driver()
+    driver = pool.primary.driver
+
+    configfile.save(path, {"whatsapp_group_link": LINK})
+    watcher.check()
+    whatsapp_bot.config["is_running"] = True
+    whatsapp_bot.scheduler.set_jobs(whatsapp_bot.slot_jobs(), timezone=whatsapp_bot.config["timezone"])
+    whatsapp_bot.scheduler.start()
+    watcher.start()
+
+    latencies, apply_times, missed = [], [], 0
+    for values in _edits(edits):
+        expected = _expected_jobs(values)
+        written = time.perf_counter()
+        configfile.save(path, values)
+        while _live_jobs() != expected and time.perf_counter() - written < timeout:
+            time.sleep(0.005)
+        if _live_jobs() != expected:
+            missed += 1
+            continue
+        latencies.append(time.perf_counter() - written)
+        timezone = values.get("timezone", "Asia/Kolkata")
+        if str(whatsapp_bot.scheduler.tz) != timezone:
+            missed += 1
+        # Re-apply the same settings directly to time the apply step alone
+        began = time.perf_counter()
+        whatsapp_bot.config.update(schedule_times={})
+        whatsapp_bot.apply_config(values)
+        apply_times.append(time.perf_counter() - began)
+
+    # An invalid edit must leave the running settings alone
+    before = (_live_jobs(), dict(whatsapp_bot.config["schedule_times"]))
+    configfile.save(path, {"schedule_times": {"morning": "25:99"}})
+    time.sleep(interval * 3)
+    rejected = {
+        "unchanged": (_live_jobs(), whatsapp_bot.config["schedule_times"]) == before,
+        "error": watcher.error,
+    }
+
+    watcher.stop()
+    whatsapp_bot.scheduler.stop()
+    whatsapp_bot.config["is_running"] = False
+    return {
+        "poll_interval_s": interval,
+        "edits": edits,
+        "missed": missed,
+        "edit_to_live_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+        },
+        "apply_ms": round(statistics.median(apply_times) * 1000, 2),
+        "invalid_edit": rejected,
+        "driver_starts": len(starts),
+        "same_driver": pool.primary.driver is driver,
+        "restart_instead_s": round(statistics.mean(starts), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=0.2, help="config_reload_interval (s)")
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--cold-init", type=float, default=2.0, help="fake browser start-up (s)")
+    args = parser.parse_args()
+    report(run, args.interval, args.edits, args.cold_init)
+
+
+if __name__ == "__main__":
+    main()
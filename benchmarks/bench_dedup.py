@@ -0,0 +1,118 @@
+"""Near-duplicate index lookup latency and memory at growing history sizes.
+
+Fills a DuplicateIndex with synthetic 3-line messages up to each size and,
+at every checkpoint, times lookups of both lightly edited copies of stored
+messages (should be flagged) and unseen messages (should not).
+
+    python -m benchmarks.bench_dedup --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import report
+from dedup import DuplicateIndex
+
+WORDS = (
+    "chai biscuit samosa pakode maggi paratha lassi chole bhature poha upma idli dosa "
+    "vada pav bhel puri jalebi rasgulla paani nimbu fruits nuts badam chana salad dahi "
+    "pet bhookh office meeting boss lunch dinner raat shaam subah mood energy stretch walk "
+    "neend khana plate dabba tiffin chocolate dark piece tukda sweet craving snack time"
+).split()
+
+
+def make_message(rng):
+    lines = []
+    for _ in range(3):
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(7, 11))))
+    return "\n".join(lines)
+
+
+def edit(message, rng):
+    """Swap one word, as an LLM rephrasing a joke would"""
+    words = message.split(" ")
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run(sizes=(10_000, 100_000, 1_000_000), lookups=1000, threshold=0.6, path=None):
+    workdir = None
+    if path is None:
+        workdir = tempfile.mkdtemp(prefix="dedup-bench-")
+        path = os.path.join(workdir, "dedup.db")
+    index = DuplicateIndex(path, threshold)
+    rng = random.Random(42)
+    stored_sample = []
+    results = []
+    count = 0
+
+    for size in sorted(sizes):
+        began = time.perf_counter()
+        while count < size:
+            batch = [make_message(rng) for _ in range(min(10_000, size - count))]
+            index.add_many(batch)
+            if len(stored_sample) < lookups:
+                stored_sample.extend(batch[:lookups - len(stored_sample)])
+            count += len(batch)
+        insert_s = time.perf_counter() - began
+
+        latencies, flagged_dupes, flagged_fresh = [], 0, 0
+        for i in range(lookups):
+            dupe = edit(rng.choice(stored_sample), rng)
+            fresh = make_message(rng)
+            for text, is_dupe in ((dupe, True), (fresh, False)):
+                start = time.perf_counter()
+                flagged = index.is_duplicate(text)
+                latencies.append(time.perf_counter() - start)
+                if flagged and is_dupe:
+                    flagged_dupes += 1
+                elif flagged:
+                    flagged_fresh += 1
+        latencies.sort()
+        results.append({
+            "stored": count,
+            "insert_per_s": round((count - (results[-1]["stored"] if results else 0)) / insert_s),
+            "lookup_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "lookup_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+            "recall_near_duplicates": round(flagged_dupes / lookups, 3),
+            "false_positive_rate": round(flagged_fresh / lookups, 4),
+            "process_rss_mb": rss_mb(),
+            "db_mb": round(sum(os.path.getsize(path + s) for s in ("", "-wal")
+                               if os.path.exists(path + s)) / 1e6, 1),
+        })
+
+    index.close()
+    if workdir:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.rmdir(workdir)
+    return {"threshold": threshold, "checkpoints": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--db", help="keep the index at this path")
+    args = parser.parse_args()
+    report(run, args.sizes, args.lookups, args.threshold, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""One slot end to end: from the slot firing to the outbox row marked sent.
+
+Runs ``run_slot`` for a series of groups against the mock Groq server and
+a send pool of fake drivers, with the outbox, lease and duplicate stores in
+a temporary directory, and times each slot until its outbox row is 'sent'.
+Paths: the message was pre-generated (buffer hit), the buffer ran dry and
+the message is generated inline, and Groq is down so the slot falls back
+to the offline corpus once the deadline passes.
+
+    python -m benchmarks.bench_end_to_end --slots 10 --latency 0.2 0.5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.bench_batch_generation import MessageWriter
+from benchmarks.fake_driver import FakeWhatsAppDriver
+from benchmarks.mock_groq import MockGroqServer
+from dedup import DuplicateIndex
+from fallback import FallbackCorpus
+from leases import LeaseStore
+from outbox import Outbox, idempotency_key
+
+SLOT = "afternoon"
+
+
+def _setup(workdir, page_load, rtt):
+    whatsapp_bot.outbox = Outbox(os.path.join(workdir, "outbox.db"))
+    whatsapp_bot.leases = LeaseStore(os.path.join(workdir, "leases.db"), node_id="bench")
+    whatsapp_bot.duplicates = DuplicateIndex(os.path.join(workdir, "dedup.db"))
+    whatsapp_bot.fallback_corpus = FallbackCorpus(
+        whatsapp_bot.config["fallback_path"], os.path.join(workdir, "fallback_state.json"),
+        whatsapp_bot.is_valid_message)
+    whatsapp_bot.message_buffer.discard([SLOT])
+
+    def start(profile_dir):
+        driver = FakeWhatsAppDriver(rtt=rtt, page_load=page_load, render_delay=0.05)
+        driver.get(whatsapp_bot.WHATSAPP_URL)
+        return driver
+
+    pool = whatsapp_bot.SendPool(1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", start))
+    whatsapp_bot.send_pool = pool
+    whatsapp_bot.chat_cache.clear()
+    pool.primary.ensure_driver()
+    return pool.primary.driver
+
+
+def _wait_sent(key, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        row = whatsapp_bot.outbox.get_by_key(key)
+        if row and row["state"] in ("sent", "failed"):
+            return row["state"]
+        time.sleep(0.002)
+    return None
+
+
+def measure(path, slots, offset, timeout):
+    """Fire `slots` slots, one group each, and time them until sent"""
+    sources = {source: whatsapp_bot.SLOT_MESSAGES.labels(source).value
+               for source in ("buffer", "groq", "fallback")}
+    today = datetime.now(whatsapp_bot.scheduler.tz).date().isoformat()
+    seconds, states = [], []
+    for n in range(offset, offset + slots):
+        link = f"https://chat.whatsapp.com/G{n:03d}"
+        if path == "buffered":
+            whatsapp_bot.message_buffer.put(SLOT, f"Pre-generated message number {n} 🍕")
+        start = time.perf_counter()
+        whatsapp_bot.run_slot(link, SLOT)
+        states.append(_wait_sent(idempotency_key(link, SLOT, today), timeout))
+        seconds.append(time.perf_counter() - start)
+    return {
+        "slots": slots,
+        "sent": states.count("sent"),
+        "mean_ms": round(statistics.mean(seconds) * 1000, 1),
+        "max_ms": round(max(seconds) * 1000, 1),
+        "sources": {source: int(whatsapp_bot.SLOT_MESSAGES.labels(source).value - before)
+                    for source, before in sources.items()},
+    }
+
+
+def run(slots=10, latency=(0.2, 0.5), deadline=2.0, page_load=0.3, rtt=0.002):
+    workdir = tempfile.mkdtemp(prefix="e2e-bench-")
+    driver = _setup(workdir, page_load, rtt)
+    whatsapp_bot.config.update(generation_deadline=deadline, hedge_min_delay=latency[1])
+    timeout = deadline + 30
+    result = {"slots_per_path": slots, "mock_latency_s": list(latency), "deadline_s": deadline,
+              "fake_page_load_s": page_load}
+
+    with MockGroqServer(latency=latency, seed=5, responder=MessageWriter()) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        whatsapp_bot.generate_hunger_message("warmup")
+        result["buffered"] = measure("buffered", slots, 0, timeout)
+        result["inline"] = measure("inline", slots, slots, timeout)
+    with MockGroqServer(error_rate=1.0) as server:
+        whatsapp_bot.config.update(groq_base_url=server.url)
+        result["groq_down"] = measure("groq_down", slots, 2 * slots, timeout)
+
+    result["delivered_to_fake_driver"] = len(driver.sent)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slots", type=int, default=10, help="slots per path")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.2, 0.5],
+                        metavar=("LOW", "HIGH"), help="mock latency range (s)")
+    parser.add_argument("--deadline", type=float, default=2.0, help="generation_deadline (s)")
+    parser.add_argument("--page-load", type=float, default=0.3, help="fake chat page load (s)")
+    parser.add_argument("--rtt", type=float, default=0.002, help="fake driver command round trip (s)")
+    args = parser.parse_args()
+    report(run, args.slots, tuple(args.latency), args.deadline, args.page_load, args.rtt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Multi-group fan-out throughput versus SendPool size.
+
+Queues a burst of sends for many groups onto a SendPool whose sessions use
+the fake driver (so no Chrome is needed), then reports sends/minute for
+each pool size and checks every group received its messages in order.
+
+    python -m benchmarks.bench_fanout --groups 24 --per-group 3 --sizes 1 2 4 8
+"""
+
+import argparse
+import time
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+
+def measure(size, groups, per_group, page_load, rtt):
+    drivers = []
+
+    def make_driver(profile_dir):
+        driver = FakeWhatsAppDriver(rtt=rtt, page_load=page_load, render_delay=0.1)
+        drivers.append(driver)
+        return driver
+
+    pool = whatsapp_bot.SendPool(
+        size,
+        session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", make_driver),
+    )
+    whatsapp_bot.chat_cache.clear()
+
+    links = [f"https://chat.whatsapp.com/G{g:03d}" for g in range(groups)]
+    start = time.perf_counter()
+    futures = [
+        pool.submit(link, f"{link} #{n}\nline two\nline three")
+        for n in range(per_group)
+        for link in links
+    ]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    pool.resize(1)
+
+    delivered = sorted(entry for driver in drivers for entry in driver.sent_to)
+    order_ok = all(
+        [text.split('\n')[0] for _, code, text in delivered if code == link.rsplit('/', 1)[-1]]
+        == [f"{link} #{n}" for n in range(per_group)]
+        for link in links
+    )
+    return {
+        "pool_size": size,
+        "sends": len(futures),
+        "succeeded": sum(results),
+        "seconds": round(elapsed, 2),
+        "sends_per_minute": round(len(futures) / elapsed * 60, 1),
+        "page_loads": sum(driver.page_loads for driver in drivers),
+        "per_group_order_ok": order_ok,
+    }
+
+
+def run(groups=24, per_group=3, sizes=(1, 2, 4, 8), page_load=1.0, rtt=0.005):
+    return {
+        "groups": groups,
+        "per_group": per_group,
+        "fake_page_load_s": page_load,
+        "results": [measure(size, groups, per_group, page_load, rtt) for size in sizes],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=24)
+    parser.add_argument("--per-group", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--page-load", type=float, default=1.0)
+    parser.add_argument("--rtt", type=float, default=0.005)
+    args = parser.parse_args()
+    report(run, args.groups, args.per_group, args.sizes, args.page_load, args.rtt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cold-call vs warm-call latency of GroqAPI against the local mock server.
+
+Cold: a fresh GroqAPI (new session, new connection) per call, which is what
+every slot used to pay. Warm: one shared client reusing its pooled connection.
+
+    python -m benchmarks.bench_groq_transport --calls 50 --handshake 0.05
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks import report
+from benchmarks.mock_groq import MockGroqServer
+from whatsapp_bot import GroqAPI
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 2),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run(calls=50, latency=0.01, handshake=0.05):
+    result = {"latency_s": latency, "handshake_s": handshake}
+
+    with MockGroqServer(latency=latency, handshake_delay=handshake) as server:
+        cold = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            client = GroqAPI("mock-key", base_url=server.url)
+            client.simple_chat("Generate message for: bench")
+            cold.append(time.perf_counter() - start)
+            client.close()
+        result["cold"] = _summary(cold)
+        result["cold"]["connections"] = server.connections
+
+    with MockGroqServer(latency=latency, handshake_delay=handshake) as server:
+        client = GroqAPI("mock-key", base_url=server.url)
+        warm = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            client.simple_chat("Generate message for: bench")
+            warm.append(time.perf_counter() - start)
+        client.close()
+        result["warm"] = _summary(warm)
+        result["warm"]["connections"] = server.connections
+
+    result["speedup_p50"] = round(result["cold"]["p50_ms"] / result["warm"]["p50_ms"], 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.01,
+                        help="server processing time per request (s)")
+    parser.add_argument("--handshake", type=float, default=0.05,
+                        help="simulated per-connection setup cost (s)")
+    args = parser.parse_args()
+    report(run, args.calls, args.latency, args.handshake)
+
+
+if __name__ == "__main__":
+    main()
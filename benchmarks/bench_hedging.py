@@ -0,0 +1,143 @@
+"""Tail latency of deadline-bound slot generation, with and without hedging.
+
+The mock Groq server answers most requests quickly but has a slow tail,
+occasional stalls and injected 503s. Each mode times many inline
+generations end to end and counts where the message came from (first
+request, hedged request, or the offline fallback corpus once the deadline
+passes). An outage run (every request fails) checks the fallback path
+stays within the deadline and does not repeat messages.
+
+    python -m benchmarks.bench_hedging --generations 200 --deadline 2
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.bench_batch_generation import MessageWriter
+from benchmarks.mock_groq import MockGroqServer
+from dedup import DuplicateIndex
+from fallback import FallbackCorpus
+
+
+def tail_latency(rng):
+    """90% fast, 8% slow, 2% stalled"""
+    roll = rng.random()
+    if roll < 0.90:
+        return rng.uniform(0.05, 0.12)
+    if roll < 0.98:
+        return rng.uniform(0.4, 1.0)
+    return 3.0
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 1),
+        "p50_ms": round(pick(0.50) * 1000, 1),
+        "p95_ms": round(pick(0.95) * 1000, 1),
+        "p99_ms": round(pick(0.99) * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+
+def _outcomes(source):
+    """Generations so far that ended with `source` (primary, hedge or none)"""
+    return sum(whatsapp_bot.INLINE_GENERATION.labels(source).snapshot()[0])
+
+
+def _slot_message(deadline):
+    """What run_slot does when the buffer is empty: generate, else fall back"""
+    start = time.perf_counter()
+    message = whatsapp_bot.generate_within_deadline("bench", budget=deadline)
+    source = "groq"
+    if not message:
+        message, source = whatsapp_bot.fallback_corpus.next("afternoon"), "fallback"
+    return time.perf_counter() - start, source, message
+
+
+def measure(server, generations, deadline, hedge, concurrency):
+    whatsapp_bot.config["hedge_max_requests"] = 2 if hedge else 1
+    client = whatsapp_bot.get_groq_client()
+    client.latencies.clear()
+    # Warm up the latency window the hedging delay is picked from
+    for _ in range(30):
+        whatsapp_bot.generate_hunger_message("warmup")
+    requests_before = server.requests
+    before = {source: _outcomes(source) for source in ("primary", "hedge", "none")}
+    delay = whatsapp_bot.hedge_delay()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: _slot_message(deadline), range(generations)))
+
+    after = {source: _outcomes(source) for source in before}
+    return {
+        "hedging": hedge,
+        "hedge_delay_ms": round(delay * 1000, 1) if hedge else None,
+        "latency": _summary([seconds for seconds, _, _ in results]),
+        "won_by_first_request": after["primary"] - before["primary"],
+        "won_by_hedge": after["hedge"] - before["hedge"],
+        "fallbacks": sum(1 for _, source, _ in results if source == "fallback"),
+        "groq_requests_per_generation": round((server.requests - requests_before) / generations, 3),
+    }
+
+
+def _fresh_corpus(workdir, name):
+    whatsapp_bot.fallback_corpus = FallbackCorpus(
+        whatsapp_bot.config["fallback_path"], os.path.join(workdir, name),
+        whatsapp_bot.is_valid_message)
+
+
+def run(generations=200, deadline=2.0, error_rate=0.05, concurrency=4, min_delay=0.2):
+    workdir = tempfile.mkdtemp(prefix="hedge-bench-")
+    whatsapp_bot.duplicates = DuplicateIndex(os.path.join(workdir, "dedup.db"))
+    # The mock's latencies are scaled down, so lower the floor to match
+    whatsapp_bot.config["hedge_min_delay"] = min_delay
+    _fresh_corpus(workdir, "fallback_state.json")
+    result = {"generations": generations, "deadline_s": deadline, "error_rate": error_rate,
+              "hedge_min_delay_s": min_delay}
+
+    with MockGroqServer(latency=tail_latency, error_rate=error_rate, seed=11,
+                        responder=MessageWriter()) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        result["without_hedging"] = measure(server, generations, deadline, False, concurrency)
+        result["with_hedging"] = measure(server, generations, deadline, True, concurrency)
+
+    # Groq down: every slot must still get a message, within the deadline
+    _fresh_corpus(workdir, "outage_state.json")
+    corpus_size = whatsapp_bot.fallback_corpus.size("afternoon")
+    with MockGroqServer(error_rate=1.0) as server:
+        whatsapp_bot.config.update(groq_base_url=server.url)
+        whatsapp_bot.config["hedge_max_requests"] = 2
+        outage = [_slot_message(deadline) for _ in range(corpus_size)]
+    messages = [message for _, _, message in outage]
+    result["outage"] = {
+        "slots": len(outage),
+        "latency": _summary([seconds for seconds, _, _ in outage]),
+        "fallbacks": sum(1 for _, source, _ in outage if source == "fallback"),
+        "distinct_messages": len(set(messages)),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--deadline", type=float, default=2.0, help="per-slot budget (s)")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--min-delay", type=float, default=0.2,
+                        help="hedge_min_delay for the run (s)")
+    args = parser.parse_args()
+    report(run, args.generations, args.deadline, args.error_rate, args.concurrency, args.min_delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Several bot nodes sharing one lease file: duplicates and takeover time.
+
+Each node is a separate process with its own outbox and send pool, all
+pointing at one SQLite lease file, as nodes on shared disk would. Every node
+fires the same (group, slot) jobs at the same moment through ``run_slot``,
+with a fake WhatsApp that appends each delivered message to a shared log,
+so duplicates and misses can be counted afterwards. While node 0 is busy
+sending, it is either killed (SIGKILL) or frozen (SIGSTOP) for longer than
+the lease TTL. The other nodes must pick up its slots within about
+ttl + takeover interval. A frozen node must not send the slots that were
+taken over once it wakes up. The fencing check is what stops it. The exit
+status is 1 if any slot was sent twice or not at all.
+
+    python -m benchmarks.bench_leases --nodes 3 --groups 10 --ttl 2 --interval 0.5
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks import report
+
+SLOTS = ("morning", "night")
+
+
+def _link(group):
+    return f"https://chat.whatsapp.com/G{group:03d}"
+
+
+class FakeWhatsApp:
+    """Send function for SendPool: takes `send_time`, then logs the message as delivered"""
+
+    def __init__(self, log_path, node, send_time):
+        self.log_path = log_path
+        self.node = node
+        self.send_time = send_time
+
+    def send(self, session, link, message):
+        import whatsapp_bot
+        time.sleep(self.send_time)
+        # As send_to_whatsapp_group does before pressing Enter
+        if not whatsapp_bot.send_allowed():
+            return False
+        line = json.dumps({"link": link, "slot": message.split("\n", 1)[0],
+                           "node": self.node, "at": time.time()}) + "\n"
+        # One O_APPEND write per message, so lines from all nodes never interleave
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+        return True
+
+
+def _node(index, workdir, groups, ttl, interval, send_time, start_at):
+    with redirect_stdout(sys.stderr):
+        import whatsapp_bot
+        from leases import LeaseStore
+        from outbox import Outbox
+
+        whatsapp_bot.config.update(
+            api_key="", whatsapp_group_link="", lease_takeover_interval=interval,
+            groups=[{"name": f"g{g}", "whatsapp_group_link": _link(g),
+                     "schedule_times": {slot: "00:00" for slot in SLOTS}} for g in range(groups)],
+        )
+        whatsapp_bot.outbox = Outbox(os.path.join(workdir, f"outbox-{index}.db"))
+        whatsapp_bot.leases = LeaseStore(os.path.join(workdir, "leases.db"),
+                                         node_id=f"node-{index}", ttl=ttl)
+        whatsapp_bot.send_pool = whatsapp_bot.SendPool(
+            1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{index}-{i}"),
+            send=FakeWhatsApp(os.path.join(workdir, "delivered.jsonl"), index, send_time).send)
+        for slot in SLOTS:
+            for group in range(groups):
+                whatsapp_bot.message_buffer.put(slot, f"{slot}\nfrom node {index}\nmessage {group}")
+
+        time.sleep(max(0.0, start_at - time.time()))
+        whatsapp_bot.slot_takeover.start()
+        for slot in SLOTS:
+            for group in range(groups):
+                whatsapp_bot.run_slot(_link(group), slot)
+        while True:
+            time.sleep(1)
+
+
+def _leases(workdir):
+    conn = sqlite3.connect(os.path.join(workdir, "leases.db"), timeout=30)
+    try:
+        return conn.execute("SELECT key, holder, state, token FROM leases").fetchall()
+    finally:
+        conn.close()
+
+
+def _delivered(workdir):
+    try:
+        with open(os.path.join(workdir, "delivered.jsonl"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+
+def scenario(fault, nodes, groups, ttl, interval, send_time, fault_after, give_up):
+    workdir = tempfile.mkdtemp(prefix=f"leases-{fault}-")
+    ctx = multiprocessing.get_context("fork")
+    start_at = time.time() + 2.0  # time for every node to import and set up
+    procs = [ctx.Process(target=_node, args=(i, workdir, groups, ttl, interval, send_time, start_at))
+             for i in range(nodes)]
+    for proc in procs:
+        proc.start()
+    expected = groups * len(SLOTS)
+
+    time.sleep(max(0.0, start_at + fault_after - time.time()))
+    victim = procs[0]
+    os.kill(victim.pid, signal.SIGKILL if fault == "kill" else signal.SIGSTOP)
+    fault_at = time.time()
+    # Slots the victim still held: these must be taken over
+    stranded = {key for key, holder, state, _ in _leases(workdir)
+                if holder == "node-0" and state in ("held", "sending")}
+
+    while time.time() - fault_at < give_up:
+        if len({(d["link"], d["slot"]) for d in _delivered(workdir)}) >= expected:
+            break
+        time.sleep(0.05)
+    all_sent_at = time.time()
+    if fault == "stop":
+        # Wake it up well after its leases lapsed and let it try to finish
+        time.sleep(max(0.0, fault_at + 2 * ttl - time.time()))
+        os.kill(victim.pid, signal.SIGCONT)
+        time.sleep(ttl + 2 * interval + 2 * send_time)
+    for proc in procs:
+        proc.kill()
+        proc.join()
+
+    delivered = _delivered(workdir)
+    per_slot = {}
+    for d in delivered:
+        per_slot.setdefault(f"{d['link']}|{d['slot']}", []).append(d)
+    takeovers = []
+    for key in stranded:
+        link, slot, _ = key.rsplit("|", 2)
+        late = [d["at"] for d in per_slot.get(f"{link}|{slot}", []) if d["node"] != 0]
+        if late:
+            takeovers.append(min(late) - fault_at)
+    rows = _leases(workdir)
+    return {
+        "fault": fault,
+        "slots": expected,
+        "delivered": len(per_slot),
+        "missing": expected - len(per_slot),
+        "duplicates": sum(len(v) - 1 for v in per_slot.values()),
+        "sent_by_node": {f"node-{n}": sum(1 for d in delivered if d["node"] == n) for n in range(nodes)},
+        "stranded_on_fault": len(stranded),
+        "taken_over": len(takeovers),
+        "takeover_max_s": round(max(takeovers), 2) if takeovers else None,
+        "ttl_plus_interval_s": ttl + interval,
+        "all_delivered_after_fault_s": round(all_sent_at - fault_at, 2),
+        "leases_done": sum(1 for _, _, state, _ in rows if state == "done"),
+        "max_fencing_token": max((token for *_, token in rows), default=0),
+    }
+
+
+def run(nodes=3, groups=10, ttl=2.0, interval=0.5, send_time=0.1, fault_after=0.2, give_up=30.0):
+    args = (nodes, groups, ttl, interval, send_time, fault_after, give_up)
+    return {
+        "nodes": nodes,
+        "lease_ttl_s": ttl,
+        "takeover_interval_s": interval,
+        "send_time_s": send_time,
+        "killed": scenario("kill", *args),
+        "frozen": scenario("stop", *args),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=10, help="groups, each with two slots")
+    parser.add_argument("--ttl", type=float, default=2.0, help="lease_ttl (s)")
+    parser.add_argument("--interval", type=float, default=0.5, help="lease_takeover_interval (s)")
+    parser.add_argument("--send-time", type=float, default=0.1, help="fake send duration (s)")
+    parser.add_argument("--fault-after", type=float, default=0.2,
+                        help="kill or freeze node 0 this long after the slots fire (s)")
+    parser.add_argument("--give-up", type=float, default=30.0)
+    args = parser.parse_args()
+    result = report(run, args.nodes, args.groups, args.ttl, args.interval, args.send_time,
+                    args.fault_after, args.give_up)
+    sys.exit(1 if any(result[fault]["duplicates"] or result[fault]["missing"]
+                      for fault in ("killed", "frozen")) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Per-observation cost of the metrics registry and a /metrics scrape.
+
+Times histogram observations and counter increments (with and without
+label lookup) in a tight loop, renders a registry holding many series, and
+runs a few sends through the fake driver and mock Groq server so the
+scraped /metrics output can be checked for every pipeline stage.
+
+    python -m benchmarks.bench_metrics --iterations 200000
+"""
+
+import argparse
+import time
+
+import metrics
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+from benchmarks.mock_groq import MockGroqServer
+
+STAGES = (
+    "groq_request_seconds_bucket",
+    "groq_tokens_bucket",
+    "whatsapp_driver_init_seconds",
+    'whatsapp_send_step_seconds_bucket{step="navigate"',
+    'whatsapp_send_step_seconds_bucket{step="compose"',
+    'whatsapp_send_step_seconds_bucket{step="send"',
+    "whatsapp_send_seconds_count",
+    "scheduler_fire_drift_seconds",
+    "send_queue_depth",
+)
+
+
+def _ns_per_call(fn, iterations):
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter_ns() - start) / iterations, 1)
+
+
+def overhead(iterations):
+    registry = metrics.Registry()
+    plain = metrics.histogram("bench_plain_seconds", "bench", registry=registry)
+    labelled = metrics.histogram("bench_labelled_seconds", "bench", ["step"], registry=registry)
+    total = metrics.counter("bench_total", "bench", ["cause"], registry=registry)
+    child = labelled.labels("navigate")
+    baseline = _ns_per_call(lambda: None, iterations)
+    return {
+        "loop_baseline_ns": baseline,
+        "histogram_observe_ns": round(_ns_per_call(lambda: plain.observe(0.042), iterations) - baseline, 1),
+        "histogram_cached_child_ns": round(_ns_per_call(lambda: child.observe(0.042), iterations) - baseline, 1),
+        "histogram_labels_observe_ns":
+            round(_ns_per_call(lambda: labelled.labels("navigate").observe(0.042), iterations) - baseline, 1),
+        "counter_labels_inc_ns": round(_ns_per_call(lambda: total.labels("timeout").inc(), iterations) - baseline, 1),
+    }
+
+
+def exposition(series):
+    registry = metrics.Registry()
+    hist = metrics.histogram("bench_series_seconds", "bench", ["group", "step"], registry=registry)
+    for g in range(series):
+        hist.labels(f"g{g}", "navigate").observe(0.3)
+    start = time.perf_counter()
+    text = registry.expose()
+    return {
+        "series": series,
+        "render_ms": round((time.perf_counter() - start) * 1000, 2),
+        "bytes": len(text),
+    }
+
+
+def pipeline(sends):
+    import whatsapp_bot
+
+    whatsapp_bot.send_pool = whatsapp_bot.SendPool(
+        1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(
+            f"fake-{i}", lambda profile_dir: FakeWhatsAppDriver(page_load=0.05, render_delay=0.01)))
+    whatsapp_bot.chat_cache.clear()
+    # Stand-ins for a real driver start-up and a scheduled firing
+    whatsapp_bot.DRIVER_INIT.observe(4.2)
+    whatsapp_bot.record_firing("default/morning", 0.003, False)
+
+    with MockGroqServer(latency=0.02) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        for n in range(sends):
+            message = whatsapp_bot.generate_hunger_message("bench")
+            whatsapp_bot.send_pool.submit(f"https://chat.whatsapp.com/G{n % 2}", message).result()
+
+    response = whatsapp_bot.app.test_client().get("/metrics")
+    text = response.get_data(as_text=True)
+    return {
+        "sends": sends,
+        "content_type": response.content_type,
+        "lines": len(text.splitlines()),
+        "stages_present": {stage: stage in text for stage in STAGES},
+    }
+
+
+def run(iterations=200_000, series=1000, sends=5):
+    return {
+        "overhead": overhead(iterations),
+        "exposition": exposition(series),
+        "pipeline": pipeline(sends),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--series", type=int, default=1000,
+                        help="labelled histogram series to render")
+    parser.add_argument("--sends", type=int, default=5)
+    args = parser.parse_args()
+    report(run, args.iterations, args.series, args.sends)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Per-send latency: reload-every-time navigation vs the cached open chat.
+
+"legacy" replays the original send path (invite-link reload, fixed sleeps,
+5s "Join group" probe); "cached" is send_to_whatsapp_group today. By default
+both run against the in-process fake driver; --chrome drives headless Chrome
+against benchmarks/fixtures/whatsapp_web.html served locally.
+
+    python -m benchmarks.bench_navigation --sends 3
+"""
+
+import argparse
+import functools
+import statistics
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+FIXTURES = Path(__file__).parent / "fixtures"
+MESSAGE = "Line one 🍛\nLine two 💧\nLine three 🍫"
+
+
+def legacy_send(session, group_link, message):
+    """The send path as it was before chat caching"""
+    driver = session.driver
+    driver.get(group_link)
+    time.sleep(3)
+    try:
+        join_button = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.XPATH, whatsapp_bot.XPATH_JOIN_BUTTON))
+        )
+        join_button.click()
+        time.sleep(2)
+    except Exception:
+        pass
+    message_box = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.XPATH, whatsapp_bot.XPATH_COMPOSER))
+    )
+    message_box.click()
+    time.sleep(1)
+    lines = message.split('\n')
+    for i, line in enumerate(lines):
+        message_box.send_keys(line)
+        if i < len(lines) - 1:
+            message_box.send_keys(Keys.SHIFT + Keys.ENTER)
+    time.sleep(1)
+    message_box.send_keys(Keys.ENTER)
+    return True
+
+
+def cached_send(session, group_link, message):
+    return whatsapp_bot.send_to_whatsapp_group(message, group_link, session)
+
+
+def _serve_fixtures():
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(FIXTURES))
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _chrome_driver():
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
+
+
+def _measure(send, sends, use_chrome, page_load):
+    server = None
+    if use_chrome:
+        server = _serve_fixtures()
+        driver = _chrome_driver()
+        link = f"http://127.0.0.1:{server.server_address[1]}/whatsapp_web.html?invite=bench"
+    else:
+        driver = FakeWhatsAppDriver(page_load=page_load)
+        link = "https://chat.whatsapp.com/BENCH"
+
+    session = whatsapp_bot.WhatsAppSession()
+    session.driver = driver
+    whatsapp_bot.chat_cache.clear()
+
+    latencies = []
+    try:
+        for _ in range(sends):
+            start = time.perf_counter()
+            if not send(session, link, MESSAGE):
+                raise RuntimeError("send failed")
+            latencies.append(time.perf_counter() - start)
+        if use_chrome:
+            delivered = len(driver.execute_script("return window.__sent"))
+        else:
+            delivered = len(driver.sent)
+        result = {
+            "sends": sends,
+            "delivered": delivered,
+            "first_s": round(latencies[0], 3),
+            "mean_s": round(statistics.mean(latencies), 3),
+            "steady_mean_s": round(statistics.mean(latencies[1:] or latencies), 3),
+        }
+        if not use_chrome:
+            result["page_loads"] = driver.page_loads
+            result["webdriver_commands"] = driver.commands
+        if send is cached_send:
+            result["last_send_timings"] = whatsapp_bot.config['last_send_timings']
+        return result
+    finally:
+        driver.quit()
+        if server:
+            server.shutdown()
+
+
+def run(sends=3, use_chrome=False, page_load=1.0):
+    legacy = _measure(legacy_send, sends, use_chrome, page_load)
+    cached = _measure(cached_send, sends, use_chrome, page_load)
+    return {
+        "backend": "chrome" if use_chrome else "fake",
+        "legacy": legacy,
+        "cached": cached,
+        "steady_speedup": round(legacy["steady_mean_s"] / cached["steady_mean_s"], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=3)
+    parser.add_argument("--page-load", type=float, default=1.0,
+                        help="fake driver page load time (s)")
+    parser.add_argument("--chrome", action="store_true",
+                        help="use headless Chrome and the HTML fixture")
+    args = parser.parse_args()
+    report(run, args.sends, args.chrome, args.page_load)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Outbox insert and query throughput at a million rows.
+
+    python -m benchmarks.bench_outbox --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import report
+from outbox import Outbox, idempotency_key
+
+SLOTS = ("morning", "afternoon", "night")
+MESSAGE = "Pet mein chuhe daud rahe hain 🐭\nPaani piyo 💧\nThoda chocolate 🍫"
+
+
+def _rows(count, groups, start):
+    for i in range(count):
+        link = f"https://chat.whatsapp.com/G{i % groups:04d}"
+        slot = SLOTS[(i // groups) % 3]
+        day_index = i // (groups * 3)
+        created = start + day_index * 86400 + SLOTS.index(slot) * 18000
+        day = time.strftime("%Y-%m-%d", time.gmtime(created))
+        yield (idempotency_key(link, slot, day), link, slot, day, MESSAGE, 'sent', created, created)
+
+
+def run(rows=1_000_000, groups=100, queries=2000, single=5000, path=None):
+    workdir = None
+    if path is None:
+        workdir = tempfile.mkdtemp(prefix="outbox-bench-")
+        path = os.path.join(workdir, "outbox.db")
+    outbox = Outbox(path)
+    start = 1_600_000_000.0
+    rng = random.Random(7)
+    result = {"rows": rows, "groups": groups}
+
+    # Bulk load, 10k rows per transaction
+    began = time.perf_counter()
+    batch = []
+    for row in _rows(rows, groups, start):
+        batch.append(row)
+        if len(batch) == 10_000:
+            outbox.enqueue_many(batch)
+            batch = []
+    if batch:
+        outbox.enqueue_many(batch)
+    elapsed = time.perf_counter() - began
+    result["bulk_insert_rows_per_s"] = round(rows / elapsed)
+
+    # Individual enqueue + claim + mark_sent, as the bot does per message
+    began = time.perf_counter()
+    for i in range(single):
+        row, _ = outbox.enqueue("https://chat.whatsapp.com/LIVE", "test", "2030-01-01",
+                                MESSAGE, key=f"live|{i}")
+        outbox.claim(row['id'])
+        outbox.mark_sent(row['id'])
+    elapsed = time.perf_counter() - began
+    result["single_message_lifecycles_per_s"] = round(single / elapsed)
+
+    # Idempotent re-enqueue of an existing key
+    began = time.perf_counter()
+    for _ in range(queries):
+        i = rng.randrange(rows)
+        link = f"https://chat.whatsapp.com/G{i % groups:04d}"
+        outbox.enqueue(link, "morning", "2020-09-14", MESSAGE)
+    result["duplicate_enqueue_per_s"] = round(queries / (time.perf_counter() - began))
+
+    days = rows // (groups * 3)
+    began = time.perf_counter()
+    for _ in range(queries):
+        group = f"https://chat.whatsapp.com/G{rng.randrange(groups):04d}"
+        since = start + rng.randrange(max(days - 7, 1)) * 86400
+        outbox.history(group_link=group, since=since, until=since + 7 * 86400)
+    result["history_by_group_week_per_s"] = round(queries / (time.perf_counter() - began))
+
+    began = time.perf_counter()
+    for _ in range(queries):
+        since = start + rng.randrange(max(days - 1, 1)) * 86400
+        outbox.history(since=since, until=since + 86400)
+    result["history_by_day_per_s"] = round(queries / (time.perf_counter() - began))
+
+    began = time.perf_counter()
+    for _ in range(queries):
+        outbox.deliverable()
+    result["deliverable_scan_per_s"] = round(queries / (time.perf_counter() - began))
+
+    outbox.close()
+    result["db_mb"] = round(sum(
+        os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix)
+    ) / 1e6, 1)
+    if workdir:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.rmdir(workdir)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--db", help="keep the database at this path")
+    args = parser.parse_args()
+    report(run, args.rows, args.groups, args.queries, path=args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""429s and queueing with the shared Groq rate limiter on and off.
+
+Several processes, each with a few threads, fire bursts of chat requests at
+a mock Groq server that enforces a scaled-down requests-per-window cap and
+answers anything over it with 429 + Retry-After. Without the limiter the
+callers race into 429s and burn retries; with it they share one SQLite
+token bucket, queue in arrival order and should see no 429s at all.
+
+    python -m benchmarks.bench_ratelimit --processes 3 --threads 4 --calls 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from benchmarks import report
+from benchmarks.mock_groq import MockGroqServer
+from ratelimit import RateLimiter
+
+PROMPT = [{"role": "user", "content": "Write a short hunger reminder. " * 40}]
+
+
+def _worker(url, db_path, limits, threads, calls, results):
+    import whatsapp_bot
+
+    limiter = RateLimiter(db_path, limits) if db_path else None
+    client = whatsapp_bot.GroqAPI("mock-key", base_url=url, max_retries=3,
+                                  backoff_max=5, limiter=limiter)
+
+    def call(_):
+        start = time.monotonic()
+        try:
+            client.chat(PROMPT, max_tokens=500)
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.monotonic() - start, time.time()
+
+    with redirect_stdout(sys.stderr), ThreadPoolExecutor(threads) as pool:
+        outcomes = list(pool.map(call, range(threads * calls)))
+    results.put((os.getpid(), outcomes))
+
+
+def measure(processes, threads, calls, window, limited, workdir):
+    limit, period = window
+    # Tokens allow roughly the request rate at the estimated cost, so the
+    # estimate (prompt + max_tokens) binds until settle refunds the unused part
+    limits = {"requests": (limit, period), "tokens": (limit * 800, period)}
+    db_path = os.path.join(workdir, f"ratelimit-{processes}.db") if limited else None
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+
+    with MockGroqServer(latency=0.05, rate_limit=window) as server:
+        start = time.monotonic()
+        workers = [ctx.Process(target=_worker,
+                               args=(server.url, db_path, limits, threads, calls, results))
+                   for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        per_process = dict(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - start
+        requests, throttled = server.requests, server.throttled
+
+    outcomes = [o for pid_outcomes in per_process.values() for o in pid_outcomes]
+    latencies = sorted(seconds for _, seconds, _ in outcomes)
+    succeeded = sum(1 for ok, _, _ in outcomes if ok)
+    # Fairness: each process's share of the first half of completions
+    first_half = sorted(done for _, _, done in outcomes)[len(outcomes) // 2]
+    shares = [sum(1 for ok, _, done in o if ok and done <= first_half)
+              for o in per_process.values()]
+    return {
+        "limiter": limited,
+        "calls": len(outcomes),
+        "succeeded": succeeded,
+        "failed": len(outcomes) - succeeded,
+        "http_requests": requests,
+        "http_429": throttled,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_window": round(succeeded / elapsed * period, 2),
+        "latency_p50_s": round(latencies[len(latencies) // 2], 2),
+        "latency_max_s": round(latencies[-1], 2),
+        "first_half_share_per_process": shares,
+        "share_stdev": round(statistics.pstdev(shares), 2),
+    }
+
+
+def run(processes=3, threads=4, calls=5, limit=10, period=2.0):
+    workdir = tempfile.mkdtemp(prefix="ratelimit-bench-")
+    window = (limit, period)
+    return {
+        "processes": processes,
+        "threads_per_process": threads,
+        "server_limit": f"{limit} requests / {period}s",
+        "without_limiter": measure(processes, threads, calls, window, False, workdir),
+        "with_limiter": measure(processes, threads, calls, window, True, workdir),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4, help="threads per process")
+    parser.add_argument("--calls", type=int, default=5, help="calls per thread")
+    parser.add_argument("--limit", type=int, default=10, help="server requests per window")
+    parser.add_argument("--period", type=float, default=2.0, help="server window (s)")
+    args = parser.parse_args()
+    report(run, args.processes, args.threads, args.calls, args.limit, args.period)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Fake-clock harness for SlotScheduler.
+
+Drives thousands of simulated days through the scheduler in several
+timezones (including DST transitions and times that fall into the DST gap
+or overlap), checks every job fires exactly once per local day at the
+right local time, and reports wake-ups and CPU per simulated day. A short
+real-clock run measures actual firing drift and idle CPU.
+
+    python -m benchmarks.bench_scheduler --days 3650
+"""
+
+import argparse
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytz
+
+from benchmarks import report
+from scheduler import SlotScheduler, parse_slot_time
+
+
+class FakeClock:
+    """Clock whose waits return immediately after advancing time"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def wait(self, condition, timeout):
+        self.now += timeout
+
+
+def simulate(timezone, slot_times, days, start=datetime(2024, 1, 1)):
+    tz = pytz.timezone(timezone)
+    clock = FakeClock(tz.localize(start).timestamp())
+    scheduler = SlotScheduler(tz, clock=clock)
+    end = tz.localize(start + timedelta(days=days)).timestamp()
+    fired = Counter()
+    problems = []
+
+    def make_job(at):
+        hour, minute, _ = parse_slot_time(at)
+
+        def job():
+            if clock.now >= end:
+                return
+            local = datetime.fromtimestamp(clock.now, tz)
+            fired[(at, local.date())] += 1
+            if (local.hour, local.minute) != (hour, minute):
+                # Only acceptable when `at` does not exist that day (DST gap)
+                try:
+                    tz.localize(datetime(local.year, local.month, local.day, hour, minute),
+                                is_dst=None)
+                    problems.append(f"{at} fired at {local.isoformat()}")
+                except pytz.NonExistentTimeError:
+                    pass
+        return job
+
+    scheduler.set_jobs({at: (at, make_job(at)) for at in slot_times})
+    scheduler._running = True  # drive step() from this thread
+
+    cpu_start = time.process_time()
+    while clock.now < end:
+        scheduler.step()
+    cpu = time.process_time() - cpu_start
+
+    duplicates = [key for key, count in fired.items() if count != 1]
+    expected = len(slot_times) * days
+    return {
+        "timezone": timezone,
+        "slots": slot_times,
+        "days": days,
+        "firings": sum(fired.values()),
+        "expected_firings": expected,
+        "duplicates": len(duplicates),
+        "wrong_local_time": len(problems),
+        "wakeups_per_day": round(scheduler.wakeups / days, 2),
+        "cpu_us_per_day": round(cpu / days * 1e6, 1),
+    }
+
+
+def simulate_suspend(timezone='Asia/Kolkata'):
+    """Jump the clock over two days and past the grace period, then just inside it"""
+    tz = pytz.timezone(timezone)
+    clock = FakeClock(tz.localize(datetime(2024, 3, 1, 11, 0)).timestamp())
+    scheduler = SlotScheduler(tz, clock=clock, grace_seconds=300)
+    ran = []
+    scheduler.set_jobs({"11:30": ("11:30", lambda: ran.append(clock.now))})
+    scheduler._running = True
+    clock.now += 2 * 86400 + 61 * 60  # wake up at 12:01, two days later
+    scheduler.step()
+    skipped_stale = not ran
+    clock.now = tz.localize(datetime(2024, 3, 4, 11, 32)).timestamp()
+    scheduler.step()
+    return {"stale_backlog_skipped": skipped_stale, "late_within_grace_ran": len(ran) == 1}
+
+
+def real_clock_drift(runs=5, spacing=0.3):
+    """Fire jobs a fraction of a second apart on the real clock"""
+    tz = pytz.utc
+    scheduler = SlotScheduler(tz)
+    drifts = []
+    base = time.time() + 1.5
+    targets = [int(base) + 1 + i for i in range(runs)]
+
+    def make_job(target):
+        return lambda: drifts.append(time.time() - target)
+
+    scheduler.set_jobs({
+        str(target): (datetime.fromtimestamp(target, tz).strftime("%H:%M:%S"), make_job(target))
+        for target in targets
+    })
+    scheduler.start()
+    cpu_start = time.process_time()
+    time.sleep(targets[-1] - time.time() + spacing)
+    cpu = time.process_time() - cpu_start
+    wall = targets[-1] - base + 1.5 + spacing
+    scheduler.stop()
+    drifts.sort()
+    return {
+        "runs": len(drifts),
+        "max_drift_ms": round(max(drifts) * 1000, 2) if drifts else None,
+        "mean_drift_ms": round(sum(drifts) / len(drifts) * 1000, 2) if drifts else None,
+        "cpu_percent_while_idle": round(cpu / wall * 100, 3),
+    }
+
+
+def run(days=3650):
+    cases = [
+        ("Asia/Kolkata", ["11:30", "16:30", "21:30"]),
+        ("America/New_York", ["01:30", "02:30", "11:30", "21:30"]),
+        ("Europe/London", ["00:30", "01:30", "16:30"]),
+    ]
+    return {
+        "simulated": [simulate(tz, slots, days) for tz, slots in cases],
+        "suspend": simulate_suspend(),
+        "real_clock": real_clock_drift(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=3650)
+    args = parser.parse_args()
+    report(run, args.days)
+
+
+if __name__ == "__main__":
+    main()
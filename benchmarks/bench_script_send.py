@@ -0,0 +1,134 @@
+"""Per-send latency and round trips: driving the page vs the in-page send hook.
+
+Sends the same messages with ``send_backend`` 'ui' (find the composer,
+paste, press Enter, poll until it clears) and 'script' (one
+``execute_async_script`` into the injected hook, which also returns the
+server acknowledgement). Scenarios: repeated sends to the chat already
+open, sends rotating over several groups (a page load each), a group not
+joined yet, a driver without CDP (the hook is re-injected after each page
+load), and a page that no longer takes the hook's input (WhatsApp changed),
+where sends must fall back to the UI path and still go out once each.
+Uses the fake driver by default, or headless Chrome on
+benchmarks/fixtures/whatsapp_web.html with --chrome.
+
+    python -m benchmarks.bench_script_send --sends 20 --rtt 0.005
+"""
+
+import argparse
+import statistics
+import time
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.bench_navigation import _chrome_driver, _serve_fixtures
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+MESSAGE = "Pet mein chuhe daud rahe hain 🐭🍛\nEk glass paani pi lo 💧\nChocolate bhi chalega 🍫"
+
+# name -> (groups sends rotate over, fake driver options)
+SCENARIOS = {
+    "open_chat": (1, {}),
+    "rotating_groups": (4, {}),
+    "not_joined": (1, {"joined": False}),
+    "no_cdp": (4, {"cdp": False}),
+    "hook_broken": (1, {"hook_works": False}),
+}
+
+
+def _open(use_chrome, groups, rtt, page_load, options):
+    if use_chrome:
+        server = _serve_fixtures()
+        driver = _chrome_driver()
+        base = f"http://127.0.0.1:{server.server_address[1]}/whatsapp_web.html"
+        driver.get(base)
+        links = [f"{base}?invite=bench{g}&render_ms=50&ack_ms=50" for g in range(groups)]
+        return driver, server, links
+    driver = FakeWhatsAppDriver(rtt=rtt, page_load=page_load, render_delay=0.05, **options)
+    driver.get(whatsapp_bot.WHATSAPP_URL)
+    return driver, None, [f"https://chat.whatsapp.com/G{g:03d}" for g in range(groups)]
+
+
+def _delivered(driver, use_chrome):
+    if use_chrome:
+        return driver.execute_script("return window.__sent")
+    return list(driver.sent)
+
+
+def _script_sends(outcome):
+    return sum(child.value for labels, child in whatsapp_bot.SCRIPT_SENDS._items()
+               if labels[0] == outcome)
+
+
+def measure(backend, sends, groups, use_chrome, rtt, page_load, options):
+    whatsapp_bot.config['send_backend'] = backend
+    whatsapp_bot.chat_cache.clear()
+    driver, server, links = _open(use_chrome, groups, rtt, page_load, options)
+    session = whatsapp_bot.WhatsAppSession()
+    session.driver = driver
+    fallbacks = _script_sends('fallback')
+    messages = [f"{MESSAGE}\n#{n}" for n in range(sends)]
+    times, commands, results = [], [], []
+    try:
+        for n, message in enumerate(messages):
+            before = getattr(driver, 'commands', 0)
+            start = time.perf_counter()
+            results.append(whatsapp_bot.send_to_whatsapp_group(message, links[n % groups], session))
+            times.append(time.perf_counter() - start)
+            commands.append(getattr(driver, 'commands', 0) - before)
+        delivered = _delivered(driver, use_chrome)
+    finally:
+        driver.quit()
+        if server:
+            server.shutdown()
+    normalize = whatsapp_bot._normalize_text
+    result = {
+        "sends": sends,
+        "succeeded": sum(results),
+        "delivered_exactly_once": sorted(map(normalize, delivered)) == sorted(map(normalize, messages)),
+        "first_ms": round(times[0] * 1000, 1),
+        "mean_ms": round(statistics.mean(times) * 1000, 1),
+        "steady_mean_ms": round(statistics.mean(times[groups:] or times) * 1000, 1),
+        "fallbacks": int(_script_sends('fallback') - fallbacks),
+    }
+    if not use_chrome:
+        result["round_trips_first"] = commands[0]
+        result["round_trips_steady"] = round(statistics.mean(commands[groups:] or commands), 1)
+        result["page_loads"] = driver.page_loads
+    return result
+
+
+def run(sends=20, use_chrome=False, rtt=0.005, page_load=0.3):
+    result = {"driver": "chrome" if use_chrome else f"fake (rtt={rtt}s, page_load={page_load}s)"}
+    acks = {labels[1]: child.value for labels, child in whatsapp_bot.SCRIPT_SENDS._items()
+            if labels[0] == 'sent'}
+    for name, (groups, options) in SCENARIOS.items():
+        if use_chrome and options:
+            continue  # the fixture cannot model these
+        ui = measure('ui', sends, groups, use_chrome, rtt, page_load, options)
+        script = measure('script', sends, groups, use_chrome, rtt, page_load, options)
+        result[name] = {
+            "groups": groups,
+            "ui": ui,
+            "script": script,
+            "steady_speedup": round(ui["steady_mean_ms"] / script["steady_mean_ms"], 1),
+        }
+    result["script_acks"] = {labels[1]: int(child.value - acks.get(labels[1], 0))
+                             for labels, child in whatsapp_bot.SCRIPT_SENDS._items()
+                             if labels[0] == 'sent'}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=20, help="sends per scenario and backend")
+    parser.add_argument("--rtt", type=float, default=0.005,
+                        help="fake driver cost per WebDriver command (s)")
+    parser.add_argument("--page-load", type=float, default=0.3, help="fake page load (s)")
+    parser.add_argument("--chrome", action="store_true",
+                        help="use headless Chrome and the HTML fixture")
+    args = parser.parse_args()
+    report(run, args.sends, args.chrome, args.rtt, args.page_load)
+
+
+if __name__ == "__main__":
+    main()
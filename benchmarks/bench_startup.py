@@ -0,0 +1,140 @@
+"""Cold-start cost: module import time and time to the first HTTP 200.
+
+Runs ``python -X importtime -c "import whatsapp_bot"`` in fresh
+interpreters and reports the total and the heaviest imports (top level
+and those made directly by whatsapp_bot),
+then starts the Flask app in a subprocess and times how long it takes
+until ``GET /`` answers 200. Both are repeated with Selenium and
+webdriver_manager imported up front (how the module used to load) for
+comparison. Last, it times a ChromeDriver lookup answered from the on-disk
+cache, installed-Chrome version check included.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks import report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EAGER = "import selenium.webdriver, selenium.webdriver.support.ui, webdriver_manager.chrome; "
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_times(prelude, workdir):
+    """Total import microseconds, and cumulative microseconds per module
+    imported at the top level or directly by a top-level one"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", prelude + "import whatsapp_bot"],
+        cwd=workdir, env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    modules, total = {}, 0
+    for line in out.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative, name = int(fields[1]), fields[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            total += cumulative
+        if depth <= 1:
+            modules[name.strip()] = cumulative
+    return total, modules
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_200(prelude, workdir, timeout=30):
+    """Seconds from spawning the app to its first 200 on GET /"""
+    port = _free_port()
+    code = prelude + f"import whatsapp_bot; whatsapp_bot.app.run(port={port}, use_reloader=False)"
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=workdir, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError("app did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def measure(prelude, runs, workdir, top=8):
+    imports = [import_times(prelude, workdir) for _ in range(runs)]
+    totals = [total for total, _ in imports]
+    _, modules = imports[-1]
+    ready = [first_200(prelude, workdir) for _ in range(runs)]
+    return {
+        "import_ms": round(statistics.median(totals) / 1000, 1),
+        "heaviest_imports_ms": {name: round(us / 1000, 1) for name, us in
+                                sorted(modules.items(), key=lambda item: -item[1])[:top]},
+        "first_200_ms": round(statistics.median(ready) * 1000, 1),
+    }
+
+
+def driver_lookup(runs):
+    from driver_cache import DriverCache, chrome_version
+
+    workdir = tempfile.mkdtemp(prefix="driver-cache-")
+    # Any existing file stands in for the driver binary
+    cache = DriverCache(os.path.join(workdir, "chromedriver_cache.json"),
+                        install=lambda: sys.executable)
+    cache.resolve()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cache.resolve()
+        samples.append(time.perf_counter() - start)
+    return {
+        "chrome_version": chrome_version(),
+        "cached_resolve_ms": round(statistics.median(samples) * 1000, 1),
+    }
+
+
+def run(runs=5):
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    lazy = measure("", runs, workdir)
+    eager = measure(EAGER, runs, workdir)
+    return {
+        "runs": runs,
+        "lazy_selenium": lazy,
+        "eager_selenium": eager,
+        "import_saved_ms": round(eager["import_ms"] - lazy["import_ms"], 1),
+        "first_200_saved_ms": round(eager["first_200_ms"] - lazy["first_200_ms"], 1),
+        "chromedriver": driver_lookup(runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+    report(run, args.runs)
+
+
+if __name__ == "__main__":
+    main()
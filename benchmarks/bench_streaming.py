@@ -0,0 +1,87 @@
+"""Time to first token with streaming against time to the full response.
+
+The mock Groq server waits ``--latency`` before the first word and then
+``--token-delay`` per word, in both modes. Each run times a plain
+``generate_hunger_message`` call, a streamed one (first delta and last
+delta), and the /preview endpoint's first and last Server-Sent Event as the
+browser would receive them.
+
+    python -m benchmarks.bench_streaming --runs 20
+"""
+
+import argparse
+import statistics
+import time
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.mock_groq import MockGroqServer
+
+
+def _ms(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 1),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+
+def _first_and_last(chunks, start=None):
+    start = start or time.perf_counter()
+    first = None
+    for _ in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def run(runs=20, latency=0.3, token_delay=0.03):
+    full, stream_first, stream_last, preview_first, preview_last = [], [], [], [], []
+    web = whatsapp_bot.app.test_client()
+    with MockGroqServer(latency=latency, token_delay=token_delay) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        for _ in range(runs):
+            start = time.perf_counter()
+            whatsapp_bot.generate_hunger_message("bench")
+            full.append(time.perf_counter() - start)
+
+            first, last = _first_and_last(whatsapp_bot.stream_hunger_message("bench"))
+            stream_first.append(first)
+            stream_last.append(last)
+
+            # The test client pulls the first event before returning
+            start = time.perf_counter()
+            response = web.get("/preview?slot=afternoon", buffered=False)
+            first, last = _first_and_last(response.response, start)
+            response.close()
+            preview_first.append(first)
+            preview_last.append(last)
+
+    return {
+        "runs": runs,
+        "mock_latency_s": latency,
+        "mock_token_delay_s": token_delay,
+        "full_response": _ms(full),
+        "stream_first_token": _ms(stream_first),
+        "stream_complete": _ms(stream_last),
+        "preview_first_event": _ms(preview_first),
+        "preview_complete": _ms(preview_last),
+        "first_token_speedup": round(statistics.mean(full) / statistics.mean(stream_first), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3,
+                        help="mock wait before the first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.03,
+                        help="mock time per generated word (s)")
+    args = parser.parse_args()
+    report(run, args.runs, args.latency, args.token_delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Span overhead and the per-step report for traced sends.
+
+Times an empty span with export off and on, then runs slot sends (Groq
+call plus a fake-driver send, some to groups not yet joined) with tracing
+exported to a temporary JSONL file, and summarises it the way
+``python tracing.py`` does.
+
+    python -m benchmarks.bench_tracing --sends 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import tracing
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+from benchmarks.mock_groq import MockGroqServer
+
+
+def _span_us(iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with tracing.span('bench', n=1):
+            pass
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+def run(sends=20, iterations=20_000, latency=(0.05, 0.4)):
+    import whatsapp_bot
+
+    workdir = tempfile.mkdtemp(prefix="trace-bench-")
+    path = os.path.join(workdir, "traces.jsonl")
+
+    tracing.configure(None)
+    overhead = {"span_export_off_us": _span_us(iterations)}
+    tracing.configure(os.path.join(workdir, "overhead.jsonl"))
+    overhead["span_export_on_us"] = _span_us(iterations)
+
+    tracing.configure(path, max_bytes=256 * 1024, backups=3)
+    whatsapp_bot.send_pool = whatsapp_bot.SendPool(
+        2, session_factory=lambda i: whatsapp_bot.WhatsAppSession(
+            f"fake-{i}", lambda profile_dir: FakeWhatsAppDriver(
+                page_load=0.3, render_delay=0.05, joined=False)))
+    whatsapp_bot.chat_cache.clear()
+
+    with MockGroqServer(latency=latency, seed=3) as server:
+        whatsapp_bot.config.update(api_key="mock-key", groq_base_url=server.url,
+                                   groq_rpm=0, groq_tpm=0)
+        futures = []
+        for n in range(sends):
+            with tracing.span('slot', n=n):
+                message = whatsapp_bot.generate_hunger_message("bench")
+                futures.append(whatsapp_bot.send_pool.submit(
+                    f"https://chat.whatsapp.com/G{n % 4}", message))
+        sent = sum(future.result() for future in futures)
+    tracing.configure(None)
+
+    spans = tracing.read_spans(path)
+    slowest = tracing.slowest_traces(spans, top=1, root="send_to_whatsapp_group")
+    return {
+        "overhead": overhead,
+        "sends": sends,
+        "sent": sent,
+        "spans": len(spans),
+        "traces": len({s["trace_id"] for s in spans}),
+        "steps": tracing.step_summary(spans),
+        "slowest_trace": tracing.format_trace(slowest[0][1]).splitlines() if slowest else [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20_000,
+                        help="empty spans timed for the overhead figures")
+    args = parser.parse_args()
+    report(run, args.sends, args.iterations, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Recovery time after the browser dies, with and without the session watchdog.
+
+Uses the fake driver with a scaled-down cold start (``--cold-init``
+seconds standing in for Chrome plus the WhatsApp Web load). After a few
+good sends the browser is killed, then the bot keeps retrying a send until
+one succeeds. Modes: no watchdog (nothing recovers), watchdog restarting
+the session from its profile, and watchdog failing over to a warm
+standby. Also times one health probe and the logged-out path.
+
+    python -m benchmarks.bench_watchdog --cold-init 2 --interval 0.5
+"""
+
+import argparse
+import statistics
+import time
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+
+LINK = "https://chat.whatsapp.com/G001"
+
+
+def _factory(cold_init, rtt):
+    def start(profile_dir):
+        time.sleep(cold_init)
+        driver = FakeWhatsAppDriver(rtt=rtt, page_load=0.05, render_delay=0.01)
+        driver.get("https://web.whatsapp.com")
+        time.sleep(driver.render_delay)  # init waits for the search box
+        return driver
+    return start
+
+
+def _setup(cold_init, rtt, watchdog, standby):
+    factory = _factory(cold_init, rtt)
+    pool = whatsapp_bot.SendPool(1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", factory))
+    whatsapp_bot.send_pool = pool
+    whatsapp_bot.chat_cache.clear()
+    whatsapp_bot.config["watchdog_standby"] = standby
+    dog = whatsapp_bot.SessionWatchdog(
+        pool, standby_factory=lambda: whatsapp_bot.WhatsAppSession("fake-standby", factory))
+    whatsapp_bot.session_watchdog = dog
+    pool.primary.ensure_driver()
+    if watchdog:
+        dog.start()
+        if standby:
+            while not (dog.standby and dog.standby.driver):
+                time.sleep(0.01)
+    return pool, dog
+
+
+def _until_sent(pool, give_up):
+    """Retry a send until one succeeds; returns (seconds, failed sends) or (None, n)"""
+    start = time.perf_counter()
+    failed = 0
+    while time.perf_counter() - start < give_up:
+        if pool.submit(LINK, f"retry {failed}\nline two\nline three").result():
+            return time.perf_counter() - start, failed
+        failed += 1
+        time.sleep(0.05)
+    return None, failed
+
+
+def crash(cold_init, rtt, interval, watchdog, standby, give_up):
+    whatsapp_bot.config["watchdog_interval"] = interval
+    pool, dog = _setup(cold_init, rtt, watchdog, standby)
+    for n in range(3):
+        pool.submit(LINK, f"warm {n}\nline two\nline three").result()
+    pool.primary.driver.quit()  # Chrome crashed
+    seconds, failed = _until_sent(pool, give_up)
+    dog.stop()
+    return {
+        "watchdog": watchdog,
+        "standby": standby,
+        "recovered_in_s": round(seconds, 2) if seconds is not None else None,
+        "failed_sends_meanwhile": failed,
+        "recoveries": [{k: r[k] for k in ("reason", "how", "seconds")} for r in dog.recoveries],
+    }
+
+
+def logged_out(cold_init, rtt, interval, give_up):
+    whatsapp_bot.config.update(watchdog_interval=interval, watchdog_failures=2)
+    pool, dog = _setup(cold_init, rtt, True, False)
+    pool.primary.driver._page = "qr"  # WhatsApp Web dropped back to the login screen
+    start = time.perf_counter()
+    while not dog.recoveries and time.perf_counter() - start < give_up:
+        time.sleep(0.01)
+    dog.stop()
+    return {
+        "recovered_in_s": round(time.perf_counter() - start, 2),
+        "recoveries": [{k: r[k] for k in ("reason", "how", "seconds")} for r in dog.recoveries],
+    }
+
+
+def probe_cost(rtt, iterations=50):
+    session = whatsapp_bot.WhatsAppSession("fake-probe", _factory(0, rtt))
+    session.ensure_driver()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        assert whatsapp_bot.probe_session(session) == "ok"
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def run(cold_init=2.0, interval=0.5, rtt=0.002, give_up=10.0):
+    return {
+        "cold_init_s": cold_init,
+        "watchdog_interval_s": interval,
+        "probe_ms": probe_cost(rtt),
+        "no_watchdog": crash(cold_init, rtt, interval, False, False, give_up),
+        "restart": crash(cold_init, rtt, interval, True, False, give_up),
+        "warm_standby": crash(cold_init, rtt, interval, True, True, give_up),
+        "logged_out": logged_out(cold_init, rtt, interval, give_up),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold-init", type=float, default=2.0, help="fake browser start-up (s)")
+    parser.add_argument("--interval", type=float, default=0.5, help="watchdog_interval (s)")
+    parser.add_argument("--rtt", type=float, default=0.002, help="fake WebDriver round trip (s)")
+    parser.add_argument("--give-up", type=float, default=10.0,
+                        help="stop retrying a send after this long (s)")
+    args = parser.parse_args()
+    report(run, args.cold_init, args.interval, args.rtt, args.give_up)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Web route latency for /init-whatsapp and /test with background jobs.
+
+The browser is the fake driver, with a slow start-up standing in for
+Chrome launch plus the WhatsApp Web load, and Groq is the local mock
+server. Reports how long the routes hold the request thread, how long the
+jobs take to finish, and how many drivers a burst of concurrent "Initialize"
+clicks starts (should be one).
+
+    python -m benchmarks.bench_web_jobs --startup 3 --clicks 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import whatsapp_bot
+from benchmarks import report
+from benchmarks.fake_driver import FakeWhatsAppDriver
+from benchmarks.mock_groq import MockGroqServer
+from outbox import Outbox
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _follow(client, job_id):
+    """Read the job's SSE stream to the end; returns (events, final snapshot)"""
+    body = client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+    events, final = 0, None
+    for block in body.split("\n\n"):
+        if block.startswith("id:"):
+            events += 1
+        elif block.startswith("event: end"):
+            final = json.loads(block.split("data: ", 1)[1])
+    return events, final
+
+
+def run(startup=3.0, clicks=5, latency=0.3, groups=2):
+    drivers = []
+
+    def make_driver(profile_dir):
+        time.sleep(startup)
+        driver = FakeWhatsAppDriver(page_load=0.2, render_delay=0.05)
+        drivers.append(driver)
+        return driver
+
+    whatsapp_bot.send_pool = whatsapp_bot.SendPool(
+        1, session_factory=lambda i: whatsapp_bot.WhatsAppSession(f"fake-{i}", make_driver))
+    whatsapp_bot.outbox = Outbox(os.path.join(tempfile.mkdtemp(prefix="jobs-bench-"), "outbox.db"))
+    whatsapp_bot.chat_cache.clear()
+    client = whatsapp_bot.app.test_client()
+    headers = {"Accept": "application/json"}
+    result = {"fake_startup_s": startup, "groq_latency_s": latency}
+
+    # A burst of concurrent "Initialize WhatsApp" clicks
+    def click(_):
+        start = time.perf_counter()
+        response = client.post("/init-whatsapp", headers=headers)
+        return time.perf_counter() - start, response.get_json()["job_id"]
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(clicks) as pool:
+        answers = list(pool.map(click, range(clicks)))
+    job_ids = {job_id for _, job_id in answers}
+    events, final = _follow(client, answers[0][1])
+    route_times = [seconds for seconds, _ in answers]
+    result["init"] = {
+        "clicks": clicks,
+        "route_mean_ms": _ms(statistics.mean(route_times)),
+        "route_max_ms": _ms(max(route_times)),
+        "job_done_s": round(time.perf_counter() - began, 2),
+        "state": final["state"],
+        "distinct_jobs": len(job_ids),
+        "drivers_started": len(drivers),
+        "sse_events": events,
+    }
+
+    with MockGroqServer(latency=latency) as server:
+        whatsapp_bot.config.update(
+            api_key="mock-key", groq_base_url=server.url, groq_rpm=0, groq_tpm=0,
+            groups=[{"name": f"g{g}", "whatsapp_group_link": f"https://chat.whatsapp.com/G{g:03d}"}
+                    for g in range(groups)],
+        )
+        began = time.perf_counter()
+        response = client.post("/test", headers=headers)
+        route = time.perf_counter() - began
+        job_id = response.get_json()["job_id"]
+        events, final = _follow(client, job_id)
+        result["test"] = {
+            "groups": groups,
+            "route_ms": _ms(route),
+            "job_done_s": round(time.perf_counter() - began, 2),
+            "state": final["state"],
+            "sse_events": events,
+            "messages_sent": sum(len(driver.sent) for driver in drivers),
+        }
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--startup", type=float, default=3.0,
+                        help="fake browser start-up time (s)")
+    parser.add_argument("--clicks", type=int, default=5,
+                        help="concurrent /init-whatsapp requests")
+    parser.add_argument("--latency", type=float, default=0.3,
+                        help="mock Groq latency (s)")
+    parser.add_argument("--groups", type=int, default=2)
+    args = parser.parse_args()
+    report(run, args.startup, args.clicks, args.latency, args.groups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""In-process stand-in for a Selenium Chrome driver on WhatsApp Web.
+
+Models just enough of the DOM the bot touches (search box, "Join group"
+button, chat header, composer), plus the in-page send hook, and charges a
+configurable latency per WebDriver command and per page load, so send paths
+can be timed without Chrome or a phone.
+"""
+
+import itertools
+import threading
+import time
+
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.common.keys import Keys
+
+import whatsapp_bot
+
+ENTER = Keys.ENTER
+SHIFT_ENTER = Keys.SHIFT + Keys.ENTER
+
+_session_ids = itertools.count(1)
+
+
+class FakeElement:
+    def __init__(self, driver, kind):
+        self._driver = driver
+        self.kind = kind
+
+    def click(self):
+        self._driver._command()
+        if self.kind == 'join':
+            self._driver._join()
+
+    def send_keys(self, *values):
+        self._driver._command()
+        if self.kind != 'composer':
+            return
+        text = ''.join(values)
+        while text:
+            if text.startswith(SHIFT_ENTER):
+                self._driver.composer_text += '\n'
+                text = text[len(SHIFT_ENTER):]
+            elif text.startswith(ENTER):
+                self._driver._submit()
+                text = text[len(ENTER):]
+            else:
+                self._driver.composer_text += text[0]
+                text = text[1:]
+
+    @property
+    def text(self):
+        self._driver._command()
+        if self.kind == 'composer':
+            return self._driver.composer_text
+        if self.kind == 'title':
+            return self._driver.chat_title
+        if self.kind == 'join':
+            return 'Join group'
+        return ''
+
+    def get_attribute(self, name):
+        self._driver._command()
+        if name == 'contenteditable' and self.kind in ('composer', 'search'):
+            return 'true'
+        return None
+
+    def is_displayed(self):
+        self._driver._command()
+        return True
+
+    def is_enabled(self):
+        self._driver._command()
+        return True
+
+
+def _insert_text(driver, element, text):
+    if driver.paste_works:
+        driver.composer_text += text
+    return driver.composer_text
+
+
+def _clear_composer(driver, element):
+    driver.composer_text = ''
+
+
+def _install_hook(driver):
+    driver.hook_installed = True
+
+
+def _script_send(driver, message, options):
+    """What SEND_HOOK_JS does, inside the page: no WebDriver commands past the call"""
+    if not driver.hook_installed:
+        return {'ok': False, 'stage': 'install'}
+    deadline = time.monotonic() + options['timeout_ms'] / 1000
+    time.sleep(max(0.0, min(driver._ready_at, deadline) - time.monotonic()))
+    visible = driver._visible()
+    if 'composer' not in visible:
+        if 'join' not in visible:
+            return {'ok': False, 'stage': 'chat'}
+        driver._join()
+    title = driver.chat_title
+    if options.get('expect_title') and title != options['expect_title']:
+        return {'ok': False, 'stage': 'chat', 'title': title}
+    if not (driver.paste_works and driver.hook_works):
+        return {'ok': False, 'stage': 'compose', 'title': title}
+    driver.composer_text = message
+    driver._submit()
+    if driver.ack_delay:
+        time.sleep(driver.ack_delay)
+    return {'ok': True, 'stage': 'send', 'title': title, 'url': driver.current_url, 'ack': 'server'}
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def new_window(self, type_hint=None):
+        self._driver._command()
+        handle = f"tab-{next(_session_ids)}"
+        self._driver.handles.append(handle)
+        self._driver.current_window_handle = handle
+        self._driver._open_blank()
+
+    def window(self, handle):
+        self._driver._command()
+        self._driver.current_window_handle = handle
+
+
+class FakeWhatsAppDriver:
+    """Fake driver; `rtt` is charged per command, `page_load` per get()
+
+    render_delay -- time after a page load before the app's elements exist
+    joined       -- whether the account is already a member of the group
+    paste_works  -- whether the composer accepts INSERT_TEXT_JS
+    hook_works   -- whether the page takes the send hook's input (False: WhatsApp changed)
+    cdp          -- whether execute_cdp_cmd works, as on Chrome
+    ack_delay    -- time until the server acknowledges a sent message
+    """
+
+    def __init__(self, rtt=0.002, page_load=1.0, render_delay=0.3, joined=True,
+                 chat_title="Hunger Squad", paste_works=True, hook_works=True, cdp=True,
+                 ack_delay=0.0):
+        self.rtt = rtt
+        self.page_load = page_load
+        self.render_delay = render_delay
+        self.joined = joined
+        self.chat_title = chat_title
+        self.session_id = f"fake-{next(_session_ids)}"
+        self.current_url = 'about:blank'
+        self.composer_text = ''
+        self.sent = []
+        self.sent_to = []  # (monotonic time, chat code, text)
+        self.chat_code = None
+        self.commands = 0
+        self.page_loads = 0
+        self.paste_works = paste_works
+        self.hook_works = hook_works
+        self.cdp = cdp
+        self.ack_delay = ack_delay
+        self.hook_installed = False
+        self.new_document_scripts = []  # added with Page.addScriptToEvaluateOnNewDocument
+        self.script_timeout = None
+        self.scripts = {
+            whatsapp_bot.INSERT_TEXT_JS: _insert_text,
+            whatsapp_bot.CLEAR_COMPOSER_JS: _clear_composer,
+            whatsapp_bot.SEND_HOOK_JS: _install_hook,
+            whatsapp_bot.SCRIPT_SEND_JS: _script_send,
+        }
+        self.alive = True
+        self.handles = ['main']
+        self.current_window_handle = 'main'
+        self.switch_to = FakeSwitchTo(self)
+        self._page = None
+        self._ready_at = 0.0
+        self._lock = threading.Lock()
+
+    # Internals ---------------------------------------------------------------
+
+    def _command(self):
+        if not self.alive:
+            raise RuntimeError("fake browser has been closed")
+        with self._lock:
+            self.commands += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def _open_blank(self):
+        # Tabs share the one modelled page; a new tab starts blank
+        self.current_url = 'about:blank'
+        self.composer_text = ''
+        self.chat_code = None
+        self._page = None
+        self.hook_installed = False
+        self.new_document_scripts = []
+
+    def _join(self):
+        self.joined = True
+        self._page = 'chat'
+
+    def _submit(self):
+        text = self.composer_text.strip()
+        if text:
+            self.sent.append(text)
+            self.sent_to.append((time.monotonic(), self.chat_code, text))
+        self.composer_text = ''
+
+    def _visible(self):
+        if time.monotonic() < self._ready_at:
+            return set()
+        if self._page == 'home':
+            return {'search'}
+        if self._page == 'invite':
+            return {'search', 'join'}
+        if self._page == 'chat':
+            return {'search', 'composer', 'title'}
+        return set()
+
+    def _kind(self, value):
+        return {
+            whatsapp_bot.XPATH_SEARCH_BOX: 'search',
+            whatsapp_bot.XPATH_COMPOSER: 'composer',
+            whatsapp_bot.XPATH_JOIN_BUTTON: 'join',
+            whatsapp_bot.XPATH_CHAT_TITLE: 'title',
+        }.get(value)
+
+    # WebDriver API -----------------------------------------------------------
+
+    def get(self, url):
+        self._command()
+        self.page_loads += 1
+        if self.page_load:
+            time.sleep(self.page_load)
+        self.composer_text = ''
+        if 'chat.whatsapp.com' in url or 'accept?code=' in url:
+            code = url.rstrip('/').rsplit('/', 1)[-1].rsplit('=', 1)[-1]
+            self.chat_code = code
+            self.current_url = f"https://web.whatsapp.com/accept?code={code}"
+            self._page = 'chat' if self.joined else 'invite'
+        else:
+            self.current_url = url
+            self.chat_code = None
+            self._page = 'home'
+        self.hook_installed = whatsapp_bot.SEND_HOOK_JS in self.new_document_scripts
+        self._ready_at = time.monotonic() + self.render_delay
+
+    def find_elements(self, by, value):
+        self._command()
+        kind = self._kind(value)
+        if kind and kind in self._visible():
+            return [FakeElement(self, kind)]
+        return []
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"no element for {value}")
+        return elements[0]
+
+    def register_script(self, script, handler):
+        """Make execute_script(script, *args) call handler(driver, *args)"""
+        self.scripts[script] = handler
+
+    def execute_script(self, script, *args):
+        self._command()
+        handler = self.scripts.get(script)
+        return handler(self, *args) if handler else None
+
+    def execute_async_script(self, script, *args):
+        return self.execute_script(script, *args)
+
+    def set_script_timeout(self, seconds):
+        self._command()
+        self.script_timeout = seconds
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._command()
+        if not self.cdp:
+            raise WebDriverException("CDP is only available on Chromium")
+        if cmd == 'Page.addScriptToEvaluateOnNewDocument':
+            self.new_document_scripts.append(params['source'])
+        return {}
+
+    @property
+    def window_handles(self):
+        self._command()
+        return list(self.handles)
+
+    def close(self):
+        """Close the current tab; the browser exits with the last one"""
+        self._command()
+        self.handles.remove(self.current_window_handle)
+        if not self.handles:
+            self.alive = False
+
+    def quit(self):
+        self.alive = False
@@ -0,0 +1,226 @@
+"""Local OpenAI-compatible mock of the Groq chat completions API"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MESSAGE = (
+    "Pet mein chuhe daud rahe hain, aur lunch abhi door hai 🐭\n"
+    "Ek glass paani aur thode chane kha lo, energy bani rahegi 💧\n"
+    "Aur haan, ek chhota sa chocolate piece bhi chalega 🍫"
+)
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when many clients connect at once
+    request_queue_size = 256
+
+
+class MockGroqServer:
+    """Threaded mock server; use as a context manager.
+
+    latency        -- seconds per request, a (low, high) tuple for uniform
+                      jitter, or a callable(random.Random) -> seconds; with
+                      ``token_delay`` this is the wait before the first token
+    token_delay    -- seconds per generated word; requests with
+                      ``stream: true`` get them as SSE chunks as they are
+                      "generated", others wait for all of them
+    handshake_delay -- extra seconds charged once per new TCP connection,
+                      standing in for the TLS handshake of the real endpoint
+    error_rate     -- fraction of requests answered with ``error_status``
+    retry_after    -- value of the Retry-After header on error responses
+    responder      -- optional callable(payload) -> reply text, used instead
+                      of the fixed ``message``
+    rate_limit     -- optional (requests, period) cap, refilled continuously
+                      like Groq's per-minute limits; requests over it get a
+                      429 with Retry-After
+    """
+
+    def __init__(self, latency=0.0, handshake_delay=0.0, error_rate=0.0,
+                 error_status=503, retry_after=None, message=DEFAULT_MESSAGE,
+                 seed=None, responder=None, rate_limit=None, token_delay=0.0):
+        self.latency = latency
+        self.handshake_delay = handshake_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.message = message
+        self.responder = responder
+        self.token_delay = token_delay
+        self.rate_limit = rate_limit
+        self._allowance = None
+        self._checked = None
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.errors = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/openai/v1"
+
+    def _sleep_latency(self):
+        latency = self.latency
+        if callable(latency):
+            latency = latency(self.random)
+        elif isinstance(latency, tuple):
+            latency = self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _throttle(self):
+        """Seconds until a request would fit the cap, or 0 if this one does"""
+        if not self.rate_limit:
+            return 0
+        limit, period = self.rate_limit
+        now = time.monotonic()
+        if self._allowance is None:
+            self._allowance, self._checked = float(limit), now
+        self._allowance = min(limit, self._allowance + (now - self._checked) * limit / period)
+        self._checked = now
+        if self._allowance < 1:
+            self.throttled += 1
+            return (1 - self._allowance) * period / limit
+        self._allowance -= 1
+        return 0
+
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with mock._lock:
+                    mock.connections += 1
+                if mock.handshake_delay:
+                    time.sleep(mock.handshake_delay)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                raw = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with mock._lock:
+                    mock.requests += 1
+                    fail = mock.random.random() < mock.error_rate
+                    wait = mock._throttle()
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                if wait:
+                    self._send_json(429, {"error": {"message": "rate limit reached"}},
+                                    {"Retry-After": f"{wait:.2f}"})
+                    return
+
+                mock._sleep_latency()
+
+                if fail:
+                    with mock._lock:
+                        mock.errors += 1
+                    headers = {}
+                    if mock.retry_after is not None:
+                        headers["Retry-After"] = str(mock.retry_after)
+                    self._send_json(mock.error_status,
+                                    {"error": {"message": "mock failure"}}, headers)
+                    return
+
+                if payload.get("stream"):
+                    self._stream(payload)
+                    return
+                body = mock.completion(payload)
+                if mock.token_delay:
+                    words = len(mock.words(body["choices"][0]["message"]["content"]))
+                    time.sleep(mock.token_delay * words)
+                self._send_json(200, body)
+
+            def _chunk(self, data):
+                raw = f"data: {data}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+                self.wfile.flush()
+
+            def _stream(self, payload):
+                body = mock.completion(payload)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                base = {key: body[key] for key in ("id", "created", "model")}
+                base["object"] = "chat.completion.chunk"
+                for n, word in enumerate(mock.words(body["choices"][0]["message"]["content"])):
+                    if n and mock.token_delay:
+                        time.sleep(mock.token_delay)
+                    delta = {"content": word} if n else {"role": "assistant", "content": word}
+                    self._chunk(json.dumps(
+                        {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+                self._chunk(json.dumps({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                                        "x_groq": {"usage": body["usage"]}}))
+                self._chunk("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    @staticmethod
+    def words(content):
+        """Split a reply into the pieces streamed one per chunk"""
+        return re.findall(r"\S+\s*|\s+", content)
+
+    def completion(self, payload):
+        content = self.responder(payload) if self.responder else self.message
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
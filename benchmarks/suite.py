@@ -0,0 +1,231 @@
+"""Run the offline benchmark scenarios and write one JSON report.
+
+Each scenario is one of the ``bench_*`` modules, run in its own process
+(they patch ``whatsapp_bot`` globals) against the mock Groq server and the
+fake WebDriver, so nothing needs network access, Chrome or an API key. By
+default the scenarios run with scaled-down settings that finish in a couple
+of minutes; ``--full`` uses each module's own defaults. The report holds
+each module's full result plus a flat table of key metrics. Correctness
+metrics (nothing sent twice, nothing lost, order kept) have fixed
+expectations that every run is checked against. Pass an earlier report as
+``--compare`` to also flag metrics that got worse by more than
+``--threshold`` (relative). The exit status is 1 on a failed scenario, a
+missed expectation or a regression, so the suite can gate a change.
+
+    python -m benchmarks.suite --out baseline.json
+    python -m benchmarks.suite --compare baseline.json --out current.json
+    python -m benchmarks.suite --only single_send burst_fanout
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+LOWER, HIGHER, SAME = "lower", "higher", "same"
+
+# name -> (module, quick arguments, {metric: (path in the result, better when[, expected])})
+# `expected` is the value the metric must have, or a function of the result giving it
+SCENARIOS = {
+    "single_send": ("bench_end_to_end", ["--slots", "5"], {
+        "buffered_ms": ("buffered.mean_ms", LOWER),
+        "inline_generation_ms": ("inline.mean_ms", LOWER),
+        "groq_down_ms": ("groq_down.mean_ms", LOWER),
+        # buffered, inline and Groq-down paths each send `slots_per_path` messages
+        "delivered": ("delivered_to_fake_driver", SAME, lambda result: 3 * result["slots_per_path"]),
+    }),
+    "burst_fanout": ("bench_fanout", ["--groups", "8", "--per-group", "2", "--sizes", "1", "4",
+                                      "--page-load", "0.2"], {
+        "pool_1_sends_per_minute": ("results.0.sends_per_minute", HIGHER),
+        "pool_4_sends_per_minute": ("results.-1.sends_per_minute", HIGHER),
+        "per_group_order_ok": ("results.-1.per_group_order_ok", SAME, True),
+    }),
+    "script_send": ("bench_script_send", ["--sends", "8"], {
+        "ui_open_chat_ms": ("open_chat.ui.steady_mean_ms", LOWER),
+        "script_open_chat_ms": ("open_chat.script.steady_mean_ms", LOWER),
+        "script_round_trips": ("open_chat.script.round_trips_steady", LOWER),
+        "fallback_delivered_once": ("hook_broken.script.delivered_exactly_once", SAME, True),
+    }),
+    "groq_streaming": ("bench_streaming", ["--runs", "3", "--token-delay", "0.01"], {
+        "first_token_ms": ("stream_first_token.mean_ms", LOWER),
+        "full_response_ms": ("full_response.mean_ms", LOWER),
+    }),
+    "browser_failure_recovery": ("bench_watchdog", ["--cold-init", "0.5", "--interval", "0.2",
+                                                    "--give-up", "3"], {
+        "restart_recovery_s": ("restart.recovered_in_s", LOWER),
+        "standby_recovery_s": ("warm_standby.recovered_in_s", LOWER),
+    }),
+    "groq_failure_recovery": ("bench_hedging", ["--generations", "20"], {
+        "hedged_p50_ms": ("with_hedging.latency.p50_ms", LOWER),
+        "outage_max_ms": ("outage.latency.max_ms", LOWER),
+        "outage_distinct_messages": ("outage.distinct_messages", SAME,
+                                     lambda result: result["outage"]["slots"]),
+    }),
+    "multi_day_schedule": ("bench_scheduler", ["--days", "365"], {
+        "duplicate_firings": ("simulated.*.duplicates", SAME, 0),
+        "wrong_local_time": ("simulated.*.wrong_local_time", SAME, 0),
+        "stale_backlog_skipped": ("suspend.stale_backlog_skipped", SAME, True),
+    }),
+    "multi_day_browser_memory": ("bench_browser_memory", ["--days", "2"], {
+        "peak_rss_mb": ("rss_limit_and_max_age.peak_rss_mb", LOWER),
+        "recycles": ("rss_limit_and_max_age.recycles.restart", SAME),
+    }),
+}
+
+
+def lookup(result, path):
+    """Value at a dotted `path`; list steps are indexes, ``*`` sums every item"""
+    value = result
+    parts = path.split(".")
+    for n, part in enumerate(parts):
+        if isinstance(value, list):
+            if part == "*":
+                return sum(lookup(item, ".".join(parts[n + 1:])) for item in value)
+            value = value[int(part)]
+        else:
+            value = value[part]
+    return value
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(name, full=False, timeout=900, verbose=False):
+    module, arguments, metrics = SCENARIOS[name]
+    command = [sys.executable, "-m", f"benchmarks.{module}", *([] if full else arguments)]
+    print(f"▶ {name}: {' '.join(command[1:])}", file=sys.stderr)
+    start = time.perf_counter()
+    try:
+        done = subprocess.run(command, stdout=subprocess.PIPE, text=True, timeout=timeout,
+                              stderr=None if verbose else subprocess.PIPE)
+    except subprocess.TimeoutExpired:
+        return {"module": module, "error": f"timed out after {timeout}s"}
+    report = {"module": module, "arguments": command[3:],
+              "wall_s": round(time.perf_counter() - start, 2)}
+    if done.returncode != 0:
+        log = (done.stderr or "").strip().splitlines()
+        report["error"] = "\n".join([f"exit status {done.returncode}"] + log[-20:])
+        return report
+    result = json.loads(done.stdout)
+    values, missed = {}, {}
+    for metric, (path, _, *expected) in metrics.items():
+        try:
+            values[metric] = lookup(result, path)
+        except (KeyError, IndexError, TypeError, ValueError):
+            values[metric] = None
+        if expected:
+            want = expected[0](result) if callable(expected[0]) else expected[0]
+            if values[metric] != want:
+                missed[metric] = {"expected": want, "value": values[metric]}
+    report["metrics"] = values
+    report["expectations_missed"] = missed
+    report["result"] = result
+    return report
+
+
+def regressed(baseline, value, better, threshold):
+    if baseline is None or value is None:
+        return baseline != value
+    if better == SAME:
+        return value != baseline
+    change = value - baseline if better == LOWER else baseline - value
+    return change > abs(baseline) * threshold if baseline else change > 0
+
+
+def compare(report, baseline, threshold):
+    """Per-metric comparison of `report` with an earlier `baseline` report"""
+    comparison = {}
+    for name, scenario in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or "metrics" not in before or "metrics" not in scenario:
+            continue
+        rows = {}
+        for metric, (_, better, *_) in SCENARIOS[name][2].items():
+            if metric not in before["metrics"]:
+                continue
+            old, new = before["metrics"][metric], scenario["metrics"].get(metric)
+            numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (old, new))
+            rows[metric] = {
+                "baseline": old,
+                "value": new,
+                "change": round((new - old) / abs(old), 3) if numeric and old else None,
+                "better": better,
+                "regressed": regressed(old, new, better, threshold),
+            }
+        comparison[name] = rows
+    return comparison
+
+
+def run(names=None, full=False, baseline=None, threshold=0.25, timeout=900, verbose=False):
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "preset": "full" if full else "quick",
+        },
+        "scenarios": {name: run_scenario(name, full, timeout, verbose) for name in names or SCENARIOS},
+    }
+    failed = [name for name, scenario in report["scenarios"].items() if "error" in scenario]
+    missed = [f"{name}.{metric}" for name, scenario in report["scenarios"].items()
+              for metric in scenario.get("expectations_missed", {})]
+    regressions = []
+    if baseline is not None:
+        report["baseline"] = baseline.get("meta")
+        report["threshold"] = threshold
+        report["comparison"] = compare(report, baseline, threshold)
+        regressions = [f"{name}.{metric}" for name, rows in report["comparison"].items()
+                       for metric, row in rows.items() if row["regressed"]]
+        report["regressions"] = regressions
+    report["failed"] = failed
+    report["expectations_missed"] = missed
+    report["ok"] = not failed and not missed and not regressions
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--full", action="store_true", help="use each benchmark's own defaults")
+    parser.add_argument("--out", help="write the report here as well as to stdout")
+    parser.add_argument("--compare", metavar="REPORT", help="earlier report to check against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative worsening counted as a regression")
+    parser.add_argument("--timeout", type=float, default=900, help="per scenario (s)")
+    parser.add_argument("--verbose", action="store_true", help="show the benchmarks' logs")
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report = run(args.only, args.full, baseline, args.threshold, args.timeout, args.verbose)
+    for name in report["failed"]:
+        print(f"❌ {name} failed: {report['scenarios'][name]['error']}", file=sys.stderr)
+    for miss in report["expectations_missed"]:
+        name, metric = miss.split(".", 1)
+        row = report["scenarios"][name]["expectations_missed"][metric]
+        print(f"❌ {miss}: expected {row['expected']}, got {row['value']}", file=sys.stderr)
+    for regression in report.get("regressions", []):
+        name, metric = regression.split(".", 1)
+        row = report["comparison"][name][metric]
+        print(f"⚠️ {regression}: {row['baseline']} -> {row['value']}", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
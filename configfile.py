@@ -0,0 +1,105 @@
+"""JSON config file, read at start-up and watched for changes
+
+The file (``config.json``, shaped like ``config_template.json``) holds any
+subset of the bot's settings. ``ConfigWatcher`` polls its modification
+time and size, and when either changes and the content really differs,
+passes the parsed settings to an `apply` callback that validates and
+installs them. A file that does not parse, or that `apply` rejects with
+ValueError, is reported and skipped, so the running settings stay as they
+were until the file is fixed. ``save`` writes with write-then-rename, so
+the watcher never reads a half-written file.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from atomicfile import write_json
+
+
+def load(path):
+    """Settings dict from `path`; {} if it does not exist, ValueError if malformed"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    values = json.loads(raw.decode('utf-8-sig'))
+    if not isinstance(values, dict):
+        raise ValueError(f"{path} must hold a JSON object")
+    return values
+
+
+def save(path, values):
+    """Write `values` to `path` atomically"""
+    write_json(path, values, indent=2, ensure_ascii=False)
+
+
+class ConfigWatcher:
+    """Re-applies the config file whenever it changes
+
+    `apply(values)` installs a parsed file; it should raise ValueError for
+    invalid settings. The file is polled every `interval` seconds.
+    """
+
+    def __init__(self, path, apply, interval=2.0):
+        self.path = path
+        self.apply = apply
+        self.interval = interval
+        self.applied_at = None  # time.time() of the last applied change
+        self.error = None  # why the current file was not applied, if it was not
+        self._stat = None
+        self._digest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """Apply the file if it changed since the last check; returns True if applied"""
+        with self._lock:
+            signature = self._signature()
+            if signature == self._stat:
+                return False
+            self._stat = signature
+            if signature is None:
+                return False  # deleted: keep the running settings
+            try:
+                with open(self.path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                if digest == self._digest:
+                    return False  # touched or rewritten without changes
+                self.apply(load(self.path))
+            except (OSError, ValueError) as e:
+                self.error = str(e)
+                print(f"⚠️ Ignoring {self.path}: {e}")
+                return False
+            self._digest = digest
+            self.error = None
+            self.applied_at = time.time()
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Error reloading {self.path}: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
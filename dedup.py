@@ -0,0 +1,144 @@
+"""Near-duplicate detection over sent messages (MinHash + LSH)
+
+Messages are reduced to word-bigram shingles and summarised with
+one-permutation MinHash: each shingle is hashed into COPIES of the BINS
+bins, and a bin keeps its smallest value. Hashing every shingle several
+times fills almost all bins even for a 3-line message, which keeps
+unrelated messages from colliding through densified (borrowed) bins.
+Bins are grouped into BANDS bands; two messages sharing any band become
+candidates, and the fraction of equal bins estimates their Jaccard
+similarity.
+
+Band keys and signatures live in SQLite, so the index survives restarts
+and its memory use does not grow with history size.
+"""
+
+import hashlib
+import operator
+import re
+import struct
+import zlib
+from array import array
+
+from sqlitestore import SQLiteStore
+
+BINS = 32
+BANDS = 8
+ROWS = BINS // BANDS
+COPIES = 3
+EMPTY = 0xFFFFFFFF
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band_key INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (band_key, id)
+) WITHOUT ROWID;
+"""
+
+_NON_WORD = re.compile(r"[^\w ]+")
+_SPACES = re.compile(r"\s+")
+_BAND = struct.Struct(f"<B{ROWS}I")
+
+
+def normalize(text):
+    """Lowercase and drop punctuation/emoji so only the wording counts"""
+    text = _SPACES.sub(' ', text.lower())
+    return _SPACES.sub(' ', _NON_WORD.sub('', text)).strip()
+
+
+def signature(text):
+    """One-permutation MinHash signature of `text` (BINS uint32 values)"""
+    words = normalize(text).split()
+    bins = [EMPTY] * BINS
+    crc32 = zlib.crc32
+    for i in range(max(len(words) - 1, 1)):
+        h = crc32(' '.join(words[i:i + 2]).encode('utf-8'))
+        for copy in range(COPIES):
+            if copy:
+                h = crc32(b'%d' % copy, h)
+            b = h & (BINS - 1)
+            value = h >> 5
+            if value < bins[b]:
+                bins[b] = value
+    # Densify: an empty bin borrows the next non-empty bin's value
+    if EMPTY in bins:
+        filled = [i for i, v in enumerate(bins) if v != EMPTY]
+        for i, v in enumerate(bins):
+            if v == EMPTY:
+                source = next((j for j in filled if j > i), filled[0])
+                bins[i] = (bins[source] + (source - i) % BINS) & 0x7FFFFFF
+    return array('I', bins)
+
+
+def band_keys(sig):
+    """One signed 64-bit key per band"""
+    keys = []
+    for band in range(BANDS):
+        packed = _BAND.pack(band, *sig[band * ROWS:(band + 1) * ROWS])
+        digest = hashlib.blake2b(packed, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(map(operator.eq, sig_a, sig_b)) / BINS
+
+
+class DuplicateIndex(SQLiteStore):
+    """Persistent LSH index of past messages
+
+    `threshold` is the estimated similarity at or above which a candidate
+    counts as a near duplicate.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path='dedup.db', threshold=0.6):
+        super().__init__(path)
+        self.threshold = threshold
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def add(self, text):
+        return self.add_many([text])
+
+    def add_many(self, texts):
+        """Index messages in one transaction; returns how many were added"""
+        def insert(conn):
+            added = 0
+            for text in texts:
+                sig = signature(text)
+                cursor = conn.execute("INSERT INTO signatures (signature) VALUES (?)",
+                                      (sig.tobytes(),))
+                conn.executemany("INSERT OR IGNORE INTO bands (band_key, id) VALUES (?, ?)",
+                                 [(key, cursor.lastrowid) for key in band_keys(sig)])
+                added += 1
+            return added
+        return self._write(insert)
+
+    def nearest(self, text):
+        """(best estimated similarity, message id) among LSH candidates, or (0.0, None)"""
+        sig = signature(text)
+        keys = band_keys(sig)
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT s.id, s.signature FROM signatures s WHERE s.id IN"
+            f" (SELECT id FROM bands WHERE band_key IN ({','.join('?' * len(keys))}))",
+            keys,
+        ).fetchall()
+        best, best_id = 0.0, None
+        for row_id, blob in rows:
+            score = similarity(sig, array('I', blob))
+            if score > best:
+                best, best_id = score, row_id
+        return best, best_id
+
+    def is_duplicate(self, text):
+        return self.nearest(text)[0] >= self.threshold
@@ -0,0 +1,111 @@
+"""On-disk cache of the resolved ChromeDriver binary
+
+``ChromeDriverManager().install()`` asks the network which driver matches
+the installed Chrome on every call, which is slow and fails offline. The
+resolved path is stored with the Chrome version it was resolved for, and
+reused until that version changes (or the binary disappears). If resolving
+fails, e.g. offline, a cached driver is used even if it may be stale.
+
+The Chrome version is asked of Chrome itself, so webdriver_manager is only
+imported when the cache cannot answer.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+from atomicfile import write_json
+
+# Where `chrome --version` can be run, per platform; Windows uses the registry
+CHROME_BINARIES = {
+    'linux': ('google-chrome', 'google-chrome-stable'),
+    'darwin': ('/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',),
+}
+
+
+def chrome_version():
+    """Version string of the installed Google Chrome, or None if unknown"""
+    if sys.platform == 'win32':
+        import winreg
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Google\Chrome\BLBeacon') as key:
+                return winreg.QueryValueEx(key, 'version')[0]
+        except OSError:
+            return None
+    platform = 'darwin' if sys.platform == 'darwin' else 'linux'
+    for binary in CHROME_BINARIES[platform]:
+        try:
+            done = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r'\d+(\.\d+)+', done.stdout)
+        if match:
+            return match.group()
+    return None
+
+
+def install_chromedriver():
+    """Resolve (and download if needed) the matching driver; returns its path"""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+class DriverCache:
+    """Resolved ChromeDriver path, keyed on the Chrome version
+
+    `version` and `install` default to the lookups above and can be swapped
+    out (e.g. by benchmarks).
+    """
+
+    def __init__(self, path='chromedriver_cache.json', version=chrome_version,
+                 install=install_chromedriver):
+        self.path = path
+        self.version = version
+        self.install = install
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry if isinstance(entry, dict) and entry.get('path') else None
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, entry):
+        try:
+            write_json(self.path, entry)
+        except OSError as e:
+            print(f"⚠️ Could not save ChromeDriver cache: {e}")
+
+    def resolve(self):
+        """Driver path for the installed Chrome; resolves and caches on a miss"""
+        with self._lock:
+            cached = self._read()
+            usable = cached and os.path.exists(cached['path'])
+            version = self.version()
+            # An unknown version cannot prove the cache stale, so trust it
+            if usable and (version is None or cached.get('chrome_version') == version):
+                return cached['path']
+
+            try:
+                path = self.install()
+            except Exception as e:
+                if not usable:
+                    raise
+                print(f"⚠️ Could not resolve ChromeDriver ({e}); using cached {cached['path']}")
+                return cached['path']
+            self._write({'path': path, 'chrome_version': version, 'resolved_at': time.time()})
+            return path
+
+    def invalidate(self):
+        """Forget the cached path, e.g. after Chrome refused the driver"""
+        with self._lock:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
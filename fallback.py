@@ -0,0 +1,90 @@
+"""Offline fallback messages for when the LLM misses a slot's deadline
+
+The corpus is a JSON file mapping slot -> list of ready-made messages.
+Each slot is walked in a shuffled order; the position is saved after
+every pick, so messages only repeat once the whole list has gone out, even
+across restarts. A new shuffle starts each time a list is exhausted.
+"""
+
+import json
+import random
+import threading
+
+from atomicfile import write_json
+
+
+class FallbackCorpus:
+    """Rotating, pre-validated fallback messages per slot
+
+    `validate(message)` filters the corpus when it is loaded. Slots
+    missing from the file borrow from every slot's messages.
+    """
+
+    def __init__(self, path='fallback_messages.json', state_path='fallback_state.json',
+                 validate=None):
+        self.path = path
+        self.state_path = state_path
+        self.validate = validate
+        self._messages = None  # slot -> list of messages
+        self._state = None  # slot -> {'epoch': n, 'position': i}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._messages is not None:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load fallback messages from {self.path}: {e}")
+            raw = {}
+        messages, rejected = {}, 0
+        for slot, texts in raw.items():
+            for text in texts:
+                text = text.strip()
+                if self.validate and not self.validate(text):
+                    rejected += 1
+                    continue
+                messages.setdefault(slot, []).append(text)
+        if rejected:
+            print(f"⚠️ Ignored {rejected} invalid fallback message(s) in {self.path}")
+        self._messages = messages
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def _save_state(self):
+        try:
+            write_json(self.state_path, self._state)
+        except OSError as e:
+            print(f"⚠️ Could not save fallback rotation state: {e}")
+
+    def _pool(self, slot):
+        if slot in self._messages:
+            return slot, self._messages[slot]
+        return '*', [text for texts in self._messages.values() for text in texts]
+
+    def size(self, slot=None):
+        with self._lock:
+            self._load()
+            return len(self._pool(slot)[1]) if slot else sum(map(len, self._messages.values()))
+
+    def next(self, slot):
+        """The next message for `slot` in its rotation, or None if there are none"""
+        with self._lock:
+            self._load()
+            key, pool = self._pool(slot)
+            if not pool:
+                return None
+            state = self._state.setdefault(key, {'epoch': 0, 'position': 0})
+            if state['position'] >= len(pool):
+                state['epoch'] += 1
+                state['position'] = 0
+            order = list(range(len(pool)))
+            random.Random(f"{key}:{state['epoch']}").shuffle(order)
+            message = pool[order[state['position']]]
+            state['position'] += 1
+            self._save_state()
+            return message
@@ -0,0 +1,182 @@
+"""Background jobs for slow web actions
+
+A route submits the work and returns at once with a job id. The client
+then polls the job's JSON snapshot or follows its progress events as a
+Server-Sent Events stream. Work that touches a shared resource (the
+browser) takes a named exclusive lock, so only one such job runs at a time.
+"""
+
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+STATES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class Job:
+    """One submitted action: state, progress events and result"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.state = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []  # dicts with a 'seq' number, oldest first
+        self._seq = itertools.count(1)
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.state in ('succeeded', 'failed')
+
+    def update(self, message, **fields):
+        """Record a progress event and wake anyone following the job"""
+        with self._cond:
+            event = {'seq': next(self._seq), 'time': time.time(), 'state': self.state,
+                     'message': message, **fields}
+            self.events.append(event)
+            self._cond.notify_all()
+        print(f"🧵 [{self.kind} {self.id}] {message}")
+
+    def _finish(self, state, result=None, error=None):
+        with self._cond:
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            # Same (reentrant) lock: followers never see 'done' without this event
+            self.update(error or result or state)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'state': self.state,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'events': list(self.events),
+            }
+
+    def events_after(self, seq, timeout=None):
+        """Events newer than `seq`, waiting up to `timeout` for one to arrive"""
+        with self._cond:
+            if not self.done and (not self.events or self.events[-1]['seq'] <= seq):
+                self._cond.wait(timeout)
+            return [event for event in self.events if event['seq'] > seq]
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self.done:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.done
+
+
+class JobManager:
+    """Thread-pool executor that keeps the last `keep` jobs for lookup"""
+
+    def __init__(self, max_workers=4, keep=100):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()  # id -> Job
+        self._resources = {}  # name -> Lock
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, coalesce=False):
+        """Run fn(job, *args) in the background and return the Job at once
+
+        The job succeeds with fn's return value or fails with the message of
+        the exception it raised. With `coalesce`, an unfinished job of the
+        same kind is returned instead of starting a second one.
+        """
+        with self._lock:
+            if coalesce:
+                for job in reversed(self._jobs.values()):
+                    if job.kind == kind and not job.done:
+                        return job
+            job = Job(kind)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done:
+                    break
+                self._jobs.popitem(last=False)
+        job.update("Queued")
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        with job._cond:
+            job.state = 'running'
+            job.started_at = time.time()
+        job.update("Started")
+        try:
+            result = fn(job, *args)
+        except Exception as e:
+            job._finish('failed', error=str(e) or type(e).__name__)
+        else:
+            job._finish('succeeded', result=result)
+
+    @contextmanager
+    def exclusive(self, name, job=None):
+        """Hold the named resource lock, noting on `job` if it has to wait"""
+        with self._lock:
+            lock = self._resources.setdefault(name, threading.Lock())
+        if not lock.acquire(blocking=False):
+            if job:
+                job.update(f"Waiting for the {name}...")
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit=20):
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+        return [job.snapshot() for job in reversed(jobs)]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def sse_events(job, after=0, heartbeat=15):
+    """Server-Sent Events for a job: events after seq `after`, then 'end'
+
+    A comment line goes out every `heartbeat` seconds without news so
+    proxies keep the connection open.
+    """
+    seq = after
+    while True:
+        events = job.events_after(seq, timeout=heartbeat)
+        if not events and not job.done:
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            seq = event['seq']
+            yield f"id: {seq}\nevent: progress\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        if job.done and job.events[-1]['seq'] <= seq:
+            snapshot = job.snapshot()
+            del snapshot['events']
+            yield f"event: end\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+            return
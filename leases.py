@@ -0,0 +1,195 @@
+"""Send leases with fencing tokens, shared by bot instances through SQLite
+
+Several nodes can run the same schedule against one lease file on shared
+disk; each send is leased under its outbox idempotency key (group, slot,
+date). The node whose ``acquire`` wins sends, the others back off. A lease
+lapses `ttl` seconds after its holder last renewed it, so when the holder
+dies another node can acquire it again.
+
+Every acquire increments the lease's fencing token. Right before sending
+the holder calls ``fence``, which checks that its token is still current
+and marks the send started; ``complete`` needs the same token. A node that
+stalled past expiry and was replaced therefore cannot send or finish.
+
+One case stays at-least-once: a holder that dies after the message went
+out but before ``complete`` leaves the lease 'sending', and whoever takes
+it over sends again.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from sqlitestore import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    token INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    expires REAL NOT NULL,
+    acquisitions INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leases_state ON leases (state, expires);
+"""
+
+# held -> sending -> done; released when a send failed and may be retried
+STATES = ('held', 'sending', 'done', 'released')
+
+
+def default_node_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Lease:
+    """One node's claim on a key, valid while `token` is current"""
+
+    __slots__ = ('key', 'token', 'holder', 'previous_holder', 'lost')
+
+    def __init__(self, key, token, holder, previous_holder=None):
+        self.key = key
+        self.token = token
+        self.holder = holder
+        # Set when the lease was taken over from another node
+        self.previous_holder = previous_holder
+        self.lost = False
+
+
+class LeaseStore(SQLiteStore):
+    """SQLite lease table; safe to share between threads and processes
+
+    A key can be acquired when it has no lease, when its lease lapsed, or
+    when it was released, at most `max_acquisitions` times in all. A 'done'
+    lease is never handed out again. Leases passed to ``hold`` are renewed
+    in the background until completed or released.
+    """
+
+    schema = SCHEMA
+    row_factory = sqlite3.Row
+
+    def __init__(self, path='leases.db', node_id=None, ttl=60, max_acquisitions=3):
+        super().__init__(path)
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self.max_acquisitions = max_acquisitions
+        self._held = {}  # key -> Lease renewed by the keeper thread
+        self._held_lock = threading.Lock()
+        self._keeper = None
+
+    # Holding ----------------------------------------------------------------
+
+    def acquire(self, key):
+        """Take the lease on `key` with a new fencing token; None if not available"""
+        def attempt(conn):
+            now = time.time()
+            row = conn.execute("SELECT * FROM leases WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO leases (key, holder, token, state, expires, updated_at)"
+                    " VALUES (?, ?, 1, 'held', ?, ?)",
+                    (key, self.node_id, now + self.ttl, now),
+                )
+                return Lease(key, 1, self.node_id)
+            lapsed = row['state'] in ('held', 'sending') and row['expires'] <= now
+            if not (lapsed or row['state'] == 'released'):
+                return None
+            if row['acquisitions'] >= self.max_acquisitions:
+                return None
+            token = row['token'] + 1
+            conn.execute(
+                "UPDATE leases SET holder = ?, token = ?, state = 'held', expires = ?,"
+                " acquisitions = acquisitions + 1, updated_at = ? WHERE key = ?",
+                (self.node_id, token, now + self.ttl, now, key),
+            )
+            previous = row['holder'] if row['holder'] != self.node_id else None
+            return Lease(key, token, self.node_id, previous)
+        return self._write(attempt)
+
+    def _update(self, lease, assignments, params):
+        """Apply an UPDATE if `lease` still holds the key (current token, not lapsed)"""
+        now = time.time()
+        cursor = self._conn().execute(
+            f"UPDATE leases SET {assignments}, updated_at = ?"
+            " WHERE key = ? AND token = ? AND expires > ? AND state IN ('held', 'sending')",
+            (*params, now, lease.key, lease.token, now),
+        )
+        if cursor.rowcount != 1:
+            lease.lost = True
+            return False
+        return True
+
+    def renew(self, lease):
+        """Extend the lease by `ttl`; False if it was lost"""
+        return self._update(lease, "expires = ?", (time.time() + self.ttl,))
+
+    def fence(self, lease):
+        """Check the token is current and mark the send started; False means do not send
+
+        Call it again right before the irreversible step, which narrows the
+        window in which a replaced holder can still send.
+        """
+        return self._update(lease, "state = 'sending', expires = ?", (time.time() + self.ttl,))
+
+    def complete(self, lease):
+        """Mark the send done so nobody sends it again; False if the lease was lost"""
+        self._drop(lease)
+        return self._update(lease, "state = 'done'", ())
+
+    def release(self, lease):
+        """Give the lease up (the send failed or was skipped) so it can be retried"""
+        self._drop(lease)
+        return self._update(lease, "state = 'released', expires = ?", (time.time(),))
+
+    # Background renewal -----------------------------------------------------
+
+    def hold(self, lease):
+        """Keep renewing `lease` until it is completed or released"""
+        with self._held_lock:
+            self._held[lease.key] = lease
+            if self._keeper is None or not self._keeper.is_alive():
+                self._keeper = threading.Thread(target=self._keep, name='lease-keeper', daemon=True)
+                self._keeper.start()
+
+    def _drop(self, lease):
+        with self._held_lock:
+            if self._held.get(lease.key) is lease:
+                del self._held[lease.key]
+
+    def _keep(self):
+        while True:
+            time.sleep(self.ttl / 3)
+            with self._held_lock:
+                held = list(self._held.values())
+            for lease in held:
+                try:
+                    renewed = self.renew(lease)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Could not renew lease {lease.key}: {e}")
+                    continue
+                if not renewed:
+                    print(f"⚠️ Lost lease {lease.key} (token {lease.token})")
+                    self._drop(lease)
+
+    # Reading ----------------------------------------------------------------
+
+    def get(self, key):
+        row = self._conn().execute("SELECT * FROM leases WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def orphaned(self, keys):
+        """Those of `keys` whose lease lapsed or was released and can be taken over"""
+        keys = list(keys)
+        if not keys:
+            return []
+        now = time.time()
+        placeholders = ", ".join("?" * len(keys))
+        rows = self._conn().execute(
+            f"SELECT key FROM leases WHERE key IN ({placeholders}) AND acquisitions < ?"
+            " AND (state = 'released' OR (state IN ('held', 'sending') AND expires <= ?))",
+            (*keys, self.max_acquisitions, now),
+        )
+        return [row['key'] for row in rows]
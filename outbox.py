@@ -0,0 +1,286 @@
+"""Durable SQLite outbox and send history for the WhatsApp bot
+
+Every message to send is a row that moves pending -> sending -> sent or
+failed, or 'unconfirmed' when it may have gone out but that could not be
+checked. A pending or failed row whose slot another node already sent
+becomes 'superseded'. Both are final like 'sent': such a row is never
+sent again. Rows are keyed by an idempotency key (group, slot, date), so a
+slot that fires twice, or is retried after a crash, never creates a second
+message. Delivery is at-least-once: rows stuck in 'sending' (the process
+died mid-send) go back to 'pending' on recovery.
+
+    python outbox.py import PyWhatKit_DB.txt
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+from sqlitestore import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    group_link TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    slot_date TEXT NOT NULL,
+    message TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    sent_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_group_time ON outbox (group_link, created_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_time ON outbox (created_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_state ON outbox (state, updated_at);
+"""
+
+STATES = ('pending', 'sending', 'sent', 'failed', 'unconfirmed', 'superseded')
+# States a row never leaves: it went out, may have, or another node sent it
+FINAL_STATES = ('sent', 'unconfirmed', 'superseded')
+
+
+def idempotency_key(group_link, slot, slot_date):
+    return f"{group_link}|{slot}|{slot_date}"
+
+
+class Outbox(SQLiteStore):
+    """SQLite-backed outbox; safe to share between threads
+
+    The database is opened lazily, one connection per thread, in WAL mode so
+    readers (the web UI) never block the sender.
+    """
+
+    schema = SCHEMA
+    row_factory = sqlite3.Row
+
+    def __init__(self, path='outbox.db', max_attempts=3):
+        super().__init__(path)
+        self.max_attempts = max_attempts
+
+    # Writing ----------------------------------------------------------------
+
+    def enqueue(self, group_link, slot, slot_date, message, key=None, state='pending',
+                created_at=None, sent_at=None):
+        """Add a message unless its idempotency key exists; returns (row, created)"""
+        key = key or idempotency_key(group_link, slot, slot_date)
+        now = created_at or time.time()
+        conn = self._conn()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO outbox (idempotency_key, group_link, slot, slot_date,"
+            " message, state, created_at, updated_at, sent_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, group_link, slot, slot_date, message, state, now, now, sent_at),
+        )
+        return self.get_by_key(key), cursor.rowcount == 1
+
+    def enqueue_many(self, rows):
+        """Bulk insert of (key, group_link, slot, slot_date, message, state, created_at, sent_at)
+
+        Returns the number of rows inserted; existing keys are skipped.
+        """
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, group_link, slot, slot_date,"
+                " message, state, created_at, updated_at, sent_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((key, link, slot, day, message, state, created, created, sent)
+                 for key, link, slot, day, message, state, created, sent in rows),
+            )
+            return conn.total_changes - before
+        return self._write(insert)
+
+    def claim(self, row_id):
+        """Move a pending (or retryable failed) row to 'sending'; None if not claimable"""
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE outbox SET state = 'sending', attempts = attempts + 1, updated_at = ?"
+            " WHERE id = ? AND (state = 'pending' OR (state = 'failed' AND attempts < ?))",
+            (time.time(), row_id, self.max_attempts),
+        )
+        return self.get(row_id) if cursor.rowcount == 1 else None
+
+    def mark_sent(self, row_id):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE outbox SET state = 'sent', sent_at = ?, updated_at = ?, error = NULL WHERE id = ?",
+            (now, now, row_id),
+        )
+
+    def mark_failed(self, row_id, error=None):
+        self._conn().execute(
+            "UPDATE outbox SET state = 'failed', updated_at = ?, error = ? WHERE id = ?",
+            (time.time(), error, row_id),
+        )
+
+    def mark_unconfirmed(self, row_id, error=None):
+        """The send may have gone out: never retry it"""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE outbox SET state = 'unconfirmed', sent_at = ?, updated_at = ?, error = ? WHERE id = ?",
+            (now, now, error, row_id),
+        )
+
+    def mark_superseded(self, row_id):
+        """Another node sent this slot: retire the row unless it is already under way"""
+        self._conn().execute(
+            "UPDATE outbox SET state = 'superseded', updated_at = ?"
+            " WHERE id = ? AND state IN ('pending', 'failed')",
+            (time.time(), row_id),
+        )
+
+    def requeue(self, row_id):
+        """Return one 'sending' row whose sender died to 'pending'; False if it was not sending"""
+        cursor = self._conn().execute(
+            "UPDATE outbox SET state = 'pending', updated_at = ? WHERE id = ? AND state = 'sending'",
+            (time.time(), row_id),
+        )
+        return cursor.rowcount == 1
+
+    def recover(self, stale_after=600):
+        """Return rows stuck in 'sending' for `stale_after` seconds to 'pending'"""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE outbox SET state = 'pending', updated_at = ?"
+            " WHERE state = 'sending' AND updated_at < ?",
+            (now, now - stale_after),
+        )
+        return cursor.rowcount
+
+    # Reading ----------------------------------------------------------------
+
+    def get(self, row_id):
+        row = self._conn().execute("SELECT * FROM outbox WHERE id = ?", (row_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_by_key(self, key):
+        row = self._conn().execute(
+            "SELECT * FROM outbox WHERE idempotency_key = ?", (key,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def exhausted(self, row):
+        """Whether `row` failed and has no attempts left"""
+        return bool(row) and row['state'] == 'failed' and row['attempts'] >= self.max_attempts
+
+    def deliverable(self, since_date=None, limit=100, exclude_slots=()):
+        """Pending rows, plus failed rows with attempts left, oldest first
+
+        Rows of `exclude_slots` (e.g. one-off sends nobody should retry)
+        are left out.
+        """
+        query = ("SELECT * FROM outbox WHERE (state = 'pending'"
+                 " OR (state = 'failed' AND attempts < ?))")
+        params = [self.max_attempts]
+        if since_date:
+            query += " AND slot_date >= ?"
+            params.append(since_date)
+        if exclude_slots:
+            query += f" AND slot NOT IN ({', '.join('?' * len(exclude_slots))})"
+            params.extend(exclude_slots)
+        query += " ORDER BY updated_at LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._conn().execute(query, params)]
+
+    def history(self, group_link=None, since=None, until=None, state=None, limit=100):
+        """Most recent rows first, optionally for one group and a created_at window"""
+        clauses, params = [], []
+        if group_link:
+            clauses.append("group_link = ?")
+            params.append(group_link)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if state:
+            clauses.append("state = ?")
+            params.append(state)
+        query = "SELECT * FROM outbox"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._conn().execute(query, params)]
+
+    def counts(self):
+        rows = self._conn().execute("SELECT state, COUNT(*) FROM outbox GROUP BY state")
+        return {state: count for state, count in rows}
+
+    # Import -----------------------------------------------------------------
+
+    def import_pywhatkit_log(self, path):
+        """Import PyWhatKit_DB.txt entries as sent rows; returns rows added
+
+        Each entry carries Date (dd/mm/yyyy), Time (HH:MM), Phone Number and
+        Message fields, separated by a line of dashes. Re-importing is a
+        no-op thanks to the idempotency key.
+        """
+        rows = []
+        for entry in parse_pywhatkit_log(path):
+            sent_at = entry['sent_at'].timestamp()
+            digest = hashlib.sha1(entry['message'].encode('utf-8')).hexdigest()[:12]
+            key = f"pywhatkit|{entry['phone']}|{entry['sent_at']:%Y-%m-%d %H:%M}|{digest}"
+            rows.append((key, f"phone:{entry['phone']}", 'imported',
+                         entry['sent_at'].date().isoformat(), entry['message'],
+                         'sent', sent_at, sent_at))
+        return self.enqueue_many(rows) if rows else 0
+
+
+_FIELD = re.compile(r"^(Date|Time|Phone Number|Message):\s?(.*)$")
+
+
+def parse_pywhatkit_log(path):
+    """Yield {'sent_at', 'phone', 'message'} for each complete log entry"""
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8', errors='replace')
+
+    for block in re.split(r"^-{10,}\s*$", text, flags=re.MULTILINE):
+        fields, current = {}, None
+        for line in block.splitlines():
+            match = _FIELD.match(line.strip())
+            if match:
+                current = match.group(1)
+                fields[current] = match.group(2).strip()
+            elif current == 'Message' and line.strip():
+                fields['Message'] += '\n' + line.strip()
+        if not {'Date', 'Time', 'Message'} <= fields.keys():
+            continue
+        try:
+            sent_at = datetime.strptime(f"{fields['Date']} {fields['Time']}", "%d/%m/%Y %H:%M")
+        except ValueError:
+            continue
+        yield {
+            'sent_at': sent_at,
+            'phone': fields.get('Phone Number', ''),
+            'message': fields['Message'],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WhatsApp bot outbox tools")
+    parser.add_argument('--db', default='outbox.db', help="outbox database path")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_cmd = commands.add_parser('import', help="import a PyWhatKit_DB.txt log")
+    import_cmd.add_argument('log', nargs='?', default='PyWhatKit_DB.txt')
+    commands.add_parser('stats', help="row counts by state")
+    args = parser.parse_args()
+
+    outbox = Outbox(args.db)
+    if args.command == 'import':
+        added = outbox.import_pywhatkit_log(args.log)
+        print(f"✅ Imported {added} message(s) from {args.log}")
+    else:
+        print(outbox.counts())
+
+
+if __name__ == '__main__':
+    main()
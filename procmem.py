@@ -0,0 +1,76 @@
+"""Resident memory of a process and all of its descendants
+
+Chrome runs as a tree (browser, GPU, renderer and utility processes under
+chromedriver), so its footprint is the sum over the tree. psutil is used
+when installed; otherwise /proc is read directly (Linux only). Anything
+else reports None rather than a guess.
+"""
+
+import os
+
+try:
+    import psutil
+except ImportError:  # optional
+    psutil = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _proc_children():
+    """pid -> list of child pids, from /proc/<pid>/stat"""
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces
+        ppid = int(stat[stat.rindex(b')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def tree_pids(pid):
+    """`pid` and every process below it, or [] if it is gone or unknown"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return [pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir('/proc') or not os.path.exists(f'/proc/{pid}'):
+        return []
+    children = _proc_children()
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, ()))
+    return pids
+
+
+def tree_rss(pid):
+    """Total resident bytes of `pid` and its descendants, or None if unknown"""
+    pids = tree_pids(pid)
+    if not pids:
+        return None
+    if psutil is not None:
+        total = 0
+        for member in pids:
+            try:
+                total += psutil.Process(member).memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    return sum(_proc_rss(member) for member in pids)
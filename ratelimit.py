@@ -0,0 +1,175 @@
+"""Token-bucket rate limiter shared by threads and processes through SQLite
+
+Each bucket (e.g. requests and tokens per minute) refills continuously at
+capacity / period. A caller takes a FIFO ticket and waits until it is at
+the head of the queue and every bucket holds its cost, so concurrent
+callers in any process are served in arrival order instead of racing into
+429s. Costs are estimates; ``settle`` corrects a bucket once the real cost
+(e.g. the tokens the API reported) is known.
+
+    limiter = RateLimiter('ratelimit.db', {'requests': (30, 60), 'tokens': (6000, 60)})
+    grant = limiter.acquire(requests=1, tokens=700)
+    ...
+    limiter.settle(grant, tokens=actual_tokens)
+"""
+
+import os
+import time
+
+from sqlitestore import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    capacity REAL NOT NULL,
+    period REAL NOT NULL,
+    level REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    created REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class RateLimitTimeout(Exception):
+    """The deadline passed while waiting for capacity"""
+
+
+class Grant:
+    """Costs taken from the buckets by one ``acquire``"""
+
+    __slots__ = ('costs', 'waited')
+
+    def __init__(self, costs, waited):
+        self.costs = costs
+        self.waited = waited
+
+
+class RateLimiter(SQLiteStore):
+    """FIFO token buckets stored in SQLite; safe to share between threads
+
+    `limits` maps bucket name -> (capacity, period in seconds); a capacity
+    of 0 or None leaves that bucket unlimited. Waiting tickets whose owner
+    stopped heartbeating for `stale_after` seconds (a crashed process) are
+    dropped so they cannot block the queue.
+    """
+
+    schema = SCHEMA
+    POLL = 0.05  # how often a ticket behind the head re-checks the queue
+    MAX_SLEEP = 1.0
+
+    def __init__(self, path='ratelimit.db', limits=None, stale_after=30):
+        super().__init__(path)
+        self.limits = {}
+        self.stale_after = stale_after
+        self.configure(limits or {})
+
+    def configure(self, limits):
+        """Set bucket capacities; existing levels are kept (capped to the new capacity)"""
+        self.limits = {name: (float(capacity), float(period))
+                       for name, (capacity, period) in limits.items() if capacity}
+
+    def _levels(self, conn, now):
+        """Refill every configured bucket to `now`; returns {name: (level, blocked_until)}"""
+        rows = {name: (capacity, period, level, updated, blocked)
+                for name, capacity, period, level, updated, blocked
+                in conn.execute("SELECT * FROM buckets")}
+        levels = {}
+        for name, (capacity, period) in self.limits.items():
+            if name in rows:
+                _, _, level, updated, blocked = rows[name]
+                level = min(capacity, level + max(now - updated, 0) * capacity / period)
+            else:
+                level, blocked = capacity, 0.0
+            conn.execute(
+                "INSERT INTO buckets (name, capacity, period, level, updated, blocked_until)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET"
+                " capacity = excluded.capacity, period = excluded.period,"
+                " level = excluded.level, updated = excluded.updated",
+                (name, capacity, period, level, now, blocked),
+            )
+            levels[name] = (level, blocked)
+        return levels
+
+    def acquire(self, deadline=None, **costs):
+        """Wait for our turn and take `costs` (e.g. requests=1, tokens=700)
+
+        `deadline` is a ``time.monotonic()`` value; RateLimitTimeout is
+        raised (and the ticket withdrawn) if capacity is not free by then.
+        A cost larger than a bucket's capacity is capped to it.
+        """
+        costs = {name: min(float(cost), self.limits[name][0])
+                 for name, cost in costs.items() if name in self.limits}
+        if not costs:
+            return Grant({}, 0.0)
+        started = time.monotonic()
+        now = time.time()
+        ticket = self._write(lambda c: c.execute(
+            "INSERT INTO tickets (pid, created, heartbeat) VALUES (?, ?, ?)",
+            (os.getpid(), now, now)).lastrowid)
+
+        def attempt(c):
+            now = time.time()
+            c.execute("UPDATE tickets SET heartbeat = ? WHERE id = ?", (now, ticket))
+            c.execute("DELETE FROM tickets WHERE heartbeat < ?", (now - self.stale_after,))
+            head = c.execute("SELECT MIN(id) FROM tickets").fetchone()[0]
+            if head != ticket:
+                return self.POLL
+            wait = 0.0
+            for name, (level, blocked) in self._levels(c, now).items():
+                if blocked > now:
+                    wait = max(wait, blocked - now)
+                cost = costs.get(name)
+                if cost and level < cost:
+                    capacity, period = self.limits[name]
+                    wait = max(wait, (cost - level) * period / capacity)
+            if wait > 0:
+                return wait
+            for name, cost in costs.items():
+                c.execute("UPDATE buckets SET level = level - ? WHERE name = ?", (cost, name))
+            c.execute("DELETE FROM tickets WHERE id = ?", (ticket,))
+            return 0.0
+
+        try:
+            while True:
+                wait = self._write(attempt)
+                if wait == 0.0:
+                    return Grant(costs, time.monotonic() - started)
+                if deadline is not None and time.monotonic() + min(wait, self.POLL) >= deadline:
+                    raise RateLimitTimeout(f"No rate-limit capacity within the deadline ({costs})")
+                time.sleep(min(wait, self.MAX_SLEEP))
+        except BaseException:
+            self._write(lambda c: c.execute("DELETE FROM tickets WHERE id = ?", (ticket,)))
+            raise
+
+    def settle(self, grant, **actual):
+        """Replace a grant's estimated costs with the actual ones
+
+        Refunds an over-estimate; an under-estimate is taken now, which may
+        leave the bucket in debt (it refills from below zero).
+        """
+        changes = {name: grant.costs[name] - float(cost)
+                   for name, cost in actual.items() if name in grant.costs}
+        if not any(changes.values()):
+            return
+
+        def apply(c):
+            self._levels(c, time.time())
+            for name, change in changes.items():
+                capacity = self.limits[name][0]
+                c.execute("UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?",
+                          (capacity, change, name))
+        self._write(apply)
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds`, e.g. after a 429 with Retry-After"""
+        def apply(c):
+            now = time.time()
+            self._levels(c, now)
+            c.execute("UPDATE buckets SET blocked_until = MAX(blocked_until, ?)", (now + seconds,))
+        self._write(apply)
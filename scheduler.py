@@ -0,0 +1,201 @@
+"""Event-driven daily scheduler for the WhatsApp bot
+
+One owned thread sleeps on a condition variable until the earliest entry
+of a heap of due times, so jobs fire on time instead of on the next poll.
+Times are wall-clock "HH:MM" (or "HH:MM:SS") in a pytz timezone.
+"""
+
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta
+from threading import Thread, Condition, current_thread
+
+import pytz
+
+
+def parse_slot_time(at):
+    """'HH:MM' or 'HH:MM:SS' -> (hour, minute, second)"""
+    parts = [int(p) for p in at.split(':')]
+    if len(parts) == 2:
+        parts.append(0)
+    hour, minute, second = parts
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError(f"Invalid slot time: {at!r}")
+    return hour, minute, second
+
+
+def local_fire_time(tz, day, at):
+    """Aware datetime for `at` on local date `day`, resolving DST edges
+
+    A time skipped by spring-forward fires once, shifted by the gap (02:30
+    becomes 03:30). A time repeated by fall-back fires once, on its first
+    occurrence.
+    """
+    hour, minute, second = parse_slot_time(at)
+    naive = datetime(day.year, day.month, day.day, hour, minute, second)
+    try:
+        return tz.localize(naive, is_dst=None)
+    except pytz.NonExistentTimeError:
+        return tz.normalize(tz.localize(naive, is_dst=False))
+    except pytz.AmbiguousTimeError:
+        return tz.localize(naive, is_dst=True)
+
+
+def next_fire_time(tz, at, after):
+    """First firing of daily time `at` strictly after aware datetime `after`"""
+    day = after.astimezone(tz).date() - timedelta(days=1)
+    while True:
+        fire_at = local_fire_time(tz, day, at)
+        if fire_at > after:
+            return fire_at
+        day += timedelta(days=1)
+
+
+class SystemClock:
+    """Wall clock; `wait` blocks on the scheduler's condition"""
+
+    def time(self):
+        return time.time()
+
+    def wait(self, condition, timeout):
+        condition.wait(timeout)
+
+
+class SlotScheduler:
+    """Run named daily jobs at local wall-clock times
+
+    Missed firings (process suspended, a long job, clock jump) still run if
+    they are at most `grace_seconds` late; older ones are skipped, and a
+    backlog of misses only ever fires once. `on_fire(name, lateness,
+    skipped)` is told about every due firing, e.g. to record drift.
+    """
+
+    # Re-check the wall clock at least this often: waits run on the monotonic
+    # clock, which stops during suspend and ignores wall-clock changes, so
+    # cap them to stay within the default grace period
+    MAX_SLEEP = 300
+
+    def __init__(self, timezone='Asia/Kolkata', clock=None, grace_seconds=300, on_fire=None):
+        self.tz = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+        self.clock = clock or SystemClock()
+        self.grace_seconds = grace_seconds
+        self.on_fire = on_fire
+        self.wakeups = 0
+        self._jobs = {}  # name -> (at, callback)
+        self._heap = []  # (timestamp, seq, name)
+        self._seq = itertools.count()
+        self._cond = Condition()
+        self._running = False
+        self._thread = None
+
+    # Configuration ----------------------------------------------------------
+
+    def set_jobs(self, jobs, timezone=None):
+        """Replace all jobs with `jobs` ({name: (at, callback)}) atomically
+
+        A `timezone` given here is switched in the same step.
+        """
+        for at, _ in jobs.values():
+            parse_slot_time(at)
+        tz = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+        with self._cond:
+            self._jobs = dict(jobs)
+            if tz is not None:
+                self.tz = tz
+            self._rebuild()
+            self._cond.notify_all()
+
+    def clear(self):
+        self.set_jobs({})
+
+    def set_timezone(self, timezone):
+        with self._cond:
+            self.tz = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+            self._rebuild()
+            self._cond.notify_all()
+
+    def _now(self):
+        return datetime.fromtimestamp(self.clock.time(), pytz.utc)
+
+    def _rebuild(self):
+        now = self._now()
+        self._heap = [
+            (next_fire_time(self.tz, at, now).timestamp(), next(self._seq), name)
+            for name, (at, _) in self._jobs.items()
+        ]
+        heapq.heapify(self._heap)
+
+    # Running ----------------------------------------------------------------
+
+    def step(self):
+        """Sleep until the next due entry (or a wake-up) and run what is due
+
+        Returns the names of the jobs that ran.
+        """
+        due, skipped = [], []
+        with self._cond:
+            if not self._running:
+                return due
+            now = self.clock.time()
+            if not self._heap or self._heap[0][0] > now:
+                timeout = self.MAX_SLEEP
+                if self._heap:
+                    timeout = min(self._heap[0][0] - now, self.MAX_SLEEP)
+                self.clock.wait(self._cond, timeout)
+                self.wakeups += 1
+                now = self.clock.time()
+
+            while self._running and self._heap and self._heap[0][0] <= now:
+                when, _, name = heapq.heappop(self._heap)
+                at, callback = self._jobs[name]
+                scheduled = datetime.fromtimestamp(when, pytz.utc)
+                following = next_fire_time(self.tz, at, scheduled).timestamp()
+                heapq.heappush(self._heap, (following, next(self._seq), name))
+                # Coalesce a backlog: a firing whose successor is also past is superseded
+                if following <= now:
+                    continue
+                lateness = now - when
+                if lateness > self.grace_seconds:
+                    print(f"⚠️ Skipping missed run of {name} ({lateness:.0f}s late)")
+                    skipped.append((name, lateness))
+                    continue
+                due.append((name, callback, when))
+
+        if self.on_fire:
+            for name, lateness in skipped:
+                self.on_fire(name, lateness, True)
+        ran = []
+        for name, callback, when in due:
+            if self.on_fire:
+                # Drift is measured when the callback starts, after earlier ones ran
+                self.on_fire(name, self.clock.time() - when, False)
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Error running scheduled job {name}: {e}")
+            ran.append(name)
+        return ran
+
+    def _run(self):
+        while self._running:
+            self.step()
+
+    def start(self):
+        """Start the scheduler thread; a no-op if it is already running"""
+        with self._cond:
+            self._running = True
+            self._rebuild()
+            self._cond.notify_all()
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = Thread(target=self._run, name='slot-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        thread = self._thread
+        if thread and thread is not current_thread():
+            thread.join(timeout)
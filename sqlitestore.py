@@ -0,0 +1,64 @@
+"""Base for the stores kept in SQLite (outbox, leases, duplicates, rate limits)
+
+The database is opened lazily, one connection per thread, in WAL mode so
+readers never block a writer, and the store's schema is created by the
+first connection. Connections run in autocommit mode; ``_write`` wraps a
+read-modify-write in one ``BEGIN IMMEDIATE`` transaction, so it holds the
+write lock from its first read and concurrent writers (threads or
+processes) queue for up to `timeout` seconds instead of failing.
+"""
+
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Thread-local connections to the SQLite file at `path`
+
+    Subclasses set `schema` (run once, so use CREATE ... IF NOT EXISTS) and
+    may set `row_factory`, e.g. ``sqlite3.Row``.
+    """
+
+    schema = ''
+    row_factory = None
+    timeout = 30
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialised:
+                    conn.executescript(self.schema)
+                    self._initialised = True
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection; the next call opens a new one"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _write(self, fn):
+        """Run fn(conn) in one write transaction and return its result"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
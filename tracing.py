@@ -0,0 +1,258 @@
+"""Lightweight tracing: nested timing spans exported as JSONL
+
+    with tracing.span('navigate', group=link):
+        ...
+
+A span opened inside another becomes its child (tracked per thread and
+per context, so work handed to another thread with ``copy_context`` stays
+in the same trace). Finished spans are written one JSON object per line to
+a size-rotated file once ``configure`` has been called; until then they
+are timed and dropped.
+
+    python tracing.py traces.jsonl --top 5
+"""
+
+import argparse
+import contextvars
+import functools
+import glob
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+_current = contextvars.ContextVar('tracing_span', default=None)
+_logger = logging.getLogger('whatsapp_bot.trace')
+_logger.propagate = False
+_logger.setLevel(logging.INFO)
+_handler = None
+_lock = threading.Lock()
+
+
+def configure(path='traces.jsonl', max_bytes=5 * 1024 * 1024, backups=3):
+    """Export finished spans to `path`, rotating at `max_bytes`; None disables"""
+    global _handler
+    with _lock:
+        if _handler is not None:
+            if path and _handler.baseFilename == os.path.abspath(path) \
+                    and _handler.maxBytes == max_bytes and _handler.backupCount == backups:
+                return
+            _logger.removeHandler(_handler)
+            _handler.close()
+            _handler = None
+        if path:
+            _handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                           encoding='utf-8', delay=True)
+            _handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger.addHandler(_handler)
+
+
+def _new_id():
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'duration',
+                 'attrs', 'error', '_t0')
+
+    def __init__(self, name, parent, attrs):
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+        self.duration = None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs):
+        """Add attributes to the span while it runs"""
+        self.attrs.update(attrs)
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attrs': self.attrs,
+            'error': self.error,
+            'thread': threading.current_thread().name,
+        }
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the ``with`` block as a child of the current span"""
+    current = Span(name, _current.get(), attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._t0
+        _current.reset(token)
+        if _handler is not None:
+            _logger.info(json.dumps(current.as_dict(), ensure_ascii=False, default=str))
+
+
+def traced(name=None):
+    """Decorator: run the function inside a span named after it"""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    return _current.get()
+
+
+# Reporting ------------------------------------------------------------------
+
+def read_spans(path):
+    """Spans from `path` and its rotated backups (path.1, path.2, ...)"""
+    paths = sorted(glob.glob(glob.escape(path) + '.[0-9]*'),
+                   key=lambda p: int(p.rsplit('.', 1)[1]), reverse=True)
+    spans = []
+    for name in paths + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # a line cut short by a crash
+    return spans
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def step_summary(spans):
+    """{span name: count, p50/p95/p99/max in ms, errors}, slowest p95 first"""
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s['name'], []).append(s)
+    summary = {}
+    for name, group in by_name.items():
+        durations = sorted(s['duration_ms'] for s in group)
+        summary[name] = {
+            'count': len(durations),
+            'p50_ms': percentile(durations, 50),
+            'p95_ms': percentile(durations, 95),
+            'p99_ms': percentile(durations, 99),
+            'max_ms': durations[-1],
+            'errors': sum(1 for s in group if s.get('error')),
+        }
+    return dict(sorted(summary.items(), key=lambda item: item[1]['p95_ms'], reverse=True))
+
+
+def slowest_traces(spans, top=5, root=None):
+    """The `top` longest traces as (duration ms, spans in start order)
+
+    With `root`, only traces containing a span of that name count, timed by
+    that span; otherwise a trace lasts from its first start to its last end.
+    """
+    traces = {}
+    for s in spans:
+        traces.setdefault(s['trace_id'], []).append(s)
+    ranked = []
+    for trace in traces.values():
+        trace.sort(key=lambda s: s['start'])
+        if root:
+            matches = [s['duration_ms'] for s in trace if s['name'] == root]
+            if not matches:
+                continue
+            duration = max(matches)
+        else:
+            end = max(s['start'] + s['duration_ms'] / 1000 for s in trace)
+            duration = (end - trace[0]['start']) * 1000
+        ranked.append((round(duration, 3), trace))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked[:top]
+
+
+def format_trace(trace):
+    """Indented span tree, offsets relative to the trace start"""
+    children = {}
+    ids = {s['span_id'] for s in trace}
+    for s in trace:
+        parent = s['parent_id'] if s['parent_id'] in ids else None
+        children.setdefault(parent, []).append(s)
+    origin = trace[0]['start']
+    lines = []
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            offset = (s['start'] - origin) * 1000
+            attrs = ' '.join(f"{k}={v}" for k, v in (s.get('attrs') or {}).items())
+            error = f"  ❌ {s['error']}" if s.get('error') else ''
+            lines.append(f"{'  ' * depth}{s['name']:<{40 - 2 * depth}} "
+                         f"+{offset:9.1f}ms {s['duration_ms']:10.1f}ms  {attrs}{error}".rstrip())
+            walk(s['span_id'], depth + 1)
+
+    walk(None, 0)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-step timing summary of traced sends")
+    parser.add_argument('path', nargs='?', default='traces.jsonl', help="trace file (backups are read too)")
+    parser.add_argument('--top', type=int, default=5, help="slowest traces to show")
+    parser.add_argument('--root', help="rank traces by this span, e.g. send_to_whatsapp_group")
+    parser.add_argument('--since', type=float, default=None, help="only the last N hours")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    spans = read_spans(args.path)
+    if args.since is not None:
+        cutoff = time.time() - args.since * 3600
+        spans = [s for s in spans if s['start'] >= cutoff]
+    if not spans:
+        print(f"No spans in {args.path}")
+        return
+
+    summary = step_summary(spans)
+    slowest = slowest_traces(spans, args.top, args.root)
+    if args.json:
+        print(json.dumps({
+            'steps': summary,
+            'slowest': [{'duration_ms': d, 'spans': t} for d, t in slowest],
+        }, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{'step':<40} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10} {'errors':>7}")
+    for name, row in summary.items():
+        print(f"{name:<40} {row['count']:>7} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} "
+              f"{row['p99_ms']:>10.1f} {row['max_ms']:>10.1f} {row['errors']:>7}")
+    print()
+    for duration, trace in slowest:
+        print(f"🐢 Trace {trace[0]['trace_id']}: {duration:.1f} ms")
+        print(format_trace(trace))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,38 @@
+import asyncio
+import importlib.util
 import os
+import random
 import requests
 import json
-import schedule
 import time
-from datetime import datetime
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for
-from threading import Thread
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import contextvars
+import copy
+from collections import deque, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, render_template_string, request, jsonify, redirect, url_for, stream_with_context
+from threading import Thread, Lock, Event, Condition
+import pytz
 import webbrowser
+# Selenium is imported where the browser is driven, so the web UI starts
+# without paying for it; webdriver_manager only loads on a driver cache miss
+
+import configfile
+from dedup import DuplicateIndex
+from driver_cache import DriverCache
+from fallback import FallbackCorpus
+from jobs import JobManager, sse_events
+from leases import LeaseStore
+from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, counter, gauge, histogram
+from outbox import FINAL_STATES, Outbox, idempotency_key
+from procmem import tree_rss
+from ratelimit import RateLimiter
+from scheduler import SlotScheduler, next_fire_time, parse_slot_time
+import tracing
+from tracing import traced
 
 app = Flask(__name__)
 
@@ -23,21 +41,636 @@ config = {
     'api_key': '',
     'whatsapp_group_link': '',
     'is_running': False,
-    'driver': None
+    # More target groups, each {'name', 'whatsapp_group_link', 'schedule_times'}
+    # as in config_template.json; whatsapp_group_link above is group "default"
+    'groups': [],
+    # Default daily schedule: slot -> HH:MM, and slot -> label for the LLM
+    'schedule_times': {
+        "morning": "11:30",
+        "afternoon": "16:30",
+        "night": "21:30"
+    },
+    'message_templates': {
+        "morning": "11:30 AM – Pre-Lunch Hunger",
+        "afternoon": "4:30 PM – Evening Snack Time",
+        "night": "9:30 PM – Late Night Cravings"
+    },
+    'driver_pool_size': 1,  # browser sessions sending in parallel
+    'outbox_path': 'outbox.db',  # SQLite outbox and send history
+    # Several instances sharing `lease_path` (e.g. on shared disk) send each
+    # (group, slot, day) once: the node holding its lease sends. A lease lapses
+    # `lease_ttl` seconds after its holder stops renewing it, and every node
+    # looks for lapsed ones each `lease_takeover_interval` seconds, so a dead
+    # node's slot is picked up within about ttl + interval.
+    'node_id': None,  # default hostname:pid
+    'lease_path': 'leases.db',
+    'lease_ttl': 60,
+    'lease_takeover_interval': 15,
+    # Reject generated messages this similar (estimated Jaccard) to a past one
+    'dedup_path': 'dedup.db',
+    'dedup_threshold': 0.6,
+    'last_send_timings': {},
+    'insert_mode': 'paste',  # 'paste' (one script call) or 'type' (send_keys per line)
+    # 'ui' drives the page step by step; 'script' sends with one call into an
+    # injected in-page hook, which also returns the server acknowledgement,
+    # and falls back to 'ui' if the hook cannot find the chat or composer
+    'send_backend': 'ui',
+    'script_send_timeout': 20,  # seconds the hook may wait for the chat to open
+    # Session watchdog: probe idle browser sessions every `watchdog_interval`
+    # seconds and restart dead ones; a logged-out page is given
+    # `watchdog_failures` probes to come back first. With `watchdog_standby`
+    # a spare session (its own linked device, one QR scan) is kept warm to
+    # take over at once.
+    'watchdog_interval': 60,
+    'watchdog_failures': 2,
+    'watchdog_standby': False,
+    'standby_profile_dir': './whatsapp_session_standby',
+    # Browser footprint. 'lean' runs Chrome headless with images, media and
+    # caches cut down; log in once in 'windowed' mode first, as there is no
+    # window to scan the QR code in. The watchdog recycles the WhatsApp tab
+    # once the browser passes `browser_rss_limit_mb`, restarts Chrome if that
+    # is not enough or after `browser_max_age_hours` (0 disables either), and
+    # only with no slot due within `recycle_quiet_minutes`.
+    'browser_mode': 'windowed',
+    'browser_rss_limit_mb': 1500,
+    'browser_max_age_hours': 24,
+    'recycle_quiet_minutes': 10,
+    'timezone': 'Asia/Kolkata',
+    # Groq transport settings
+    'groq_base_url': 'https://api.groq.com/openai/v1',
+    'groq_connect_timeout': 5,
+    'groq_read_timeout': 30,
+    'groq_max_retries': 3,
+    'groq_rpm': 30,  # free-tier requests/minute; 0 disables the limiter
+    'groq_tpm': 6000,  # free-tier tokens/minute; 0 disables the limiter
+    'groq_concurrency': 10,  # requests in flight when generating many at once (needs aiohttp)
+    'ratelimit_path': 'ratelimit.db',  # shared by every process using the key
+    'stream_update_interval': 0.1,  # seconds between streamed draft updates on a job
+    'chromedriver_cache_path': 'chromedriver_cache.json',  # resolved driver, per Chrome version
+    # Message pre-generation: keep `pregen_depth` ready messages for every
+    # slot due within `pregen_lead_hours`
+    'pregen_depth': 2,
+    'pregen_lead_hours': 24,
+    'pregen_max_age_hours': 36,
+    'pregen_refill_seconds': 60,
+    # >0: refill the buffer for this many days ahead with one batched call
+    'pregen_batch_days': 0,
+    'trace_path': 'traces.jsonl',  # per-step spans; None disables
+    'trace_max_bytes': 5 * 1024 * 1024,
+    'trace_backups': 3,
+    'generation_deadline': 20,  # seconds an inline slot generation may take
+    'hedge_percentile': 95,  # hedge calls slower than this share of recent ones
+    'hedge_min_delay': 1.0,
+    'hedge_default_delay': 3.0,  # until enough calls have been timed
+    'hedge_max_requests': 2,  # 1 disables hedging
+    'fallback_path': 'fallback_messages.json',
+    'fallback_state_path': 'fallback_state.json',
+    'config_reload_interval': 2  # seconds between checks of the config file
 }
 
-class GroqAPI:
-    """Python wrapper for Groq API (FREE & FAST)"""
+DEFAULT_CONFIG = copy.deepcopy(config)
+
+# Settings can also come from this JSON file, shaped like
+# config_template.json; it is read at start-up and re-applied on change.
+# A setting removed from the file goes back to its default.
+CONFIG_PATH = os.environ.get('WHATSAPP_BOT_CONFIG', 'config.json')
+# Runtime state, never taken from the file
+RUNTIME_KEYS = ('is_running', 'last_send_timings')
+# Read once at start-up; changing these in the file needs a restart
+RESTART_KEYS = (
+    'outbox_path', 'dedup_path', 'ratelimit_path', 'lease_path', 'node_id',
+    'chromedriver_cache_path', 'fallback_path', 'fallback_state_path',
+    'trace_path', 'trace_max_bytes', 'trace_backups', 'config_reload_interval',
+)
+# Counts, which must be whole numbers; other numeric settings may be fractional
+INTEGER_KEYS = (
+    'driver_pool_size', 'watchdog_failures', 'groq_max_retries', 'groq_concurrency',
+    'pregen_depth', 'pregen_batch_days', 'trace_max_bytes', 'trace_backups', 'hedge_max_requests',
+)
+
+
+def _setting_type_ok(default, value):
+    if default is None or value is None:
+        return True
+    if isinstance(default, bool) or isinstance(value, bool):
+        return isinstance(default, bool) and isinstance(value, bool)
+    if isinstance(default, (int, float)):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+
+def validated_config(values):
+    """Known settings from `values`, checked against ``config``
+
+    Raises ValueError for a setting of the wrong type (groups entries
+    included), an unknown timezone, a bad schedule time, or a scheduled
+    slot without a message template.
+    Unknown keys are reported and ignored.
+    """
+    settings = {}
+    for key, value in values.items():
+        if key in RUNTIME_KEYS:
+            continue
+        if key not in config:
+            print(f"⚠️ Unknown setting {key!r} in {CONFIG_PATH}, ignored")
+            continue
+        if not _setting_type_ok(config[key], value):
+            raise ValueError(f"{key} must be {type(config[key]).__name__}, not {type(value).__name__}")
+        if key in INTEGER_KEYS and not isinstance(value, int):
+            raise ValueError(f"{key} must be a whole number, not {value!r}")
+        settings[key] = value
     
-    def __init__(self, api_key):
+    merged = {**config, **settings}
+    try:
+        pytz.timezone(merged['timezone'])
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"unknown timezone {merged['timezone']!r}") from None
+    for slot, label in merged['message_templates'].items():
+        if not isinstance(label, str):
+            raise ValueError(f"message_templates[{slot!r}] must be a string")
+    schedules = [('default', merged['schedule_times'])]
+    for i, group in enumerate(merged['groups']):
+        if not isinstance(group, dict) or not isinstance(group.get('whatsapp_group_link'), str):
+            raise ValueError(f"groups[{i}] needs a whatsapp_group_link")
+        if not isinstance(group.get('name') or '', str):
+            raise ValueError(f"groups[{i}].name must be a string")
+        if not isinstance(group.get('schedule_times') or {}, dict):
+            raise ValueError(f"groups[{i}].schedule_times must be an object of slot -> HH:MM")
+        schedules.append((group.get('name') or f"group-{i}", group.get('schedule_times') or {}))
+    for name, schedule in schedules:
+        for slot, at in schedule.items():
+            try:
+                parse_slot_time(at)
+            except (TypeError, ValueError, AttributeError):
+                raise ValueError(f"{name}: bad time {at!r} for slot {slot!r}") from None
+            if slot not in merged['message_templates']:
+                raise ValueError(f"{name}: slot {slot!r} has no message_templates entry")
+    return settings
+
+
+_file_keys = set()  # settings the config file set last time
+
+
+def file_settings(values):
+    """`values` plus defaults for the settings the file no longer sets"""
+    dropped = _file_keys - values.keys() - set(RESTART_KEYS)
+    return {**{key: copy.deepcopy(DEFAULT_CONFIG[key]) for key in dropped}, **values}
+
+
+def load_config_file(path=CONFIG_PATH):
+    """Read the config file into ``config`` at start-up; a bad file is reported and skipped"""
+    try:
+        settings = validated_config(configfile.load(path))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring {path}: {e}")
+        return
+    config.update(settings)
+    _file_keys.update(settings)
+
+
+load_config_file()
+
+# WhatsApp Web elements
+XPATH_SEARCH_BOX = '//div[@contenteditable="true"][@data-tab="3"]'
+XPATH_COMPOSER = '//div[@contenteditable="true"][@data-tab="10"]'
+XPATH_JOIN_BUTTON = '//div[contains(text(), "Join group")]'
+XPATH_CHAT_TITLE = '//div[@id="main"]//header//span[@dir="auto"]'
+XPATH_SEND_BUTTON = '//div[@id="main"]//span[@data-icon="send"]'
+XPATH_OUTGOING_MESSAGE = '//div[@id="main"]//div[starts-with(@data-id, "true_")]'
+WHATSAPP_URL = "https://web.whatsapp.com"
+
+# Poll interval (s) for explicit waits; Selenium's default is 0.5
+WAIT_POLL = 0.1
+
+# Puts the whole message in the composer in one call: a synthetic paste
+# (handled by WhatsApp's editor), falling back to execCommand for plain
+# contenteditables. Returns the composer text so the caller can verify it.
+INSERT_TEXT_JS = """
+const box = arguments[0], text = arguments[1];
+box.focus();
+const before = box.innerText;
+const data = new DataTransfer();
+data.setData('text/plain', text);
+box.dispatchEvent(new ClipboardEvent('paste', {
+    clipboardData: data, bubbles: true, cancelable: true
+}));
+if (box.innerText.trim() === before.trim()) {
+    text.split('\\n').forEach((line, i) => {
+        if (i) document.execCommand('insertLineBreak');
+        document.execCommand('insertText', false, line);
+    });
+}
+return box.innerText;
+"""
+
+CLEAR_COMPOSER_JS = """
+const box = arguments[0];
+box.focus();
+document.execCommand('selectAll');
+document.execCommand('delete');
+"""
+
+# In-page send hook for send_backend 'script': window.__hungerBot.send()
+# opens the chat (clicking "Join group" if asked), fills the composer as
+# INSERT_TEXT_JS does, sends, and resolves once the composer is empty and
+# the new message's status icon has left the clock. The result's `stage`
+# says how far it got: 'chat', 'join' or 'compose' mean nothing was sent,
+# 'send' means the message may have gone out. Elements are looked up with
+# the XPATH_* constants passed in, so they stay defined in one place.
+SEND_HOOK_JS = """
+(() => {
+if (window.__hungerBot) return;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const find = (xpath) => document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const count = (xpath) => document.evaluate(
+    'count(' + xpath + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+const normalize = (text) => (text || '').split(/\\s+/).filter(Boolean).join(' ');
+const text = (node) => node ? normalize(node.innerText) : '';
+async function until(condition, ms) {
+    const end = Date.now() + ms;
+    for (;;) {
+        const value = condition();
+        if (value || Date.now() >= end) return value;
+        await sleep(50);
+    }
+}
+function clear(box) {
+    box.focus();
+    document.execCommand('selectAll');
+    document.execCommand('delete');
+}
+function insert(box, message) {
+    box.focus();
+    const data = new DataTransfer();
+    data.setData('text/plain', message);
+    box.dispatchEvent(new ClipboardEvent('paste', {
+        clipboardData: data, bubbles: true, cancelable: true
+    }));
+    if (!text(box)) {
+        message.split('\\n').forEach((line, i) => {
+            if (i) document.execCommand('insertLineBreak');
+            document.execCommand('insertText', false, line);
+        });
+    }
+}
+async function send(message, o) {
+    const end = Date.now() + o.timeout_ms;
+    const left = () => Math.max(end - Date.now(), 0);
+    let stage = 'chat', title = null;
+    try {
+        let box = await until(() => find(o.composer) || (o.join_button && find(o.join_button)), left());
+        if (!box) return {ok: false, stage};
+        if (box.getAttribute('contenteditable') !== 'true') {
+            stage = 'join';
+            box.click();
+            box = await until(() => find(o.composer), left());
+            if (!box) return {ok: false, stage};
+            stage = 'chat';
+        }
+        title = text(find(o.title));
+        if (o.expect_title && title !== normalize(o.expect_title)) return {ok: false, stage, title};
+        stage = 'compose';
+        if (text(box)) clear(box);
+        insert(box, message);
+        if (text(box) !== normalize(message)) {
+            clear(box);
+            return {ok: false, stage, title};
+        }
+        stage = 'send';
+        const before = count(o.outgoing);
+        const button = find(o.send_button);
+        if (button) {
+            button.click();
+        } else {
+            box.dispatchEvent(new KeyboardEvent('keydown', {
+                key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true, cancelable: true
+            }));
+        }
+        if (!await until(() => !text(box), Math.min(left(), 5000))) return {ok: false, stage, title};
+        // Sent; give the server a few seconds to acknowledge it
+        let icon = null;
+        await until(() => {
+            if (count(o.outgoing) <= before) return false;
+            const status = find('(' + o.outgoing + ')[last()]//span[@data-icon]');
+            icon = status && status.getAttribute('data-icon');
+            return icon && icon !== 'msg-time';
+        }, Math.min(left(), 5000));
+        return {ok: true, stage, title, url: location.href, ack: o.acks[icon] || icon};
+    } catch (e) {
+        return {ok: false, stage, title, error: String(e)};
+    }
+}
+window.__hungerBot = {send};
+})();
+"""
+
+# One send through the hook; arguments: message, options. Reports stage
+# 'install' if the page has no hook (it was reloaded without Chrome's
+# per-document injection).
+SCRIPT_SEND_JS = """
+const done = arguments[arguments.length - 1];
+if (!window.__hungerBot) {
+    done({ok: false, stage: 'install'});
+    return;
+}
+window.__hungerBot.send(arguments[0], arguments[1]).then(done,
+    (e) => done({ok: false, stage: 'chat', error: String(e)}));
+"""
+
+# After this many script sends in a row fell back, a session sticks to the
+# UI path until its browser restarts
+SCRIPT_SEND_STRIKES = 3
+
+# Status icon on an outgoing message -> acknowledgement level
+MESSAGE_ACKS = {'msg-time': 'pending', 'msg-check': 'server', 'msg-dblcheck': 'delivered',
+                'msg-dblcheck-ack': 'read'}
+
+# Metrics, served at /metrics
+GROQ_LATENCY = histogram('groq_request_seconds', "Groq chat completion time, retries included", ['outcome'])
+GROQ_TOKENS = histogram('groq_tokens', "Tokens per Groq chat completion", ['kind'],
+                        buckets=(50, 100, 200, 400, 800, 1600, 3200, 6400))
+GROQ_FAILURES = counter('groq_failures_total', "Failed Groq attempts by cause", ['cause'])
+DRIVER_INIT = histogram('whatsapp_driver_init_seconds', "Chrome start-up and WhatsApp Web load time",
+                        buckets=(1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120))
+SEND_STEP = histogram('whatsapp_send_step_seconds', "Time per step of a WhatsApp send", ['step'])
+SEND_TIME = histogram('whatsapp_send_seconds', "Total time of a WhatsApp send", ['outcome'])
+WHATSAPP_FAILURES = counter('whatsapp_failures_total', "Failed browser operations by stage and cause",
+                            ['stage', 'cause'])
+PASTE_FALLBACKS = counter('whatsapp_paste_fallbacks_total', "Sends that fell back to typing")
+SCRIPT_SENDS = counter('whatsapp_script_sends_total', "In-page script sends by outcome and ack",
+                       ['outcome', 'ack'])
+SCHEDULER_DRIFT = histogram('scheduler_fire_drift_seconds', "Delay from a slot's due time to its job starting",
+                            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 60, 300))
+SCHEDULER_MISSED = counter('scheduler_missed_runs_total', "Firings skipped for being too late", ['job'])
+MESSAGES_REJECTED = counter('messages_rejected_total', "Generated messages discarded", ['reason'])
+SLOT_MESSAGES = counter('slot_messages_total', "Slot messages by where they came from", ['source'])
+CONFIG_RELOADS = counter('config_reloads_total', "Config file changes by outcome", ['outcome'])
+SEND_LEASES = counter('send_leases_total', "Send lease outcomes on this node", ['outcome'])
+HEDGED_REQUESTS = counter('groq_hedged_requests_total', "Extra Groq requests sent by hedging")
+INLINE_GENERATION = histogram('inline_generation_seconds', "Deadline-bound generation time", ['source'])
+GROQ_FIRST_TOKEN = histogram('groq_first_token_seconds', "Time to the first streamed Groq token")
+RATE_LIMIT_WAIT = histogram('groq_rate_limit_wait_seconds', "Time queued for Groq rate-limit capacity")
+BUFFER_DEPTH = gauge('pregen_buffer_depth', "Pre-generated messages ready per slot", ['slot'])
+SEND_QUEUE = gauge('send_queue_depth', "Sends queued or in progress")
+BROWSER_RSS = gauge('whatsapp_browser_rss_bytes', "Resident memory of a session's browser processes",
+                    ['session'])
+BROWSER_RECYCLES = counter('whatsapp_browser_recycles_total', "Browsers recycled for memory or age", ['how'])
+SESSION_PROBES = counter('whatsapp_session_probes_total', "Watchdog probes of browser sessions", ['result'])
+SESSION_RECOVERY = histogram('whatsapp_session_recovery_seconds', "Time to replace a dead browser session",
+                             ['how'], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120))
+
+class _GroqBase:
+    """Settings, retry policy and usage accounting shared by the Groq clients"""
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, api_key, base_url="https://api.groq.com/openai/v1",
+                 connect_timeout=5, read_timeout=30, max_retries=3,
+                 backoff_base=0.5, backoff_max=20, retry_budget=60, limiter=None):
         self.api_key = api_key
-        self.base_url = "https://api.groq.com/openai/v1"
+        self.base_url = base_url.rstrip('/')
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Seconds one call may spend waiting between attempts, Retry-After included
+        self.retry_budget = retry_budget
+        # Optional shared RateLimiter with 'requests' and 'tokens' buckets
+        self.limiter = limiter
+        
+        # Running totals across calls, from the API's usage field
+        self.usage = {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = Lock()
+        # Recent successful call times, for picking a hedging delay
+        self.latencies = deque(maxlen=200)
+    
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before retry number ``attempt`` (0-based)
+        
+        A Retry-After header is honoured in full; ``backoff_max`` only caps
+        the jittered backoff used without one.
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    wait = (when - datetime.now(timezone.utc)).total_seconds()
+                    return max(wait, 0.0)
+                except (TypeError, ValueError):
+                    pass
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _can_retry(self, attempt, delay, deadline, waited):
+        """Whether to retry after `delay`, given `waited` seconds of earlier retry waits"""
+        if attempt >= self.max_retries or waited + delay > self.retry_budget:
+            return False
+        return deadline is None or time.monotonic() + delay < deadline
+    
+    @staticmethod
+    def estimate_tokens(payload):
+        """Rough token cost of a request: prompt characters / 4, plus max_tokens"""
+        prompt = sum(len(m.get('content') or '') for m in payload.get('messages', []))
+        return prompt // 4 + payload.get('max_tokens', 0)
+    
+    @staticmethod
+    def _payload(messages, max_tokens, temperature):
+        return {
+            "model": "llama-3.3-70b-versatile",
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+    
+    def _settle(self, grant, usage):
+        """Correct a grant's token estimate with the usage Groq reported"""
+        if grant and usage and 'total_tokens' in usage:
+            self.limiter.settle(grant, tokens=usage['total_tokens'])
+    
+    def _finish_chat(self, start, data, span):
+        """Time and usage bookkeeping for a successful chat call"""
+        elapsed = time.perf_counter() - start
+        GROQ_LATENCY.labels('ok').observe(elapsed)
+        self.latencies.append(elapsed)
+        usage = data.get('usage') or {}
+        span.set(prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'))
+        self._record_usage(usage)
+    
+    def _record_usage(self, usage):
+        GROQ_TOKENS.labels('prompt').observe(usage.get('prompt_tokens', 0))
+        GROQ_TOKENS.labels('completion').observe(usage.get('completion_tokens', 0))
+        with self._usage_lock:
+            self.usage['calls'] += 1
+            self.usage['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            self.usage['completion_tokens'] += usage.get('completion_tokens', 0)
+
+
+class GroqAPI(_GroqBase):
+    """Python wrapper for Groq API (FREE & FAST)
+
+    Each instance owns one pooled keep-alive ``requests.Session``, so reuse
+    it (see ``get_groq_client``) instead of building a new one per call.
+    """
+    
+    def __init__(self, api_key, pool_size=10, **options):
+        super().__init__(api_key, **options)
+        # Retries are handled in _send so Retry-After and jitter apply to all of them
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
-    def simple_chat(self, user_message, system_message=None):
+    def close(self):
+        self.session.close()
+    
+    def _acquire(self, payload, deadline):
+        """Queue for rate-limit capacity for one attempt; None without a limiter"""
+        if not self.limiter:
+            return None
+        with tracing.span('groq.rate_limit') as span:
+            grant = self.limiter.acquire(deadline=deadline, requests=1,
+                                         tokens=self.estimate_tokens(payload))
+            span.set(waited=round(grant.waited, 3))
+        RATE_LIMIT_WAIT.observe(grant.waited)
+        return grant
+    
+    def _send(self, path, payload, deadline=None, stream=False):
+        """POST JSON with retries on connection errors, timeouts, 429 and 5xx
+        
+        With a ``deadline`` (``time.monotonic()`` value), timeouts shrink to
+        the time left and no retry starts that could not finish before it.
+        A retry is also given up when its wait (Retry-After, in full, or
+        backoff) would take the call past ``retry_budget``. Every attempt first waits its turn at the rate limiter, if any.
+        Returns the successful response and its rate-limit grant; with
+        ``stream`` the body is left unread.
+        """
+        url = f"{self.base_url}{path}"
+        waited = 0.0
+        
+        for attempt in range(self.max_retries + 1):
+            timeout = self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise requests.Timeout("Groq request deadline exceeded")
+                timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+            grant = self._acquire(payload, deadline)
+            try:
+                with tracing.span('groq.attempt', attempt=attempt) as span:
+                    response = self.session.post(url, json=payload, timeout=timeout, stream=stream)
+                    span.set(status=response.status_code)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                GROQ_FAILURES.labels(e.__class__.__name__).inc()
+                delay = self._retry_delay(attempt)
+                if not self._can_retry(attempt, delay, deadline, waited):
+                    raise
+                print(f"⚠️ Groq request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                waited += delay
+                continue
+            
+            if response.status_code >= 400:
+                GROQ_FAILURES.labels(f"http_{response.status_code}").inc()
+                delay = self._retry_delay(attempt, response)
+                if grant:
+                    if response.status_code == 429:
+                        # Groq's window is fuller than ours: keep the request spent, hold back every caller
+                        self.limiter.settle(grant, tokens=0)
+                        self.limiter.pause(delay)
+                    else:
+                        # A failed request counts against neither bucket
+                        self.limiter.settle(grant, requests=0, tokens=0)
+            if response.status_code in self.RETRY_STATUSES:
+                if self._can_retry(attempt, delay, deadline, waited):
+                    print(f"⚠️ Groq returned {response.status_code}, retrying in {delay:.1f}s...")
+                    response.close()
+                    time.sleep(delay)
+                    waited += delay
+                    continue
+            
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+            return response, grant
+    
+    def _post(self, path, payload, deadline=None):
+        """POST JSON (see ``_send``) and return the decoded body"""
+        response, grant = self._send(path, payload, deadline)
+        data = response.json()
+        self._settle(grant, data.get('usage'))
+        return data
+    
+    def chat(self, messages, max_tokens=500, temperature=0.7, response_format=None, deadline=None):
+        """Raw chat completion; returns the decoded response body"""
+        payload = self._payload(messages, max_tokens, temperature)
+        if response_format:
+            payload["response_format"] = response_format
+        
+        start = time.perf_counter()
+        with tracing.span('groq.chat', max_tokens=max_tokens) as span:
+            try:
+                data = self._post("/chat/completions", payload, deadline)
+            except Exception:
+                GROQ_LATENCY.labels('error').observe(time.perf_counter() - start)
+                raise
+            self._finish_chat(start, data, span)
+        return data
+    
+    def stream_chat(self, messages, max_tokens=500, temperature=0.7, deadline=None):
+        """Streamed chat completion (``stream: true``); yields content deltas
+        
+        Retries only happen before the first byte arrives. Closing the
+        generator early drops the connection.
+        """
+        payload = self._payload(messages, max_tokens, temperature)
+        payload["stream"] = True
+        
+        start = time.perf_counter()
+        first = None
+        usage = {}
+        try:
+            with tracing.span('groq.stream', max_tokens=max_tokens):
+                response, grant = self._send("/chat/completions", payload, deadline, stream=True)
+            with response:
+                for line in response.iter_lines():
+                    # Server-Sent Events: "data: {json}" lines, ending with "data: [DONE]"
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    # Groq reports usage in x_groq on the last chunk, OpenAI at top level
+                    usage = chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage') or usage
+                    for choice in chunk.get('choices') or ():
+                        delta = (choice.get('delta') or {}).get('content')
+                        if delta:
+                            if first is None:
+                                first = time.perf_counter() - start
+                                GROQ_FIRST_TOKEN.observe(first)
+                            yield delta
+        except Exception:
+            GROQ_LATENCY.labels('error').observe(time.perf_counter() - start)
+            raise
+        
+        elapsed = time.perf_counter() - start
+        GROQ_LATENCY.labels('ok').observe(elapsed)
+        self.latencies.append(elapsed)
+        self._settle(grant, usage)
+        self._record_usage(usage)
+    
+    def simple_chat(self, user_message, system_message=None, **options):
         """Simple chat helper"""
         messages = []
         
@@ -46,34 +679,284 @@ class GroqAPI:
         
         messages.append({"role": "user", "content": user_message})
         
-        url = f"{self.base_url}/chat/completions"
-        payload = {
-            "model": "llama-3.3-70b-versatile",
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-        
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
+            data = self.chat(messages, **options)
             return data['choices'][0]['message']['content']
         except Exception as e:
             print(f"Error calling Groq API: {e}")
             return None
+    
+    def simple_stream(self, user_message, system_message=None, **options):
+        """Like ``simple_chat`` but yields the reply piece by piece
+        
+        Errors are raised rather than returned as None, since part of the
+        reply may already have been yielded.
+        """
+        messages = []
+        
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        
+        messages.append({"role": "user", "content": user_message})
+        
+        return self.stream_chat(messages, **options)
 
 
-def generate_hunger_message(time_slot):
-    """Generate WhatsApp message using Groq API"""
+class AsyncGroqAPI(_GroqBase):
+    """asyncio sibling of ``GroqAPI`` for generating many messages at once
     
-    if not config['api_key']:
-        return "⚠️ API Key not configured"
+    Calls on an event loop share one pooled aiohttp session, and a
+    semaphore keeps at most `concurrency` requests in flight. Threaded code
+    uses ``run``, which executes a coroutine on the client's own event-loop
+    thread so the pool outlives the call. aiohttp is optional and only
+    imported on first use.
+    """
     
-    system_prompt = """You are an AI message generator for an Indian Daily Hunger-Time WhatsApp Notification System.
-Your task is to generate ONE short WhatsApp-friendly message for the given hunger time.
+    def __init__(self, api_key, concurrency=10, **options):
+        super().__init__(api_key, **options)
+        self.concurrency = concurrency
+        # Neither can be used from another loop: loop -> (session, semaphore, keeper task)
+        self._sessions = {}
+        self._sessions_lock = Lock()
+        self._loop = None  # background loop used by run()
+        self._loop_lock = Lock()
+    
+    @staticmethod
+    def available():
+        """Whether aiohttp is installed"""
+        return importlib.util.find_spec('aiohttp') is not None
+    
+    async def _ensure_session(self):
+        """(session, semaphore) for the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._sessions_lock:
+            entry = self._sessions.get(loop)
+            if entry is None:
+                try:
+                    import aiohttp
+                except ImportError:
+                    raise RuntimeError("AsyncGroqAPI needs aiohttp (pip install aiohttp)") from None
+                session = aiohttp.ClientSession(
+                    headers=self.headers,
+                    connector=aiohttp.TCPConnector(limit=self.concurrency),
+                )
+                keeper = loop.create_task(self._close_with_loop(session))
+                entry = self._sessions[loop] = (session, asyncio.Semaphore(self.concurrency), keeper)
+            # Loops closed without cancelling their tasks leave their session behind
+            stale = [self._sessions.pop(old)[0] for old in list(self._sessions) if old.is_closed()]
+        for session in stale:
+            await session.close()
+        return entry[:2]
+    
+    async def _close_with_loop(self, session):
+        """Wait until cancelled, then close `session` on its own loop
+        
+        ``asyncio.run`` cancels the tasks left on its loop before closing
+        it, so a session used from such a loop is closed with it.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            with self._sessions_lock:
+                if self._sessions.get(loop, (None,))[0] is session:
+                    del self._sessions[loop]
+            await session.close()
+            raise
+    
+    async def aclose(self):
+        """Close the sessions of every loop, each on its own loop"""
+        with self._sessions_lock:
+            entries = list(self._sessions.items())
+            self._sessions.clear()
+        current = asyncio.get_running_loop()
+        for loop, (session, _, keeper) in entries:
+            if loop is current:
+                keeper.cancel()
+                await asyncio.gather(keeper, return_exceptions=True)
+            elif loop.is_closed():
+                await session.close()
+            else:
+                loop.call_soon_threadsafe(keeper.cancel)
+    
+    def _event_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                Thread(target=self._serve, args=(self._loop,), name='groq-async', daemon=True).start()
+            return self._loop
+    
+    @staticmethod
+    def _serve(loop):
+        loop.run_forever()  # until close() stops it
+        loop.close()
+    
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the client's event-loop thread and wait for it
+        
+        For threaded callers (scheduler, Flask); do not call it from a
+        coroutine running on that loop.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._event_loop()).result(timeout)
+    
+    def close(self):
+        if self._sessions:
+            self.run(self.aclose())
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+    
+    async def _acquire(self, payload, deadline):
+        """Async ``GroqAPI._acquire``; the limiter blocks, so it waits in a worker thread"""
+        if not self.limiter:
+            return None
+        grant = await asyncio.to_thread(self.limiter.acquire, deadline=deadline, requests=1,
+                                        tokens=self.estimate_tokens(payload))
+        RATE_LIMIT_WAIT.observe(grant.waited)
+        return grant
+    
+    async def _post(self, path, payload, deadline=None):
+        """POST JSON with the retry policy of ``GroqAPI._send``; returns the decoded body
+        
+        Backoff sleeps happen outside the semaphore, so a retrying call
+        does not hold a slot other calls could use.
+        """
+        import aiohttp
+        session, semaphore = await self._ensure_session()
+        url = f"{self.base_url}{path}"
+        waited = 0.0
+        
+        for attempt in range(self.max_retries + 1):
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError("Groq request deadline exceeded")
+                timeout = aiohttp.ClientTimeout(total=remaining, sock_connect=min(self.timeout[0], remaining),
+                                                sock_read=min(self.timeout[1], remaining))
+            grant = await self._acquire(payload, deadline)
+            try:
+                async with semaphore:
+                    with tracing.span('groq.attempt', attempt=attempt) as span:
+                        async with session.post(url, json=payload, timeout=timeout) as response:
+                            span.set(status=response.status)
+                            if response.status < 400:
+                                data = await response.json(content_type=None)
+                                self._settle(grant, data.get('usage'))
+                                return data
+                            GROQ_FAILURES.labels(f"http_{response.status}").inc()
+                            delay = self._retry_delay(attempt, response)
+                            if grant:
+                                if response.status == 429:
+                                    # Groq's window is fuller than ours: keep the request spent, hold back every caller
+                                    self.limiter.settle(grant, tokens=0)
+                                    self.limiter.pause(delay)
+                                else:
+                                    # A failed request counts against neither bucket
+                                    self.limiter.settle(grant, requests=0, tokens=0)
+                            if (response.status not in self.RETRY_STATUSES
+                                    or not self._can_retry(attempt, delay, deadline, waited)):
+                                response.raise_for_status()
+                print(f"⚠️ Groq returned {response.status}, retrying in {delay:.1f}s...")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                GROQ_FAILURES.labels(e.__class__.__name__).inc()
+                delay = self._retry_delay(attempt)
+                if not self._can_retry(attempt, delay, deadline, waited):
+                    raise
+                print(f"⚠️ Groq request failed ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            waited += delay
+    
+    async def chat(self, messages, max_tokens=500, temperature=0.7, response_format=None, deadline=None):
+        """Raw chat completion; returns the decoded response body"""
+        payload = self._payload(messages, max_tokens, temperature)
+        if response_format:
+            payload["response_format"] = response_format
+        
+        start = time.perf_counter()
+        with tracing.span('groq.chat', max_tokens=max_tokens, client='async') as span:
+            try:
+                data = await self._post("/chat/completions", payload, deadline)
+            except Exception:
+                GROQ_LATENCY.labels('error').observe(time.perf_counter() - start)
+                raise
+            self._finish_chat(start, data, span)
+        return data
+    
+    async def simple_chat(self, user_message, system_message=None, **options):
+        """Simple chat helper; None on error, like ``GroqAPI.simple_chat``"""
+        messages = []
+        
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        
+        messages.append({"role": "user", "content": user_message})
+        
+        try:
+            data = await self.chat(messages, **options)
+            return data['choices'][0]['message']['content']
+        except Exception as e:
+            print(f"Error calling Groq API: {e}")
+            return None
+    
+    async def gather(self, prompts, **options):
+        """``simple_chat`` for every prompt at once; replies in order
+        
+        `prompts` are keyword dicts for ``simple_chat`` (see
+        ``hunger_prompt``); `options` apply to all of them. Failed calls
+        give None rather than cancelling the rest.
+        """
+        return await asyncio.gather(*(self.simple_chat(**prompt, **options) for prompt in prompts))
+
+
+_groq_clients = {}
+_async_groq_clients = {}
+groq_limiter = RateLimiter(config['ratelimit_path'])
+_groq_clients_lock = Lock()
+
+
+def _groq_settings():
+    """Constructor options for the Groq clients, from config"""
+    groq_limiter.configure({
+        'requests': (config['groq_rpm'], 60),
+        'tokens': (config['groq_tpm'], 60),
+    })
+    return {
+        'base_url': config['groq_base_url'],
+        'connect_timeout': config['groq_connect_timeout'],
+        'read_timeout': config['groq_read_timeout'],
+        'max_retries': config['groq_max_retries'],
+    }
+
+
+def _shared_client(clients, cls, api_key, **options):
+    """The cached `cls` client for these settings, replacing any older one"""
+    key = (api_key, *sorted(options.items()))
+    with _groq_clients_lock:
+        client = clients.get(key)
+        if client is None:
+            # Settings changed (new key, timeouts...): drop the old pools
+            for old in clients.values():
+                old.close()
+            clients.clear()
+            client = cls(api_key, limiter=groq_limiter, **options)
+            clients[key] = client
+        return client
+
+
+def get_groq_client(api_key=None):
+    """Return the shared GroqAPI client for the current settings"""
+    return _shared_client(_groq_clients, GroqAPI, api_key or config['api_key'], **_groq_settings())
 
-STRICT RULES:
+
+def get_async_groq_client(api_key=None):
+    """Return the shared AsyncGroqAPI client for the current settings"""
+    return _shared_client(_async_groq_clients, AsyncGroqAPI, api_key or config['api_key'],
+                          concurrency=config['groq_concurrency'], **_groq_settings())
+
+
+MESSAGE_RULES = """STRICT RULES:
 1. Output MUST have EXACTLY 3 lines.
 2. Each line MUST be separated by a single line break.
 3. Do NOT add greetings, explanations, headers, or extra spacing.
@@ -83,27 +966,521 @@ STRICT RULES:
 REQUIRED STRUCTURE:
 Line 1: Funny hunger-related line (Indian context)
 Line 2: Simple, practical health tip
-Line 3: Soft chocolate mention (gentle, non-pushy)
+Line 3: Soft chocolate mention (gentle, non-pushy)"""
+
+HUNGER_SYSTEM_PROMPT = """You are an AI message generator for an Indian Daily Hunger-Time WhatsApp Notification System.
+Your task is to generate ONE short WhatsApp-friendly message for the given hunger time.
+
+""" + MESSAGE_RULES + """
 
 Return ONLY the 3-line WhatsApp message. Nothing else."""
+
+BATCH_SYSTEM_PROMPT = """You are an AI message generator for an Indian Daily Hunger-Time WhatsApp Notification System.
+Your task is to generate several short WhatsApp-friendly messages for the given hunger times.
+
+Every message follows these rules:
+
+""" + MESSAGE_RULES + """
+
+All messages must be different from each other.
+Return ONLY a JSON object of the form:
+{"messages": [{"slot": "<slot>", "message": "<line 1>\\n<line 2>\\n<line 3>"}]}"""
+
+# Completion tokens budgeted per message in a batch call
+BATCH_TOKENS_PER_MESSAGE = 130
+
+
+def hunger_prompt(time_slot):
+    """``simple_chat`` arguments asking for one message for `time_slot`"""
+    return {
+        'user_message': f"Generate message for: {time_slot}",
+        'system_message': HUNGER_SYSTEM_PROMPT,
+    }
+
+
+@traced()
+def generate_hunger_message(time_slot, deadline=None):
+    """Generate WhatsApp message using Groq API"""
     
-    groq = GroqAPI(config['api_key'])
+    if not config['api_key']:
+        return "⚠️ API Key not configured"
     
-    message = groq.simple_chat(
-        user_message=f"Generate message for: {time_slot}",
-        system_message=system_prompt
-    )
+    groq = get_groq_client()
+    
+    message = groq.simple_chat(**hunger_prompt(time_slot), deadline=deadline)
     
     return message
 
 
-def init_whatsapp_driver():
+def stream_hunger_message(time_slot, deadline=None):
+    """Like ``generate_hunger_message`` but yields the message as it is written"""
+    return get_groq_client().simple_stream(**hunger_prompt(time_slot), deadline=deadline)
+
+
+def generate_hunger_messages(time_slots, deadline=None):
+    """Generate one message per entry of `time_slots`, concurrently
+    
+    Uses the async client, so it needs aiohttp; callable from any thread.
+    Returns the messages in order, None where a call failed.
+    """
+    time_slots = list(time_slots)
+    if not config['api_key']:
+        return ["⚠️ API Key not configured"] * len(time_slots)
+    
+    groq = get_async_groq_client()
+    prompts = [hunger_prompt(slot) for slot in time_slots]
+    return groq.run(groq.gather(prompts, deadline=deadline))
+
+
+def generate_message_batch(counts):
+    """Generate messages for several slots in one JSON-mode call
+
+    `counts` maps slot -> number of messages wanted (e.g. one per slot per
+    day for several days). Returns slot -> list of valid, non-duplicate
+    messages; it may hold fewer than asked if some were rejected.
+    """
+    counts = {slot: n for slot, n in counts.items() if n > 0}
+    if not config['api_key'] or not counts:
+        return {}
+    
+    requests_json = json.dumps({"requests": [
+        {"slot": slot, "time": config['message_templates'][slot], "count": n}
+        for slot, n in counts.items()
+    ]}, ensure_ascii=False)
+    total = sum(counts.values())
+    
+    try:
+        data = get_groq_client().chat(
+            [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Generate {total} messages:\n{requests_json}"},
+            ],
+            max_tokens=100 + BATCH_TOKENS_PER_MESSAGE * total,
+            response_format={"type": "json_object"},
+        )
+        items = json.loads(data['choices'][0]['message']['content'])['messages']
+    except Exception as e:
+        print(f"Error generating message batch: {e}")
+        return {}
+    
+    result = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        slot, message = item.get('slot'), item.get('message')
+        if isinstance(message, list):
+            message = '\n'.join(str(line) for line in message)
+        if slot not in counts or len(result.get(slot, ())) >= counts[slot]:
+            continue
+        message = _accept_fresh(message)
+        if message:
+            result.setdefault(slot, []).append(message)
+    
+    accepted = sum(len(messages) for messages in result.values())
+    print(f"📦 Batch generation: {accepted}/{total} messages accepted")
+    return result
+
+
+def is_valid_message(message):
+    """Check a generated message follows the 3-line rule"""
+    if not message or message.startswith("⚠️"):
+        return False
+    lines = message.strip().split('\n')
+    return len(lines) == 3 and all(line.strip() for line in lines)
+
+
+def configured_groups():
+    """Target groups, each with the schedule_times it uses
+
+    The single whatsapp_group_link is the group named "default"; entries of
+    config['groups'] without schedule_times use config['schedule_times'].
+    """
+    groups = []
+    if config['whatsapp_group_link']:
+        groups.append({'name': 'default', 'whatsapp_group_link': config['whatsapp_group_link']})
+    groups.extend(config['groups'])
+    
+    result, seen = [], set()
+    for i, group in enumerate(groups):
+        link = group['whatsapp_group_link'].strip()
+        if not link or link in seen:
+            continue
+        seen.add(link)
+        result.append({
+            'name': group.get('name') or f"group-{i}",
+            'whatsapp_group_link': link,
+            'schedule_times': group.get('schedule_times') or config['schedule_times'],
+        })
+    return result
+
+
+def default_slot():
+    """The first slot in message_templates, for requests that name none"""
+    return next(iter(config['message_templates']), None)
+
+
+def slot_table():
+    """Every (group, slot, HH:MM) that fires daily"""
+    return [
+        (group, slot, at)
+        for group in configured_groups()
+        for slot, at in group['schedule_times'].items()
+    ]
+
+
+def generate_fresh_message(time_slot, attempts=3):
+    """Generate a valid message that is not a near duplicate of a past one
+
+    Accepted messages are added to the duplicate index straight away, so
+    messages waiting in the buffer are not repeated either. Returns None
+    if every attempt was invalid or a repeat.
+    """
+    for _ in range(attempts):
+        message = _accept_fresh(generate_hunger_message(time_slot))
+        if message:
+            return message
+    return None
+
+
+def generate_fresh_messages(time_slots):
+    """``generate_fresh_message`` for many slots concurrently, one attempt each
+
+    Returns a list matching `time_slots`, with None for answers that were
+    invalid or a repeat.
+    """
+    return [_accept_fresh(message) for message in generate_hunger_messages(time_slots)]
+
+
+def _accept_fresh(message):
+    """The stripped message if valid and not a near duplicate (and index it), else None"""
+    if not isinstance(message, str) or not is_valid_message(message):
+        MESSAGES_REJECTED.labels('invalid').inc()
+        return None
+    message = message.strip()
+    score, _ = duplicates.nearest(message)
+    if score >= config['dedup_threshold']:
+        MESSAGES_REJECTED.labels('duplicate').inc()
+        print(f"♻️ Rejected: message is {score:.0%} similar to an earlier one")
+        return None
+    duplicates.add(message)
+    return message
+
+
+def hedge_delay():
+    """Seconds to give a Groq call before hedging it with a second one
+
+    The ``hedge_percentile`` of recent call times, so only the slowest few
+    percent of calls are hedged.
+    """
+    samples = sorted(get_groq_client().latencies)
+    if len(samples) < 20:
+        return config['hedge_default_delay']
+    index = min(len(samples) - 1, int(config['hedge_percentile'] / 100 * len(samples)))
+    return max(samples[index], config['hedge_min_delay'])
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='groq-hedge')
+
+
+def generate_within_deadline(time_slot, budget=None):
+    """Generate a fresh message within `budget` seconds, hedging slow calls
+
+    If the first request has not answered after ``hedge_delay()`` (or has
+    already failed), another goes out and the first good answer wins.
+    Returns None when the deadline passes or every request failed; calls
+    still in flight then finish in the background and are dropped.
+    """
+    budget = config['generation_deadline'] if budget is None else budget
+    start = time.monotonic()
+    deadline = start + budget
+    launched, pending = [], set()
+    
+    def launch():
+        context = contextvars.copy_context()
+        future = _hedge_executor.submit(context.run, generate_hunger_message, time_slot, deadline)
+        launched.append(future)
+        pending.add(future)
+    
+    with tracing.span('generate_within_deadline', budget=budget) as span:
+        launch()
+        hedge_at = start + hedge_delay()
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            can_hedge = len(launched) < config['hedge_max_requests']
+            until = min(hedge_at, deadline) if can_hedge else deadline
+            done, _ = wait(pending, timeout=max(until - now, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                message = _accept_fresh(future.result())
+                if not message:
+                    continue
+                source = 'primary' if future is launched[0] else 'hedge'
+                span.set(source=source, requests=len(launched))
+                INLINE_GENERATION.labels(source).observe(time.monotonic() - start)
+                return message
+            # Hedge a slow request, or replace one that failed fast
+            if can_hedge and (not pending or time.monotonic() >= hedge_at):
+                if pending:
+                    HEDGED_REQUESTS.inc()
+                launch()
+        
+        span.set(source='none', requests=len(launched))
+        INLINE_GENERATION.labels('none').observe(time.monotonic() - start)
+        return None
+
+
+def backfill_duplicate_index(limit=100000):
+    """Seed an empty duplicate index from the outbox's sent messages"""
+    if len(duplicates):
+        return 0
+    rows = outbox.history(state='sent', limit=limit)
+    return duplicates.add_many(row['message'] for row in rows)
+
+
+def upcoming_slots(count=3, now=None, until=None):
+    """Next `count` firings (or all before `until`) as (aware datetime, group name, slot)"""
+    tz = scheduler.tz
+    now = now or datetime.now(tz)
+    firings = []
+    for group, slot, at in slot_table():
+        fire_at = now
+        for _ in range(count if until is None else 366):
+            fire_at = next_fire_time(tz, at, fire_at)
+            if until is not None and fire_at > until:
+                break
+            firings.append((fire_at, group['name'], slot))
+    firings.sort(key=lambda firing: firing[0])
+    return firings if until is not None else firings[:count]
+
+
+class MessageBuffer:
+    """Pre-generated, validated messages per slot, refilled in the background
+
+    Scheduled jobs only ``pop`` a ready message, so the send time never
+    waits on the LLM. Depth, lead time and max age come from ``config``.
+    """
+    
+    def __init__(self, generate=None):
+        self.generate = generate or generate_fresh_message
+        self._messages = {}  # slot -> deque of (message, created_at)
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+    
+    def put(self, slot, message, created_at=None):
+        with self._lock:
+            queue = self._messages.get(slot)
+            if queue is None:
+                queue = self._messages[slot] = deque()
+                BUFFER_DEPTH.labels(slot).set_function(lambda: self.depth(slot))
+            queue.append((message, created_at or time.time()))
+    
+    def _drop_stale(self, slot, now):
+        # Batched messages are generated days ahead, so they live long enough
+        max_age = max(config['pregen_max_age_hours'],
+                      24 * config['pregen_batch_days'] + config['pregen_lead_hours']) * 3600
+        queue = self._messages.get(slot)
+        while queue and now - queue[0][1] > max_age:
+            queue.popleft()
+        return queue
+    
+    def pop(self, slot):
+        """Take the oldest ready message for a slot, or None if empty"""
+        with self._lock:
+            queue = self._drop_stale(slot, time.time())
+            message = queue.popleft()[0] if queue else None
+        self._wake.set()
+        return message
+    
+    def depth(self, slot):
+        with self._lock:
+            queue = self._drop_stale(slot, time.time())
+            return len(queue) if queue else 0
+    
+    def discard(self, slots):
+        """Drop the ready messages of `slots`, e.g. after their labels changed"""
+        with self._lock:
+            for slot in slots:
+                queue = self._messages.get(slot)
+                if queue:
+                    queue.clear()
+    
+    def wake(self):
+        """Refill now rather than at the next interval"""
+        self._wake.set()
+    
+    def refill(self, now=None):
+        """Top up every slot due within the lead time, soonest first
+
+        A slot needs one message per group firing it in that window, and at
+        least ``pregen_depth``. In batch mode the window covers
+        ``pregen_batch_days`` days and is filled with one call; anything the
+        batch did not cover is then generated concurrently when aiohttp is
+        installed, and per slot for whatever is still missing.
+        """
+        now = now or datetime.now(scheduler.tz)
+        lead_hours = max(config['pregen_lead_hours'], 24 * config['pregen_batch_days'])
+        horizon = now + timedelta(hours=lead_hours)
+        due = OrderedDict()
+        for _, _, slot in upcoming_slots(now=now, until=horizon):
+            due[slot] = due.get(slot, 0) + 1
+        targets = {slot: max(config['pregen_depth'], firings) for slot, firings in due.items()}
+        
+        generated = 0
+        if config['pregen_batch_days'] > 0:
+            missing = {slot: target - self.depth(slot) for slot, target in targets.items()}
+            if sum(n for n in missing.values() if n > 0) > 1:
+                for slot, messages in generate_message_batch(missing).items():
+                    for message in messages:
+                        self.put(slot, message)
+                        generated += 1
+        
+        if (self.generate is generate_fresh_message and config['groq_concurrency'] > 1
+                and AsyncGroqAPI.available()):
+            # One concurrent round for everything missing; the loop below retries the rest
+            wanted = [slot for slot, target in targets.items() for _ in range(target - self.depth(slot))]
+            if len(wanted) > 1:
+                labels = [config['message_templates'][slot] for slot in wanted]
+                for slot, message in zip(wanted, generate_fresh_messages(labels)):
+                    if message:
+                        self.put(slot, message)
+                        generated += 1
+        
+        for slot, target in targets.items():
+            # Give up on a slot after a few invalid answers; retry next round
+            attempts = 0
+            while self.depth(slot) < target and attempts < 3:
+                if self._stop.is_set():
+                    return generated
+                attempts += 1
+                message = self.generate(config['message_templates'][slot])
+                if is_valid_message(message):
+                    self.put(slot, message.strip())
+                    generated += 1
+                else:
+                    print(f"⚠️ Discarded invalid pre-generated message for {slot}")
+        return generated
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refill()
+            except Exception as e:
+                print(f"❌ Error pre-generating messages: {e}")
+            self._wake.wait(config['pregen_refill_seconds'])
+            self._wake.clear()
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def status(self, count=3):
+        """Depth and age of the buffer for the next `count` firings
+
+        A firing is covered when its slot still has a message left after
+        the earlier firings in the list take theirs.
+        """
+        now = time.time()
+        taken = {}
+        result = []
+        for fire_at, group_name, slot in upcoming_slots(count):
+            with self._lock:
+                queue = self._drop_stale(slot, now) or ()
+                ages = [now - created_at for _, created_at in queue]
+            taken[slot] = taken.get(slot, 0) + 1
+            result.append({
+                'group': group_name,
+                'slot': slot,
+                'label': config['message_templates'].get(slot, slot),
+                'fires_at': fire_at.isoformat(timespec='minutes'),
+                'depth': len(ages),
+                'oldest_age_seconds': round(max(ages), 1) if ages else None,
+                'newest_age_seconds': round(min(ages), 1) if ages else None,
+                'covered': len(ages) >= taken[slot],
+            })
+        return result
+
+
+def record_firing(name, lateness, skipped):
+    """Scheduler hook: firing drift, and runs missed for being too late"""
+    if skipped:
+        SCHEDULER_MISSED.labels(name).inc()
+    else:
+        SCHEDULER_DRIFT.observe(max(lateness, 0.0))
+
+
+scheduler = SlotScheduler(config['timezone'], on_fire=record_firing)
+message_buffer = MessageBuffer()
+outbox = Outbox(config['outbox_path'])
+leases = LeaseStore(config['lease_path'], node_id=config['node_id'], ttl=config['lease_ttl'])
+duplicates = DuplicateIndex(config['dedup_path'], config['dedup_threshold'])
+# Slow web actions (browser start-up, test sends) run here, off the request thread
+background_jobs = JobManager()
+fallback_corpus = FallbackCorpus(config['fallback_path'], config['fallback_state_path'], is_valid_message)
+chromedriver_cache = DriverCache(config['chromedriver_cache_path'])
+
+# Invite link -> {'url': resolved chat URL, 'title': chat header}
+chat_cache = {}
+
+
+def add_lean_options(chrome_options):
+    """Headless Chrome without images or media, with small caches"""
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--window-size=1280,800")
+    chrome_options.add_argument("--disk-cache-size=33554432")
+    chrome_options.add_argument("--renderer-process-limit=2")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-component-update")
+    chrome_options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.media_stream_mic": 2,
+        "profile.default_content_setting_values.media_stream_camera": 2,
+    })
+
+
+def unmask_headless(driver):
+    """Drop "HeadlessChrome" from the current tab's user agent
+    
+    WhatsApp Web turns away user agents that say HeadlessChrome. The CDP
+    override only covers the tab it was sent to, so every new tab needs it.
+    """
+    user_agent = driver.execute_script("return navigator.userAgent")
+    driver.execute_cdp_cmd("Network.setUserAgentOverride",
+                           {"userAgent": user_agent.replace("HeadlessChrome", "Chrome")})
+
+
+@traced()
+def init_whatsapp_driver(profile_dir="./whatsapp_session"):
     """Initialize WhatsApp Web with Selenium"""
+    start = time.perf_counter()
     try:
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        
         print("🔧 Setting up ChromeDriver...")
         
         chrome_options = Options()
-        chrome_options.add_argument("--user-data-dir=./whatsapp_session")  # Save session
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")  # Save session
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
@@ -112,29 +1489,48 @@ def init_whatsapp_driver():
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        lean = config['browser_mode'] == 'lean'
+        if lean:
+            add_lean_options(chrome_options)
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
         
-        # Automatically download and use correct ChromeDriver
-        service = Service(ChromeDriverManager().install())
+        # Matching ChromeDriver: cached per Chrome version, downloaded on a miss
+        with tracing.span('chromedriver_resolve'):
+            driver_path = chromedriver_cache.resolve()
         
         print("🌐 Opening Chrome browser...")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        with tracing.span('chrome_start'):
+            try:
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            except SessionNotCreatedException:
+                # Chrome may have updated under the cached driver; resolve it again once
+                print("⚠️ Chrome refused the cached ChromeDriver, resolving it again...")
+                chromedriver_cache.invalidate()
+                driver = webdriver.Chrome(service=Service(chromedriver_cache.resolve()),
+                                          options=chrome_options)
+        if lean:
+            unmask_headless(driver)
         
         print("📱 Loading WhatsApp Web...")
-        driver.get("https://web.whatsapp.com")
+        with tracing.span('driver.get', url=WHATSAPP_URL):
+            driver.get(WHATSAPP_URL)
         
         print("✅ WhatsApp Web opened. Please scan QR code if needed.")
         print("⏳ Waiting for WhatsApp to load...")
         
         # Wait for WhatsApp to load (search box appears)
-        WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
-        )
+        with tracing.span('wait_search_box'):
+            WebDriverWait(driver, 60).until(
+                EC.presence_of_element_located((By.XPATH, XPATH_SEARCH_BOX))
+            )
         
         print("✅ WhatsApp Web loaded successfully!")
+        DRIVER_INIT.observe(time.perf_counter() - start)
         return driver
         
     except Exception as e:
+        WHATSAPP_FAILURES.labels('driver_init', e.__class__.__name__).inc()
         print(f"❌ Error initializing WhatsApp: {e}")
         print("\n💡 Troubleshooting:")
         print("   1. Make sure Chrome browser is installed")
@@ -143,93 +1539,1064 @@ def init_whatsapp_driver():
         return None
 
 
-def send_to_whatsapp_group(message):
-    """Send message to WhatsApp group using Selenium"""
+class WhatsAppSession:
+    """One Chrome profile logged in to WhatsApp Web
+
+    Each session needs its own profile directory (Chrome locks it), so
+    every extra session is a separate linked device and needs one QR scan.
+    """
     
-    if not config['whatsapp_group_link']:
-        print("⚠️ WhatsApp group link not configured")
-        return False
+    def __init__(self, profile_dir="./whatsapp_session", driver_factory=None):
+        self.profile_dir = profile_dir
+        self.driver_factory = driver_factory or init_whatsapp_driver
+        self.driver = None
+        self.started_at = None  # time.time() the driver was started
+        self.active_chat = None  # group link whose chat is open in the driver
+        # How SEND_HOOK_JS gets into pages: None (not yet), 'document' (Chrome
+        # adds it to every page the tab loads) or 'page' (after each load)
+        self.send_hook = None
+        self.script_fallbacks = 0  # script sends in a row that fell back to the UI
+        self.lock = Lock()  # held for the whole of a send or (re)initialisation
     
-    try:
-        # Initialize driver if not exists
-        if not config['driver']:
-            config['driver'] = init_whatsapp_driver()
-            if not config['driver']:
-                return False
+    def use_driver(self, driver, started_at=None):
+        """Take over `driver` (or None), dropping what was known about the previous one
         
-        driver = config['driver']
+        `started_at` is when that browser was started, if not just now.
+        """
+        self.driver = driver
+        self.started_at = (started_at or time.time()) if driver else None
+        self.active_chat = None
+        self.send_hook = None
+        self.script_fallbacks = 0
+    
+    def ensure_driver(self):
+        if not self.driver:
+            self.use_driver(self.driver_factory(self.profile_dir))
+        return self.driver
+    
+    def rss(self):
+        """Resident bytes of the browser (chromedriver and everything it started), or None"""
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        return tree_rss(process.pid) if process else None
+    
+    def recycle_tab(self):
+        """Reopen WhatsApp Web in a fresh tab, dropping the old tab's renderer
         
-        print(f"📱 Opening WhatsApp group link...")
+        The blank tab opens first so the browser never runs out of windows,
+        and WhatsApp is never open in two tabs at once.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
         
-        # Open the group invite link
-        driver.get(config['whatsapp_group_link'])
-        time.sleep(3)
+        driver = self.driver
+        old = driver.current_window_handle
+        driver.switch_to.new_window('tab')
+        new = driver.current_window_handle
+        driver.switch_to.window(old)
+        driver.close()
+        driver.switch_to.window(new)
+        if config['browser_mode'] == 'lean':
+            unmask_headless(driver)
+        self.active_chat = None
+        self.send_hook = None
+        driver.get(WHATSAPP_URL)
+        wait_for(driver, 60, EC.presence_of_element_located((By.XPATH, XPATH_SEARCH_BOX)))
+    
+    def restart(self):
+        """Restart the browser on the same profile, keeping the login"""
+        self.quit()
+        return self.ensure_driver()
+    
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.use_driver(None)
+
+
+def session_profile_dir(index):
+    return "./whatsapp_session" if index == 0 else f"./whatsapp_session_{index + 1}"
+
+
+# Guard of the send running in this context (see SendPool.submit)
+_send_guard = contextvars.ContextVar('send_guard', default=None)
+
+
+def send_allowed():
+    """Ask the running send's guard again, right before the message goes out"""
+    guard = _send_guard.get()
+    return guard is None or guard()
+
+
+class SendPool:
+    """Bounded pool of WhatsApp sessions fed from one work queue
+
+    Sends for the same group run one at a time, in submission order.
+    Different groups are spread round-robin over the sessions, preferring
+    a session that already has the group's chat open.
+    """
+    
+    def __init__(self, size=1, session_factory=None, send=None):
+        self.session_factory = session_factory or (lambda i: WhatsAppSession(session_profile_dir(i)))
+        self.send = send or (lambda session, link, message: send_to_whatsapp_group(message, link, session))
+        self.sessions = []
+        self._size = 0
+        self._queues = OrderedDict()  # group link -> deque of (message, Future, Context, guard)
+        self._busy = set()  # group links being sent right now
+        self._workers = {}  # session index -> Thread
+        self._cond = Condition()
+        self.resize(size)
+    
+    @property
+    def primary(self):
+        return self.sessions[0]
+    
+    @property
+    def size(self):
+        return self._size
+    
+    def resize(self, size):
+        """Grow or shrink the pool; drivers of retired sessions are closed"""
+        size = max(1, int(size))
+        with self._cond:
+            while len(self.sessions) < size:
+                self.sessions.append(self.session_factory(len(self.sessions)))
+            self._size = size
+            self._cond.notify_all()
+            if self._workers:
+                self._start_workers()
+    
+    def _start_workers(self):
+        for index in range(self._size):
+            worker = self._workers.get(index)
+            if not worker or not worker.is_alive():
+                worker = Thread(target=self._work, args=(index,), name=f'send-worker-{index}', daemon=True)
+                self._workers[index] = worker
+                worker.start()
+    
+    def submit(self, group_link, message, guard=None):
+        """Queue a send; the returned Future resolves to True/False
+
+        The send runs in the caller's context, so it joins the caller's trace.
+        `guard`, if given, is called before the send starts and again (via
+        ``send_allowed``) just before the message goes out; if it returns
+        False the message is not sent and the result is False.
+        """
+        future = Future()
+        context = contextvars.copy_context()
+        with self._cond:
+            self._queues.setdefault(group_link, deque()).append((message, future, context, guard))
+            self._start_workers()
+            self._cond.notify_all()
+        return future
+    
+    def _send(self, guard, session, link, message):
+        _send_guard.set(guard)  # in the submitted context, which is used once
+        return self.send(session, link, message)
+    
+    def pending(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values()) + len(self._busy)
+    
+    def _take(self, index):
+        """Next (group link, message, future, context, guard) this worker may send, or None to exit"""
+        session = self.sessions[index]
+        with self._cond:
+            while True:
+                if index >= self._size:
+                    return None
+                ready = [link for link in self._queues if link not in self._busy]
+                if ready:
+                    break
+                self._cond.wait()
+            link = session.active_chat if session.active_chat in ready else ready[0]
+            # Re-append the group at the back so groups take turns
+            queue = self._queues.pop(link)
+            message, future, context, guard = queue.popleft()
+            if queue:
+                self._queues[link] = queue
+            self._busy.add(link)
+            return link, message, future, context, guard
+    
+    def _work(self, index):
+        session = self.sessions[index]
+        while True:
+            item = self._take(index)
+            if item is None:
+                with session.lock:
+                    session.quit()
+                return
+            link, message, future, context, guard = item
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        if guard and not context.run(guard):
+                            future.set_result(False)
+                        else:
+                            future.set_result(context.run(self._send, guard, session, link, message))
+                    except Exception as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._busy.discard(link)
+                    self._cond.notify_all()
+
+
+send_pool = SendPool(config['driver_pool_size'])
+SEND_QUEUE.set_function(lambda: send_pool.pending())
+
+
+def probe_session(session):
+    """'ok', or why the session cannot send: 'no_driver', 'browser_dead' or 'logged_out'
+
+    Two cheap WebDriver calls: the window handles (fails once Chrome or
+    chromedriver is gone) and a lookup of the logged-in search box.
+    """
+    from selenium.webdriver.common.by import By
+    
+    driver = session.driver
+    if not driver:
+        return 'no_driver'
+    try:
+        if not driver.window_handles:
+            return 'browser_dead'
+        if not driver.find_elements(By.XPATH, XPATH_SEARCH_BOX):
+            return 'logged_out'
+    except Exception:
+        return 'browser_dead'
+    return 'ok'
+
+
+class SessionWatchdog:
+    """Probes idle browser sessions between sends and replaces dead ones
+
+    A dead session takes over the warm standby's driver if one is ready
+    (seconds); otherwise its Chrome is restarted from the same profile
+    directory, which keeps the login (a cold init). The dead driver's
+    profile then becomes the standby's and is warmed up again in the
+    background. Sessions busy sending are skipped; sessions never started
+    are left alone.
+    """
+    
+    def __init__(self, pool=None, standby_factory=None):
+        self.pool = pool  # default: the module's send_pool at check time
+        self.standby_factory = standby_factory or (lambda: WhatsAppSession(config['standby_profile_dir']))
+        self.standby = None
+        self.recoveries = []  # last few {'session', 'reason', 'how', 'seconds', 'at'}
+        self._results = {}  # session index -> {'result', 'failures', 'at'}
+        self._lost = set()  # indexes of sessions whose driver died and is not back yet
+        self._warming = None
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+    
+    def check(self):
+        """Probe every idle session once, recovering dead ones"""
+        pool = self.pool or send_pool
+        for index, session in enumerate(pool.sessions[:pool.size]):
+            if not session.lock.acquire(blocking=False):
+                continue  # mid-send, so evidently alive enough
+            try:
+                if not session.driver and index not in self._lost:
+                    continue
+                result = probe_session(session)
+                SESSION_PROBES.labels(result).inc()
+                previous = self._results.get(index, {})
+                failures = 0 if result == 'ok' else previous.get('failures', 0) + 1
+                self._results[index] = {'result': result, 'failures': failures, 'at': time.time()}
+                if result == 'ok':
+                    self._lost.discard(index)
+                    self._maintain(index, session)
+                    continue
+                self._lost.add(index)
+                # A logged-out page may just be reloading; a dead browser will not come back
+                if result != 'logged_out' or failures >= config['watchdog_failures']:
+                    self._recover(index, session, result)
+            finally:
+                session.lock.release()
+        if config['watchdog_standby']:
+            self._keep_standby_warm()
+    
+    def _recover(self, index, session, reason):
+        """Replace the session's driver; the caller holds session.lock"""
+        print(f"🩺 Session {session.profile_dir} is {reason.replace('_', ' ')}, recovering...")
+        start = time.perf_counter()
+        how = None
+        standby = self.standby
+        if standby and standby.lock.acquire(blocking=False):
+            try:
+                if probe_session(standby) == 'ok':
+                    # Swap browsers and profiles; the standby is left holding the dead one
+                    dead = session.driver
+                    # The standby's browser keeps its age for browser_max_age_hours
+                    session.use_driver(standby.driver, standby.started_at)
+                    standby.use_driver(dead)
+                    session.profile_dir, standby.profile_dir = standby.profile_dir, session.profile_dir
+                    standby.quit()
+                    how = 'standby'
+            finally:
+                standby.lock.release()
+        if how is None:
+            session.quit()
+            session.ensure_driver()
+            how = 'restart' if session.driver else 'failed'
         
-        # Click "Join Group" if needed (for first time)
-        try:
-            join_button = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, '//div[contains(text(), "Join group")]'))
-            )
-            join_button.click()
-            time.sleep(2)
-        except:
-            pass  # Already in group
-        
-        # Find message input box
-        message_box = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="10"]'))
-        )
+        seconds = time.perf_counter() - start
+        SESSION_RECOVERY.labels(how).observe(seconds)
+        self.recoveries = self.recoveries[-9:] + [{
+            'session': index, 'reason': reason, 'how': how,
+            'seconds': round(seconds, 3), 'at': time.time(),
+        }]
+        if how == 'failed':
+            print(f"❌ Could not restart {session.profile_dir}; will retry in {config['watchdog_interval']}s")
+            return
+        print(f"✅ Session recovered by {how} in {seconds:.1f}s (now on {session.profile_dir})")
+        self._results[index] = {'result': 'recovered', 'failures': 0, 'at': time.time()}
+        self._lost.discard(index)
+    
+    def quiet(self, now=None):
+        """Whether nothing is being sent and no slot is due for a while"""
+        if (self.pool or send_pool).pending():
+            return False
+        now = now or datetime.now(scheduler.tz)
+        firings = upcoming_slots(1, now=now)
+        return not firings or (firings[0][0] - now).total_seconds() >= config['recycle_quiet_minutes'] * 60
+    
+    def _maintain(self, index, session, now=None):
+        """Recycle a healthy session's browser that grew too big or too old
         
-        # Type message
-        message_box.click()
-        time.sleep(1)
+        The tab goes first; Chrome is restarted if that does not bring it
+        back under 80% of the limit, or once it reaches the maximum age.
+        Called with session.lock held; `now` is an aware datetime.
+        """
+        now = now or datetime.now(scheduler.tz)
+        limit = config['browser_rss_limit_mb'] * 1024 * 1024
+        max_age = config['browser_max_age_hours'] * 3600
+        rss = session.rss()
+        if rss is not None:
+            BROWSER_RSS.labels(str(index)).set(rss)
+            self._results.setdefault(index, {})['rss_mb'] = round(rss / 2 ** 20, 1)
+        too_big = bool(limit and rss and rss > limit)
+        too_old = bool(max_age and session.started_at and now.timestamp() - session.started_at > max_age)
+        if not (too_big or too_old) or not self.quiet(now):
+            return None
         
-        # Split message by lines and send with Shift+Enter
-        lines = message.split('\n')
-        for i, line in enumerate(lines):
-            message_box.send_keys(line)
-            if i < len(lines) - 1:
-                message_box.send_keys(Keys.SHIFT + Keys.ENTER)
+        how = 'restart' if too_old else 'tab'
+        start = time.perf_counter()
+        try:
+            if how == 'tab':
+                session.recycle_tab()
+                after = session.rss()
+                if after and after > 0.8 * limit:
+                    how = 'restart'
+            if how == 'restart':
+                session.restart()
+        except Exception as e:
+            # Left for the next probe to find and recover
+            print(f"⚠️ Could not recycle {session.profile_dir}: {e}")
+            return None
+        BROWSER_RECYCLES.labels(how).inc()
+        reason = f"{rss / 2 ** 20:.0f} MB" if too_big else "max age"
+        print(f"♻️ Recycled {session.profile_dir} ({reason}) by {how} in {time.perf_counter() - start:.1f}s")
+        return how
+    
+    def _keep_standby_warm(self):
+        """Start (or restart) the standby's browser in the background if it is not ready"""
+        if self._warming and self._warming.is_alive():
+            return
+        if self.standby is None:
+            self.standby = self.standby_factory()
         
-        time.sleep(1)
+        def warm():
+            standby = self.standby
+            if not standby.lock.acquire(blocking=False):
+                return
+            try:
+                if probe_session(standby) != 'ok':
+                    print(f"🔥 Warming standby session {standby.profile_dir}...")
+                    standby.quit()
+                    standby.ensure_driver()
+            finally:
+                standby.lock.release()
         
-        # Send message (Enter key)
-        message_box.send_keys(Keys.ENTER)
+        self._warming = Thread(target=warm, name='standby-warmup', daemon=True)
+        self._warming.start()
+    
+    def wake(self):
+        """Probe now instead of at the next interval (e.g. after a failed send)"""
+        self._wake.set()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Session watchdog error: {e}")
+            self._wake.wait(config['watchdog_interval'])
+            self._wake.clear()
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='session-watchdog', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def status(self):
+        pool = self.pool or send_pool
+        standby = self.standby
+        return {
+            'sessions': [
+                {'index': index, 'profile_dir': session.profile_dir,
+                 'driver': bool(session.driver), **self._results.get(index, {})}
+                for index, session in enumerate(pool.sessions[:pool.size])
+            ],
+            'standby': {
+                'enabled': config['watchdog_standby'],
+                'profile_dir': standby.profile_dir if standby else config['standby_profile_dir'],
+                'ready': bool(standby and standby.driver),
+            },
+            'recoveries': list(self.recoveries),
+        }
+
+
+session_watchdog = SessionWatchdog()
+
+
+class StepTimer:
+    """Wall time of each named step of one operation, in seconds
+
+    Each step is a tracing span, and is also observed in `histogram`
+    (labelled by step) if one is given. `current` names the step running
+    or last started.
+    """
+    
+    def __init__(self, histogram=None):
+        self.steps = {}
+        self.histogram = histogram
+        self.current = None
+        self._started = time.perf_counter()
+    
+    @contextmanager
+    def step(self, name):
+        self.current = name
+        start = time.perf_counter()
+        try:
+            with tracing.span(name):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.steps[name] = self.steps.get(name, 0.0) + elapsed
+            if self.histogram:
+                self.histogram.labels(name).observe(elapsed)
+    
+    def as_dict(self):
+        timings = {name: round(seconds, 3) for name, seconds in self.steps.items()}
+        timings['total'] = round(time.perf_counter() - self._started, 3)
+        return timings
+
+
+def wait_for(driver, timeout, condition):
+    """WebDriverWait with a short poll interval"""
+    from selenium.webdriver.support.ui import WebDriverWait
+    return WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL).until(condition)
+
+
+def _chat_title(driver):
+    from selenium.webdriver.common.by import By
+    titles = driver.find_elements(By.XPATH, XPATH_CHAT_TITLE)
+    return titles[0].text if titles else None
+
+
+def open_group_chat(session, group_link):
+    """Bring up the group's composer, reloading the page only when needed
+
+    The chat resolved from an invite link stays open between sends, so when
+    it is still on screen we just return its composer.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    
+    driver = session.driver
+    if session.active_chat == group_link:
+        with tracing.span('check_open_chat') as span:
+            composers = driver.find_elements(By.XPATH, XPATH_COMPOSER)
+            title = _chat_title(driver)
+            reuse = bool(composers and title and title == chat_cache.get(group_link, {}).get('title'))
+            span.set(reused=reuse)
+        if reuse:
+            return composers[0]
+    
+    cached = chat_cache.get(group_link)
+    print(f"📱 Opening WhatsApp group {'chat' if cached else 'link'}...")
+    session.active_chat = None
+    with tracing.span('driver.get', cached=bool(cached)):
+        driver.get(cached['url'] if cached else group_link)
+    
+    # Either the composer shows up, or "Join group" does (first time only)
+    with tracing.span('wait_composer_or_join'):
+        element = wait_for(driver, 20, EC.any_of(
+            EC.presence_of_element_located((By.XPATH, XPATH_COMPOSER)),
+            EC.element_to_be_clickable((By.XPATH, XPATH_JOIN_BUTTON)),
+        ))
+    if element.get_attribute('contenteditable') != 'true':
+        with tracing.span('join_group'):
+            element.click()
+            element = wait_for(driver, 10, EC.presence_of_element_located((By.XPATH, XPATH_COMPOSER)))
+    
+    chat_cache[group_link] = {'url': driver.current_url, 'title': _chat_title(driver)}
+    session.active_chat = group_link
+    return element
+
+
+def _normalize_text(text):
+    return ' '.join((text or '').split())
+
+
+def paste_message(driver, message_box, message):
+    """Insert the whole message with one script call
+
+    Returns False, leaving the composer empty, if the editor did not end
+    up holding exactly the message.
+    """
+    try:
+        text = driver.execute_script(INSERT_TEXT_JS, message_box, message)
+        if _normalize_text(text) == _normalize_text(message):
+            return True
+        PASTE_FALLBACKS.inc()
+        print("⚠️ Composer rejected pasted text, typing it instead...")
+        driver.execute_script(CLEAR_COMPOSER_JS, message_box)
+    except Exception as e:
+        PASTE_FALLBACKS.inc()
+        print(f"⚠️ Could not paste message ({e}), typing it instead...")
+    return False
+
+
+def type_message(driver, message_box, message):
+    """Type the message line by line, with Shift+Enter between lines"""
+    from selenium.webdriver.common.keys import Keys
+    
+    message_box.click()
+    
+    lines = message.split('\n')
+    for i, line in enumerate(lines):
+        message_box.send_keys(line)
+        if i < len(lines) - 1:
+            message_box.send_keys(Keys.SHIFT + Keys.ENTER)
+    
+    wait_for(driver, 5, lambda d: message_box.text.strip())
+
+
+def install_send_hook(session):
+    """Inject SEND_HOOK_JS into the open page, and on Chrome into every page the tab loads"""
+    driver = session.driver
+    if session.send_hook is None:
+        try:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': SEND_HOOK_JS})
+            session.send_hook = 'document'
+        except Exception:
+            session.send_hook = 'page'  # not Chrome
+        # Room for the hook's own timeout plus its send and ack waits
+        driver.set_script_timeout(config['script_send_timeout'] + 15)
+    driver.execute_script(SEND_HOOK_JS)
+
+
+def script_send(session, group_link, message):
+    """Open the group's chat and send with one call into the in-page hook
+    
+    Loads the chat by URL unless it is already open, then everything else
+    (waiting for the composer, joining, composing, sending, waiting for the
+    acknowledgement) runs in the page. Returns the hook's result dict; see
+    SEND_HOOK_JS for its stages.
+    """
+    driver = session.driver
+    if session.send_hook is None:
+        with tracing.span('install_send_hook'):
+            install_send_hook(session)
+    
+    cached = chat_cache.get(group_link)
+    if session.active_chat != group_link:
+        print(f"📱 Opening WhatsApp group {'chat' if cached else 'link'}...")
+        session.active_chat = None
+        with tracing.span('driver.get', cached=bool(cached)):
+            driver.get(cached['url'] if cached else group_link)
+        if session.send_hook == 'page':
+            driver.execute_script(SEND_HOOK_JS)
+        # Lets the UI path check this page before loading it again
+        session.active_chat = group_link
+    
+    if not send_allowed():
+        return {'ok': False, 'stage': 'guard'}
+    options = {
+        'composer': XPATH_COMPOSER,
+        'join_button': XPATH_JOIN_BUTTON,
+        'title': XPATH_CHAT_TITLE,
+        'send_button': XPATH_SEND_BUTTON,
+        'outgoing': XPATH_OUTGOING_MESSAGE,
+        'acks': MESSAGE_ACKS,
+        'expect_title': cached['title'] if cached else None,
+        'timeout_ms': config['script_send_timeout'] * 1000,
+    }
+    with tracing.span('execute_async_script') as span:
+        result = driver.execute_async_script(SCRIPT_SEND_JS, message, options)
+        if result['stage'] == 'install':
+            # The page was reloaded without the hook
+            install_send_hook(session)
+            result = driver.execute_async_script(SCRIPT_SEND_JS, message, options)
+        span.set(stage=result['stage'], ok=result['ok'], ack=result.get('ack'))
+    
+    if result['ok']:
+        chat_cache[group_link] = {'url': result['url'], 'title': result['title']}
+    return result
+
+
+class UnconfirmedSend(RuntimeError):
+    """The message was submitted but its send could not be confirmed"""
+
+
+@traced()
+def send_to_whatsapp_group(message, group_link=None, session=None):
+    """Send message to WhatsApp group using Selenium
+    
+    Defaults to the configured group link and the pool's primary session.
+    Returns True or False, or raises UnconfirmedSend when the message may
+    have gone out; such a send must not be retried.
+    """
+    
+    group_link = group_link or config['whatsapp_group_link']
+    session = session or send_pool.primary
+    
+    if not group_link:
+        print("⚠️ WhatsApp group link not configured")
+        return False
+    
+    tracing.current_span().set(group=group_link, session=session.profile_dir)
+    timer = StepTimer(SEND_STEP)
+    sent = False
+    with session.lock:
+        try:
+            # Initialize driver if not exists
+            if not session.driver:
+                with timer.step('driver_init'):
+                    session.ensure_driver()
+                if not session.driver:
+                    return False
+            
+            driver = session.driver
+            
+            script = session.script_fallbacks < SCRIPT_SEND_STRIKES
+            if config['send_backend'] == 'script' and script:
+                with timer.step('script_send'):
+                    result = script_send(session, group_link, message)
+                if result['ok']:
+                    session.script_fallbacks = 0
+                    ack = result.get('ack') or 'none'
+                    SCRIPT_SENDS.labels('sent', ack).inc()
+                    print(f"✅ Message sent successfully! (ack: {ack})")
+                    sent = True
+                    return True
+                if result['stage'] == 'guard':
+                    return False
+                if result['stage'] == 'send':
+                    # It may have gone out: sending it again anywhere could double it
+                    SCRIPT_SENDS.labels('unconfirmed', 'none').inc()
+                    reason = result.get('error') or 'composer did not clear'
+                    raise UnconfirmedSend(f"in-page send not confirmed ({reason})")
+                SCRIPT_SENDS.labels('fallback', 'none').inc()
+                session.script_fallbacks += 1
+                if session.script_fallbacks == SCRIPT_SEND_STRIKES:
+                    print("⚠️ In-page sends keep failing, using the UI path until the browser restarts")
+                print(f"⚠️ In-page send stopped at {result['stage']} "
+                      f"({result.get('error') or 'element not found'}), driving the page instead...")
+            
+            with timer.step('navigate'):
+                message_box = open_group_chat(session, group_link)
+            
+            with timer.step('compose'):
+                inserted = config['insert_mode'] == 'paste' and paste_message(driver, message_box, message)
+                if not inserted:
+                    with tracing.span('type'):
+                        type_message(driver, message_box, message)
+            
+            if not send_allowed():
+                # E.g. another node took the send over while this one composed
+                driver.execute_script(CLEAR_COMPOSER_JS, message_box)
+                return False
+            
+            with timer.step('send'):
+                from selenium.webdriver.common.keys import Keys
+                # Send message (Enter key); the composer empties once it is sent
+                message_box.send_keys(Keys.ENTER)
+                wait_for(driver, 5, lambda d: not message_box.text.strip())
+            
+            print("✅ Message sent successfully!")
+            sent = True
+            return True
+            
+        except UnconfirmedSend as e:
+            session.active_chat = None
+            WHATSAPP_FAILURES.labels(timer.current or 'send', e.__class__.__name__).inc()
+            print(f"⚠️ {e}; not retrying it, the message may be in the group")
+            raise
         
-        print("✅ Message sent successfully!")
-        return True
+        except Exception as e:
+            session.active_chat = None
+            WHATSAPP_FAILURES.labels(timer.current or 'send', e.__class__.__name__).inc()
+            print(f"❌ Error sending to WhatsApp: {e}")
+            # The browser may have died; have it checked before the next send
+            session_watchdog.wake()
+            return False
         
-    except Exception as e:
-        print(f"❌ Error sending to WhatsApp: {e}")
+        finally:
+            config['last_send_timings'] = timer.as_dict()
+            SEND_TIME.labels('ok' if sent else 'error').observe(config['last_send_timings']['total'])
+            print(f"⏱️ Send timings: {config['last_send_timings']}")
+
+
+def acquire_lease(key):
+    """The send lease for an outbox key, or None if another node has it"""
+    lease = leases.acquire(key)
+    if lease is None:
+        SEND_LEASES.labels('busy').inc()
+    elif lease.previous_holder:
+        SEND_LEASES.labels('taken_over').inc()
+        print(f"🔁 Took over {key} from {lease.previous_holder}")
+    else:
+        SEND_LEASES.labels('acquired').inc()
+    return lease
+
+
+def supersede_if_sent(row):
+    """Retire `row` if its lease was completed elsewhere; True if it was
+    
+    Without this a row that lost its slot to another node would stay
+    pending, and be offered for delivery again on every resume.
+    """
+    lease = leases.get(row['idempotency_key'])
+    if not lease or lease['state'] != 'done':
         return False
+    outbox.mark_superseded(row['id'])
+    print(f"ℹ️ {row['slot']} message for {row['group_link']} was already sent by {lease['holder']}")
+    return True
+
+
+def fence(lease):
+    """SendPool guard: only send while this node still holds the lease"""
+    if leases.fence(lease):
+        return True
+    SEND_LEASES.labels('lost').inc()
+    print(f"⛔ Lease on {lease.key} was taken over, not sending")
+    return False
+
 
+def deliver(row, lease=None):
+    """Claim an outbox row and queue its send; returns the Future, or None
 
-def job_11_30():
-    """Job for 11:30 AM"""
-    message = generate_hunger_message("11:30 AM – Pre-Lunch Hunger")
-    if message:
-        send_to_whatsapp_group(message)
+    The send is leased under the row's idempotency key (see ``leases``), so
+    only one node sends it. The row ends up 'sent' or 'failed' when the
+    send completes, or 'unconfirmed' (final, with the lease completed) when
+    it may have gone out. A row whose lease another node completed becomes
+    'superseded'.
+    """
+    lease = lease or acquire_lease(row['idempotency_key'])
+    if not lease:
+        supersede_if_sent(row)
+        return None
+    claimed = outbox.claim(row['id'])
+    if not claimed:
+        leases.release(lease)
+        return None
+    leases.hold(lease)
+    
+    def record(future):
+        try:
+            ok, error = future.result(), None
+        except UnconfirmedSend as e:
+            outbox.mark_unconfirmed(claimed['id'], str(e))
+            leases.complete(lease)
+            return
+        except Exception as e:
+            ok, error = False, str(e)
+        if ok:
+            outbox.mark_sent(claimed['id'])
+            if not leases.complete(lease):
+                print(f"⚠️ Sent {lease.key} after losing its lease; it may go out twice")
+        else:
+            outbox.mark_failed(claimed['id'], error or "send failed")
+            leases.release(lease)
+    
+    future = send_pool.submit(claimed['group_link'], claimed['message'], guard=lambda: fence(lease))
+    future.add_done_callback(record)
+    return future
 
 
-def job_16_30():
-    """Job for 4:30 PM"""
-    message = generate_hunger_message("4:30 PM – Evening Snack Time")
-    if message:
-        send_to_whatsapp_group(message)
+@traced()
+def run_slot(group_link, slot):
+    """Record one group's slot message in the outbox and queue it"""
+    tracing.current_span().set(group=group_link, slot=slot)
+    slot_date = datetime.now(scheduler.tz).date().isoformat()
+    key = idempotency_key(group_link, slot, slot_date)
+    row = outbox.get_by_key(key)
+    if row and (row['state'] in FINAL_STATES or outbox.exhausted(row)):
+        if row['state'] in FINAL_STATES:
+            # A crash after the send can leave the lease open; close it so
+            # neither the takeover check nor another node sends it again
+            stale = leases.acquire(key)
+            if stale:
+                leases.complete(stale)
+        print(f"ℹ️ {slot} message for {group_link} already {row['state']} today")
+        return
+    
+    # Before generating anything: another node may own this slot
+    lease = acquire_lease(key)
+    if not lease:
+        if row and row['state'] == 'sending':
+            print(f"ℹ️ {slot} message for {group_link} already sending")
+        elif not (row and supersede_if_sent(row)):
+            print(f"ℹ️ {slot} message for {group_link} is handled by another node")
+        return
+    # Renewed from here on, so a slow inline generation cannot outlast lease_ttl
+    leases.hold(lease)
+    
+    if row and row['state'] == 'sending' and outbox.requeue(row['id']):
+        # Its lease lapsed, so the node sending it died mid-send: send it again
+        print(f"🔁 Resending {slot} message for {group_link}, its send was interrupted")
+        row = outbox.get(row['id'])
+    
+    if not row:
+        try:
+            message, source = message_buffer.pop(slot), 'buffer'
+            if not message:
+                # Buffer ran dry (e.g. scheduler just started): generate inline
+                print(f"⚠️ No pre-generated message for {slot}, generating now...")
+                message, source = generate_within_deadline(config['message_templates'][slot]), 'groq'
+            if not message:
+                print(f"🛟 Groq missed the {config['generation_deadline']}s deadline, using a fallback message")
+                message, source = fallback_corpus.next(slot), 'fallback'
+            if not message:
+                print(f"❌ No message available for {slot}, skipping {group_link}")
+                SLOT_MESSAGES.labels('none').inc()
+                leases.release(lease)
+                return
+            SLOT_MESSAGES.labels(source).inc()
+            row, _ = outbox.enqueue(group_link, slot, slot_date, message)
+        except BaseException:
+            # Let another node (or the takeover check) have the slot at once
+            leases.release(lease)
+            raise
+    
+    deliver(row, lease)
+
+
+# Outbox slot of the one-off messages sent by "Send Test"
+TEST_SLOT = 'test'
+
+
+def resume_outbox():
+    """Re-queue today's messages that a crash or failed send left undelivered"""
+    outbox.recover()
+    today = datetime.now(scheduler.tz).date().isoformat()
+    # A failed test send was reported on the page; it is not sent again later
+    rows = outbox.deliverable(since_date=today, exclude_slots=(TEST_SLOT,))
+    for row in rows:
+        deliver(row)
+    return len(rows)
+
+
+class SlotTakeover:
+    """Re-runs today's slots whose lease lapsed or was released
+
+    Covers a node that died holding a lease (including this one, restarted
+    with its row still 'sending'), and sends that failed on another node.
+    ``run_slot`` acquires the lease itself, so several nodes checking at
+    once still send each slot once.
+    """
+    
+    def __init__(self, run=None):
+        self.run = run or run_slot
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+    
+    def check(self, now=None):
+        """Run every orphaned slot of today once; returns how many"""
+        now = now or datetime.now(scheduler.tz)
+        today = now.date().isoformat()
+        slots = {
+            idempotency_key(group['whatsapp_group_link'], slot, today): (group['whatsapp_group_link'], slot)
+            for group, slot, _ in slot_table()
+        }
+        # A slot whose message ran out of attempts is left alone
+        orphaned = [key for key in leases.orphaned(slots) if not outbox.exhausted(outbox.get_by_key(key))]
+        for key in orphaned:
+            if self._stop.is_set():
+                break
+            self.run(*slots[key])
+        return len(orphaned)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Error checking slot leases: {e}")
+            self._wake.wait(config['lease_takeover_interval'])
+            self._wake.clear()
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='slot-takeover', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+slot_takeover = SlotTakeover()
+
+
+_config_lock = Lock()
+
+
+def apply_config(values):
+    """Install settings read from the config file, all at once
+
+    Everything is validated first, so a bad file changes nothing. A running
+    scheduler gets the new job table and timezone in one swap, ready
+    messages of relabelled slots are dropped, the send pool is resized and
+    leases renew with the new lease_ttl (a stopped scheduler still takes the
+    timezone); browser sessions are left running. Returns the changed setting names.
+    """
+    try:
+        settings = validated_config(file_settings(values))
+    except ValueError:
+        CONFIG_RELOADS.labels('rejected').inc()
+        raise
+    with _config_lock:
+        _file_keys.clear()
+        _file_keys.update(key for key in values if key in settings)
+        for key in RESTART_KEYS:
+            if key in settings and settings.pop(key) != config[key]:
+                print(f"⚠️ {key} changed in {CONFIG_PATH}; restart to apply it")
+        changed = {key: value for key, value in settings.items() if config[key] != value}
+        if not changed:
+            return []
+        old_labels = config['message_templates']
+        new_labels = changed.get('message_templates', old_labels)
+        relabelled = [slot for slot, label in old_labels.items() if new_labels.get(slot) != label]
+        
+        # One C-level update: other threads see all old or all new settings
+        config.update(changed)
+        if config['is_running']:
+            scheduler.set_jobs(slot_jobs(), timezone=config['timezone'])
+        else:
+            # No jobs until it is started, but next-run times use the timezone
+            scheduler.set_timezone(config['timezone'])
+        send_pool.resize(config['driver_pool_size'])
+        leases.ttl = config['lease_ttl']
+        message_buffer.discard(relabelled)
+        message_buffer.wake()
+    CONFIG_RELOADS.labels('applied').inc()
+    print(f"🔄 Applied config changes: {', '.join(sorted(changed))}")
+    return sorted(changed)
+
 
+config_watcher = configfile.ConfigWatcher(CONFIG_PATH, apply_config, config['config_reload_interval'])
 
-def job_21_30():
-    """Job for 9:30 PM"""
-    message = generate_hunger_message("9:30 PM – Late Night Cravings")
-    if message:
-        send_to_whatsapp_group(message)
 
+def slot_jobs():
+    """Scheduler job table: one job per group and slot"""
+    return {
+        f"{group['name']}/{slot}": (at, lambda link=group['whatsapp_group_link'], slot=slot: run_slot(link, slot))
+        for group, slot, at in slot_table()
+    }
 
-def run_scheduler():
-    """Run the scheduler in background"""
-    while config['is_running']:
-        schedule.run_pending()
-        time.sleep(30)
+
+def init_whatsapp_job(job):
+    """Background job: start the browser of every session in the send pool"""
+    sessions = send_pool.sessions[:send_pool.size]
+    started = 0
+    with background_jobs.exclusive('driver', job):
+        for index, session in enumerate(sessions, 1):
+            with session.lock:
+                if session.driver:
+                    continue
+                job.update(f"Opening Chrome and loading WhatsApp Web for session {index} of "
+                           f"{len(sessions)} (scan QR if needed)...")
+                session.ensure_driver()
+                started += 1
+    failed = [session.profile_dir for session in sessions if not session.driver]
+    if failed:
+        raise RuntimeError(f'Failed to initialize WhatsApp in {", ".join(failed)}. Install ChromeDriver.')
+    if not started:
+        return 'WhatsApp already initialized!'
+    return 'WhatsApp initialized! Scan QR if needed, then click "Send Test".'
+
+
+def send_test_job(job, groups, slot):
+    """Background job: generate one message for `slot` and send it to every group"""
+    job.update("Generating test message...")
+    # Streamed, so the page shows the message while Groq is still writing it
+    parts = []
+    shown = time.monotonic()
+    try:
+        for delta in stream_hunger_message(config['message_templates'][slot]):
+            parts.append(delta)
+            if time.monotonic() - shown >= config['stream_update_interval']:
+                job.update("Generating test message...", draft=''.join(parts))
+                shown = time.monotonic()
+    except Exception as e:
+        print(f"Error streaming from Groq API: {e}")
+        raise RuntimeError(f'Failed to generate message: {e}') from e
+    message = ''.join(parts).strip()
+    if not message:
+        raise RuntimeError('Failed to generate message: Groq returned an empty reply.')
+    
+    with background_jobs.exclusive('driver', job):
+        today = datetime.now(scheduler.tz).date().isoformat()
+        sends = []
+        for group in groups:
+            link = group['whatsapp_group_link']
+            row, _ = outbox.enqueue(link, TEST_SLOT, today, message, key=f"{link}|{TEST_SLOT}|{time.time()}")
+            sends.append((group['name'], deliver(row)))
+        job.update(f"Sending to {len(sends)} group(s)...", text=message)
+        
+        failed = []
+        for name, future in sends:
+            try:
+                ok = bool(future and future.result())
+            except UnconfirmedSend:
+                job.update(f"Sent to {name}, but could not confirm it", group=name, ok=True)
+                continue
+            job.update(f"{'Sent to' if ok else 'Failed to send to'} {name}", group=name, ok=ok)
+            if not ok:
+                failed.append(name)
+    if failed:
+        raise RuntimeError(f"Failed to send to {', '.join(failed)}. Check if you are in the group.")
+    return 'Test message sent to group!'
+
+
+def job_accepted(job, message):
+    """202 with the job's URLs for API clients, a redirect for the web form"""
+    if request.accept_mimetypes.best == 'application/json' or request.is_json:
+        return jsonify({
+            'job_id': job.id,
+            'state': job.state,
+            'status_url': url_for('job_status', job_id=job.id),
+            'events_url': url_for('job_events', job_id=job.id),
+        }), 202
+    return redirect(url_for('index', message=message, job=job.id))
 
 
 # HTML Template
@@ -390,6 +2757,15 @@ HTML_TEMPLATE = """
         .setup-steps ol { margin-left: 20px; }
         .setup-steps li { margin: 10px 0; line-height: 1.6; }
         .setup-steps a { color: #fff; text-decoration: underline; font-weight: 600; }
+        .message-preview {
+            background: #f8f9fa;
+            border-left: 4px solid #25d366;
+            padding: 15px;
+            border-radius: 8px;
+            margin-bottom: 20px;
+            white-space: pre-line;
+            line-height: 1.6;
+        }
     </style>
 </head>
 <body>
@@ -400,7 +2776,56 @@ HTML_TEMPLATE = """
         <p class="subtitle">Send automated messages to WhatsApp groups with Groq AI</p>
         
         {% if status_message %}
-        <div class="alert alert-success">{{ status_message }}</div>
+        <div class="alert alert-success" id="status-message">{{ status_message }}</div>
+        {% endif %}
+        <div class="message-preview" id="message-preview" hidden></div>
+        <script>
+            function showPreview(text) {
+                var preview = document.getElementById('message-preview');
+                preview.hidden = false;
+                preview.textContent = text;
+            }
+            
+            // Stream a sample message from /preview as Groq writes it
+            function previewMessage() {
+                var text = '';
+                showPreview('✍️ ...');
+                var events = new EventSource('/preview');
+                events.addEventListener('token', function (e) {
+                    text += JSON.parse(e.data).text;
+                    showPreview(text);
+                });
+                events.addEventListener('done', function (e) {
+                    var result = JSON.parse(e.data);
+                    showPreview(result.valid ? result.message : result.message + '\n⚠️ Does not follow the 3-line format');
+                    events.close();
+                });
+                events.addEventListener('error', function (e) {
+                    showPreview('❌ ' + (e.data ? JSON.parse(e.data).error : 'Preview failed'));
+                    events.close();
+                });
+            }
+        </script>
+        {% if job_id %}
+        <script>
+            // Follow the background job and show its progress in the status line
+            (function () {
+                var box = document.getElementById('status-message');
+                var events = new EventSource('/jobs/' + encodeURIComponent({{ job_id|tojson }}) + '/events');
+                events.addEventListener('progress', function (e) {
+                    var event = JSON.parse(e.data);
+                    box.textContent = '⏳ ' + event.message;
+                    if (event.draft || event.text) {
+                        showPreview(event.draft || event.text);
+                    }
+                });
+                events.addEventListener('end', function (e) {
+                    var job = JSON.parse(e.data);
+                    box.textContent = job.state === 'succeeded' ? '✅ ' + job.result : '❌ ' + job.error;
+                    events.close();
+                });
+            })();
+        </script>
         {% endif %}
         
         <div class="setup-steps">
@@ -457,19 +2882,19 @@ HTML_TEMPLATE = """
             <form method="POST" action="/test" style="display: inline;">
                 <button type="submit" class="btn btn-secondary">🧪 Send Test</button>
             </form>
+            
+            <button type="button" class="btn btn-info" onclick="previewMessage()">👀 Preview Message</button>
         </div>
         
         <div class="schedule-info">
-            <h3>📅 Daily Schedule</h3>
-            <div class="schedule-item">
-                <span class="time">11:30 AM</span> - Pre-Lunch Hunger
-            </div>
+            <h3>📅 Daily Schedule ({{ timezone }})</h3>
+            {% for at, slot, names in schedule %}
             <div class="schedule-item">
-                <span class="time">4:30 PM</span> - Evening Snack
-            </div>
-            <div class="schedule-item">
-                <span class="time">9:30 PM</span> - Late Night
+                <span class="time">{{ at }}</span> - {{ slot }}{% if names %} ({{ names|join(', ') }}){% endif %}
             </div>
+            {% else %}
+            <div class="schedule-item">No groups configured yet</div>
+            {% endfor %}
         </div>
         
         <div class="info-box">
@@ -493,12 +2918,24 @@ HTML_TEMPLATE = """
 
 @app.route('/')
 def index():
+    # One row per (time, slot); the groups are named only when they differ
+    rows = {}
+    for group, slot, at in slot_table():
+        rows.setdefault((parse_slot_time(at), at, slot), []).append(group['name'])
+    everyone = len(configured_groups())
+    schedule = [
+        (at, slot, names if len(names) < everyone else [])
+        for (_, at, slot), names in sorted(rows.items())
+    ]
     return render_template_string(
         HTML_TEMPLATE,
         api_key=config['api_key'],
         whatsapp_group_link=config['whatsapp_group_link'],
         is_running=config['is_running'],
-        status_message=request.args.get('message')
+        schedule=schedule,
+        timezone=config['timezone'],
+        status_message=request.args.get('message'),
+        job_id=request.args.get('job')
     )
 
 
@@ -506,70 +2943,188 @@ def index():
 def save_config():
     config['api_key'] = request.form.get('api_key', '')
     config['whatsapp_group_link'] = request.form.get('whatsapp_group_link', '').strip()
+    # Keep them across restarts; the rest of the file is left as it is
+    try:
+        values = configfile.load(CONFIG_PATH)
+        values.update(api_key=config['api_key'], whatsapp_group_link=config['whatsapp_group_link'])
+        configfile.save(CONFIG_PATH, values)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not save {CONFIG_PATH}: {e}")
+        return redirect(url_for('index', message=f'⚠️ Saved until restart only: could not write {CONFIG_PATH}'))
     return redirect(url_for('index', message='✅ Configuration saved!'))
 
 
 @app.route('/init-whatsapp', methods=['POST'])
 def initialize_whatsapp():
-    if config['driver']:
+    if all(session.driver for session in send_pool.sessions[:send_pool.size]):
         return redirect(url_for('index', message='⚠️ WhatsApp already initialized!'))
     
-    config['driver'] = init_whatsapp_driver()
-    
-    if config['driver']:
-        return redirect(url_for('index', message='✅ WhatsApp initialized! Scan QR if needed, then click "Send Test".'))
-    else:
-        return redirect(url_for('index', message='❌ Failed to initialize WhatsApp. Install ChromeDriver.'))
+    # Repeated clicks follow the browser start-up already in progress
+    job = background_jobs.submit('init-whatsapp', init_whatsapp_job, coalesce=True)
+    return job_accepted(job, '⏳ Initializing WhatsApp...')
 
 
 @app.route('/start', methods=['POST'])
 def start_scheduler():
-    if not config['api_key'] or not config['whatsapp_group_link']:
+    if not config['api_key'] or not configured_groups():
         return redirect(url_for('index', message='⚠️ Please configure both API key and group link!'))
     
-    if not config['driver']:
+    if not send_pool.primary.driver:
         return redirect(url_for('index', message='⚠️ Please click "Initialize WhatsApp" first!'))
     
-    config['is_running'] = True
-    
-    schedule.clear()
-    schedule.every().day.at("11:30").do(job_11_30)
-    schedule.every().day.at("16:30").do(job_16_30)
-    schedule.every().day.at("21:30").do(job_21_30)
-    
-    thread = Thread(target=run_scheduler, daemon=True)
-    thread.start()
+    with _config_lock:
+        config['is_running'] = True
+        send_pool.resize(config['driver_pool_size'])
+        scheduler.set_jobs(slot_jobs(), timezone=config['timezone'])
+    backfill_duplicate_index()
+    scheduler.start()
+    message_buffer.start()
+    session_watchdog.start()
+    slot_takeover.start()
+    resumed = resume_outbox()
+    if resumed:
+        print(f"📤 Re-queued {resumed} undelivered message(s) from the outbox")
     
     return redirect(url_for('index', message='✅ Scheduler started! Messages will be sent automatically.'))
 
 
 @app.route('/stop', methods=['POST'])
 def stop_scheduler():
-    config['is_running'] = False
-    schedule.clear()
+    with _config_lock:
+        config['is_running'] = False
+        scheduler.stop()
+        scheduler.clear()
+    message_buffer.stop()
+    session_watchdog.stop()
+    slot_takeover.stop()
     return redirect(url_for('index', message='⏸️ Scheduler stopped.'))
 
 
+@app.route('/buffer')
+def buffer_status():
+    return jsonify(message_buffer.status())
+
+
+@app.route('/sessions')
+def session_status():
+    return jsonify(session_watchdog.status())
+
+
+@app.route('/leases')
+def lease_status():
+    today = datetime.now(scheduler.tz).date().isoformat()
+    result = []
+    for group, slot, at in slot_table():
+        lease = leases.get(idempotency_key(group['whatsapp_group_link'], slot, today))
+        result.append({'group': group['name'], 'slot': slot, 'at': at, 'lease': lease})
+    return jsonify({'node_id': leases.node_id, 'date': today, 'slots': result})
+
+
+@app.route('/config')
+def config_status():
+    return jsonify({
+        'path': CONFIG_PATH,
+        'exists': os.path.exists(CONFIG_PATH),
+        'applied_at': config_watcher.applied_at,
+        'error': config_watcher.error,
+        'schedule_times': config['schedule_times'],
+        'message_templates': config['message_templates'],
+        'groups': configured_groups(),
+        'timezone': config['timezone'],
+    })
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(REGISTRY.expose(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/history')
+def send_history():
+    rows = outbox.history(
+        group_link=request.args.get('group'),
+        state=request.args.get('state'),
+        limit=min(request.args.get('limit', 50, type=int), 1000),
+    )
+    return jsonify(rows)
+
+
 @app.route('/test', methods=['POST'])
 def test_message():
     if not config['api_key']:
         return redirect(url_for('index', message='⚠️ Configure API key first!'))
     
-    if not config['whatsapp_group_link']:
+    groups = configured_groups()
+    if not groups:
         return redirect(url_for('index', message='⚠️ Configure group link first!'))
     
-    if not config['driver']:
+    if not send_pool.primary.driver:
         return redirect(url_for('index', message='⚠️ Click "Initialize WhatsApp" first!'))
     
-    message = generate_hunger_message("4:30 PM – Evening Snack Time")
-    if message:
-        success = send_to_whatsapp_group(message)
-        if success:
-            return redirect(url_for('index', message='✅ Test message sent to group!'))
-        else:
-            return redirect(url_for('index', message='❌ Failed to send. Check if you are in the group.'))
-    else:
-        return redirect(url_for('index', message='❌ Failed to generate message. Check API key.'))
+    slot = request.values.get('slot') or default_slot()
+    if slot not in config['message_templates']:
+        if request.accept_mimetypes.best == 'application/json' or request.is_json:
+            return jsonify({'error': f'unknown slot {slot!r}'}), 400
+        return redirect(url_for('index', message=f'⚠️ Unknown slot {slot!r}!'))
+    
+    job = background_jobs.submit('send-test', send_test_job, groups, slot)
+    return job_accepted(job, '⏳ Sending test message...')
+
+
+@app.route('/preview')
+def preview_message():
+    """Stream a sample message for a slot as Server-Sent Events"""
+    if not config['api_key']:
+        return jsonify({'error': 'API key not configured'}), 400
+    slot = request.args.get('slot') or default_slot()
+    if slot not in config['message_templates']:
+        return jsonify({'error': f'unknown slot {slot!r}'}), 400
+    
+    def events():
+        parts = []
+        try:
+            for delta in stream_hunger_message(config['message_templates'][slot]):
+                parts.append(delta)
+                yield f"event: token\ndata: {json.dumps({'text': delta}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            print(f"Error streaming from Groq API: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+            return
+        message = ''.join(parts).strip()
+        done = {'message': message, 'valid': is_valid_message(message)}
+        yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify(background_jobs.recent(min(request.args.get('limit', 20, type=int), 100)))
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = background_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    job = background_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'unknown job'}), 404
+    after = request.headers.get('Last-Event-ID', 0, type=int)
+    return Response(
+        stream_with_context(sse_events(job, after)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 if __name__ == '__main__':
@@ -579,7 +3134,7 @@ if __name__ == '__main__':
     print("✨ NEW: Now supports WhatsApp Group Invite Links!")
     print()
     print("📱 Setup:")
-    print("   1. Install: pip install selenium requests flask schedule")
+    print("   1. Install: pip install selenium requests flask pytz")
     print("   2. Install ChromeDriver: https://chromedriver.chromium.org/")
     print("   3. Get group invite link from WhatsApp")
     print("   4. Open: http://localhost:5000")
@@ -590,4 +3145,6 @@ if __name__ == '__main__':
     print("   - Test before starting scheduler")
     print("=" * 70)
     print()
+    tracing.configure(config['trace_path'], config['trace_max_bytes'], config['trace_backups'])
+    config_watcher.start()
     app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file